@@ -0,0 +1,107 @@
+"""Compare latency and token usage of PDF-file vs text-layer resume extraction.
+
+Usage (from flow/):
+
+    uv run python benchmarks/bench_extraction_paths.py \
+        --input-dir /absolute/path/to/resume-folder --limit 20
+
+Each PDF is sent once per path. PDFs without a usable text layer are skipped for
+both paths so the medians compare the same resumes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from flow.services.pdf_text_layer import usable_text_layer_or_none
+from flow.services.resume_extractor import (
+    build_extraction_input,
+    parse_resume_profile_response,
+    require_openai_api_key,
+)
+
+
+def _usage_tokens(response: Any) -> tuple[int | None, int | None]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+
+
+def _median(values: list[float | int | None]) -> float | None:
+    present = [value for value in values if value is not None]
+    return statistics.median(present) if present else None
+
+
+def _run_path(client: OpenAI, *, model: str, pdf_path: Path, pdf_bytes: bytes, pdf_text: str | None) -> dict[str, Any]:
+    extraction_input = build_extraction_input(
+        filename=pdf_path.name, pdf_bytes=pdf_bytes, pdf_text=pdf_text
+    )
+    started_at = time.perf_counter()
+    response = client.responses.create(model=model, input=extraction_input)
+    latency_seconds = time.perf_counter() - started_at
+    input_tokens, output_tokens = _usage_tokens(response)
+    try:
+        parse_resume_profile_response(response)
+        valid = True
+    except Exception:  # noqa: BLE001
+        valid = False
+    return {
+        "latency_seconds": latency_seconds,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "valid": valid,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input-dir", type=Path, required=True)
+    parser.add_argument("--model", default="gpt-5.1")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSONL of per-PDF results.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = OpenAI(api_key=require_openai_api_key())
+    pdf_paths = sorted(args.input_dir.expanduser().resolve().glob("*.pdf"))[: args.limit]
+
+    results: dict[str, list[dict[str, Any]]] = {"file": [], "text_layer": []}
+    skipped = 0
+    records: list[dict[str, Any]] = []
+    for pdf_path in pdf_paths:
+        pdf_bytes = pdf_path.read_bytes()
+        pdf_text = usable_text_layer_or_none(pdf_bytes)
+        if pdf_text is None:
+            skipped += 1
+            continue
+        for path_name, text in (("file", None), ("text_layer", pdf_text)):
+            result = _run_path(client, model=args.model, pdf_path=pdf_path, pdf_bytes=pdf_bytes, pdf_text=text)
+            results[path_name].append(result)
+            records.append({"pdf": str(pdf_path), "path": path_name, **result})
+
+    if args.output is not None:
+        with args.output.open("w", encoding="utf-8") as file_obj:
+            for record in records:
+                file_obj.write(json.dumps(record) + "\n")
+
+    print(f"Model: {args.model}")
+    print(f"PDFs benchmarked: {len(results['file'])} (skipped without text layer: {skipped})")
+    for path_name, path_results in results.items():
+        print(
+            f"{path_name:>10}: "
+            f"median_latency_s={_median([r['latency_seconds'] for r in path_results])} "
+            f"median_input_tokens={_median([r['input_tokens'] for r in path_results])} "
+            f"median_output_tokens={_median([r['output_tokens'] for r in path_results])} "
+            f"valid={sum(r['valid'] for r in path_results)}/{len(path_results)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Measure recall loss of reduced-dimension FAISS indexes against the full-dimension flat index.
+
+Usage (from flow/):
+
+    uv run python benchmarks/bench_reduced_dimensions.py \
+        --cache-path outputs/embedding_cache.db --dimensions 256 1024 \
+        --factory PCA256,Flat --factory OPQ64_256,IVF256,PQ64
+
+Vectors come from the embedding cache (native-size entries for --model), so no API
+calls are made. `--dimensions N` truncates each vector to its first N components and
+renormalizes, which is how text-embedding-3 shortens embeddings server side. Each
+`--factory` spec is trained on the corpus itself. Ground truth is an exact flat
+search over the full vectors; queries are corpus vectors, with the query row itself
+excluded from both result lists.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+
+from flow.services.embedding_cache import decode_vector
+from flow.services.faiss_index_builder import (
+    DEFAULT_METRIC,
+    METRICS,
+    StreamingIndexBuilder,
+    apply_search_parameters,
+    prepare_vectors,
+)
+
+
+def _load_cached_vectors(cache_path: Path, *, model: str, limit: int) -> Any:
+    with sqlite3.connect(cache_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT embedding FROM embeddings
+            WHERE model = ? AND dimensions = 0
+            ORDER BY text_sha256
+            LIMIT ?
+            """,
+            (model, limit),
+        ).fetchall()
+    if not rows:
+        raise SystemExit(f"No native-size {model!r} embeddings in {cache_path}.")
+    return np.array([decode_vector(row[0]) for row in rows], dtype="float32")
+
+
+def _truncate(vectors: Any, dimensions: int) -> Any:
+    shortened = np.ascontiguousarray(vectors[:, :dimensions])
+    faiss.normalize_L2(shortened)
+    return shortened
+
+
+def _build(vectors: Any, *, index_factory: str, metric: str) -> Any:
+    builder = StreamingIndexBuilder(index_factory, metric=metric, train_sample_size=len(vectors))
+    builder.add(np.arange(len(vectors), dtype="int64"), vectors)
+    return builder.finish()
+
+
+def _search_excluding_self(index: Any, queries: Any, query_ids: Any, *, metric: str, k: int) -> tuple[list[list[int]], float]:
+    started_at = time.perf_counter()
+    _, neighbors = index.search(prepare_vectors(queries, metric), k + 1)
+    latency_ms = (time.perf_counter() - started_at) * 1000 / len(queries)
+    results = [
+        [int(row_id) for row_id in row if row_id >= 0 and row_id != query_id][:k]
+        for row, query_id in zip(neighbors, query_ids)
+    ]
+    return results, latency_ms
+
+
+def _recall(approximate: list[list[int]], exact: list[list[int]]) -> float:
+    return statistics.mean(
+        len(set(found) & set(truth)) / len(truth) for found, truth in zip(approximate, exact) if truth
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache-path", type=Path, required=True)
+    parser.add_argument("--model", default="text-embedding-3-large")
+    parser.add_argument("--metric", choices=METRICS, default=DEFAULT_METRIC)
+    parser.add_argument("--dimensions", type=int, nargs="*", default=[256, 1024])
+    parser.add_argument("--factory", action="append", default=[], help="Extra index_factory spec; repeatable.")
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=50_000, help="Maximum corpus vectors to load.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSONL of per-variant results.")
+    args = parser.parse_args()
+
+    vectors = _load_cached_vectors(args.cache_path.expanduser().resolve(), model=args.model, limit=args.limit)
+    query_ids = np.random.default_rng(args.seed).choice(
+        len(vectors), size=min(args.queries, len(vectors)), replace=False
+    )
+
+    baseline = _build(vectors, index_factory="Flat", metric=args.metric)
+    exact, baseline_latency_ms = _search_excluding_self(
+        baseline, vectors[query_ids], query_ids, metric=args.metric, k=args.top_k
+    )
+    records: list[dict[str, Any]] = [
+        {
+            "variant": f"Flat d={vectors.shape[1]}",
+            "recall": 1.0,
+            "bytes_per_vector": len(faiss.serialize_index(baseline)) / len(vectors),
+            "latency_ms": baseline_latency_ms,
+        }
+    ]
+
+    variants: list[tuple[str, Any, str]] = [
+        (f"dimensions={dimensions}", _truncate(vectors, dimensions), "Flat")
+        for dimensions in args.dimensions
+        if 0 < dimensions < vectors.shape[1]
+    ]
+    variants.extend((index_factory, vectors, index_factory) for index_factory in args.factory)
+    for name, corpus, index_factory in variants:
+        index = _build(corpus, index_factory=index_factory, metric=args.metric)
+        try:
+            apply_search_parameters(index, {"nprobe": args.nprobe})
+        except ValueError:
+            pass
+        found, latency_ms = _search_excluding_self(
+            index, corpus[query_ids], query_ids, metric=args.metric, k=args.top_k
+        )
+        records.append(
+            {
+                "variant": name,
+                "recall": _recall(found, exact),
+                "bytes_per_vector": len(faiss.serialize_index(index)) / len(corpus),
+                "latency_ms": latency_ms,
+            }
+        )
+
+    if args.output is not None:
+        with args.output.open("w", encoding="utf-8") as file_obj:
+            for record in records:
+                file_obj.write(json.dumps({"model": args.model, "metric": args.metric, **record}) + "\n")
+
+    print(f"Model: {args.model}  metric: {args.metric}")
+    print(f"Corpus vectors: {len(vectors)}  queries: {len(query_ids)}  recall@{args.top_k} vs exact full-dimension")
+    for record in records:
+        print(
+            f"{record['variant']:>28}: "
+            f"recall={record['recall']:.4f} "
+            f"bytes_per_vector={record['bytes_per_vector']:.0f} "
+            f"latency_ms={record['latency_ms']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
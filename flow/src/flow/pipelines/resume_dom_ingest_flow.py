@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+from metaflow import FlowSpec, Parameter, step
+
+from flow.services.linkedin_dom_mapper import (
+    DOM_MAPPER_VERSION,
+    iter_linkedin_dom_documents,
+    map_linkedin_dom_payload,
+)
+from flow.services.resume_profile_store import ensure_resume_profiles_table, upsert_resume_profile_rows
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_DB_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
+
+
+def ingest_linkedin_dom_payloads(
+    *,
+    input_root: Path,
+    db_path: Path,
+    batch_size: int = 1000,
+) -> tuple[int, list[dict[str, str]]]:
+    if batch_size <= 0:
+        raise ValueError("batch_size must be greater than 0.")
+
+    ensure_resume_profiles_table(db_path)
+    ingested_count = 0
+    failures: list[dict[str, str]] = []
+    pending: list[dict[str, Any]] = []
+    for source, document in iter_linkedin_dom_documents(input_root):
+        try:
+            pdf_stem, profile = map_linkedin_dom_payload(json.loads(document))
+        except Exception as exc:  # noqa: BLE001
+            failures.append({"source": source, "error_message": f"{type(exc).__name__}: {exc}"})
+            continue
+        pending.append(
+            {
+                "pdf_stem": pdf_stem,
+                "source_pdf": source,
+                "profile": profile,
+                "prompt_version_sha": DOM_MAPPER_VERSION,
+            }
+        )
+        if len(pending) >= batch_size:
+            upsert_resume_profile_rows(db_path, pending)
+            ingested_count += len(pending)
+            pending = []
+
+    if pending:
+        upsert_resume_profile_rows(db_path, pending)
+        ingested_count += len(pending)
+    return ingested_count, failures
+
+
+class ResumeDomIngestFlow(FlowSpec):
+    input_dir = Parameter(
+        "input-dir",
+        type=str,
+        help="Folder of linkedin-profile-extractor payloads (*.json or *.jsonl).",
+    )
+    db_path = Parameter("db-path", type=str, default=str(DEFAULT_DB_PATH))
+    batch_size = Parameter("batch-size", type=int, default=1000)
+
+    @step
+    def start(self):
+        load_dotenv()
+        self.input_root = Path(self.input_dir).expanduser().resolve()
+        if not self.input_root.is_dir():
+            raise NotADirectoryError(f"Input path is not a directory: {self.input_root}")
+        self.resolved_db_path = Path(self.db_path).expanduser().resolve()
+        if self.batch_size <= 0:
+            raise ValueError("--batch-size must be greater than 0.")
+        self.next(self.ingest)
+
+    @step
+    def ingest(self):
+        self.ingested_count, self.failed_payloads = ingest_linkedin_dom_payloads(
+            input_root=self.input_root,
+            db_path=self.resolved_db_path,
+            batch_size=self.batch_size,
+        )
+        self.next(self.end)
+
+    @step
+    def end(self):
+        print(f"Ingested profiles: {self.ingested_count}")
+        print(f"Failures: {len(self.failed_payloads)}")
+        print(f"SQLite output: {self.resolved_db_path}")
+        for failed in self.failed_payloads:
+            print(f"- {failed['source']}: {failed['error_message']}")
+
+
+def main():
+    ResumeDomIngestFlow()
+
+
+if __name__ == "__main__":
+    main()
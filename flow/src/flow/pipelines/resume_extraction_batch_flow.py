@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
-import sqlite3
 import time
 from datetime import date, datetime, timezone
 from pathlib import Path
@@ -10,14 +11,41 @@ from typing import Any
 from dotenv import load_dotenv
 from metaflow import FlowSpec, Parameter, step
 
+from flow.services.extraction_cache import DEFAULT_CACHE_MAX_BYTES, ResumeExtractionCache
+from flow.services.extraction_cascade import (
+    ModelCascade,
+    merge_cascade_stats,
+    parse_cascade_models,
+    summarize_cascade_stats,
+)
+from flow.services.linkedin_pdf_parser import (
+    LOCAL_PARSER_VERSION,
+    extract_resume_profiles_locally,
+)
+from flow.services.pdf_file_store import PdfFileStore
+from flow.services.rate_limiter import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    AdaptiveRateLimiter,
+    get_shared_rate_limiter,
+)
+from flow.services.shared_budget import PRIORITY_BATCH, open_shared_budget
+from flow.services.resume_batch_extractor import (
+    iter_cascaded_batch_outcomes,
+    iter_resume_extraction_batch_outcomes,
+)
 from flow.services.resume_extractor import (
-    extract_resume_profile_from_pdf,
+    extract_resume_profiles_async,
     get_resume_parser_prompt_sha,
 )
+from flow.services.resume_profile_store import ensure_resume_profiles_table, upsert_resume_profile_rows
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 RESUME_SQLITE_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
+DEFAULT_EXTRACTION_CACHE_PATH = PROJECT_ROOT / "outputs" / "extraction_cache.db"
+DEFAULT_BUDGET_DB_PATH = PROJECT_ROOT / "outputs" / "openai_budget.db"
+DEFAULT_FILE_STORE_PATH = PROJECT_ROOT / "outputs" / "openai_files.db"
 DEBUG_LOG_PATH = Path("/Users/avishek.bhatia/Documents/line/.cursor/debug-900b31.log")
 DEBUG_SESSION_ID = "900b31"
 
@@ -45,6 +73,12 @@ def _discover_top_level_pdfs(input_root: Path) -> list[Path]:
     return sorted(path for path in input_root.glob("*.pdf") if path.is_file())
 
 
+def _shard_pdf_paths(pdf_paths: list[str], shard_size: int) -> list[list[str]]:
+    if shard_size <= 0:
+        raise ValueError("shard_size must be greater than 0.")
+    return [pdf_paths[index : index + shard_size] for index in range(0, len(pdf_paths), shard_size)]
+
+
 def _make_output_filename(source_pdf: Path) -> str:
     return f"{source_pdf.stem}_resume.json"
 
@@ -58,46 +92,10 @@ def _persist_resume_profile(profile: dict[str, Any], output_dir: Path, source_pd
     return output_path
 
 
-def _ensure_resume_profiles_table(db_path: Path) -> None:
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS resume_profiles (
-                id INTEGER PRIMARY KEY,
-                pdf_stem TEXT NOT NULL UNIQUE,
-                source_pdf TEXT NOT NULL,
-                full_name TEXT,
-                profile_json TEXT NOT NULL,
-                prompt_version_sha TEXT NOT NULL,
-                faiss_index_path TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-            """
-        )
-        existing_columns = {
-            row[1] for row in conn.execute("PRAGMA table_info(resume_profiles)").fetchall()
-        }
-        if "faiss_index_path" not in existing_columns:
-            conn.execute("ALTER TABLE resume_profiles ADD COLUMN faiss_index_path TEXT")
-        conn.commit()
-
-
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _get_full_name(profile: dict[str, Any]) -> str | None:
-    personal_info = profile.get("personal_information")
-    if not isinstance(personal_info, dict):
-        return None
-    full_name = personal_info.get("full_name")
-    if isinstance(full_name, str) and full_name.strip():
-        return full_name
-    return None
-
-
 def _upsert_resume_profile_row(
     *,
     db_path: Path,
@@ -105,39 +103,18 @@ def _upsert_resume_profile_row(
     profile: dict[str, Any],
     prompt_version_sha: str,
 ) -> None:
-    now = _utc_now_iso()
-    payload = json.dumps(profile, ensure_ascii=False)
-    with sqlite3.connect(db_path, timeout=30.0) as conn:
-        conn.execute(
-            """
-            INSERT INTO resume_profiles (
-                pdf_stem,
-                source_pdf,
-                full_name,
-                profile_json,
-                prompt_version_sha,
-                created_at,
-                updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(pdf_stem) DO UPDATE SET
-                source_pdf = excluded.source_pdf,
-                full_name = excluded.full_name,
-                profile_json = excluded.profile_json,
-                prompt_version_sha = excluded.prompt_version_sha,
-                updated_at = excluded.updated_at
-            """,
-            (
-                source_pdf.stem,
-                str(source_pdf),
-                _get_full_name(profile),
-                payload,
-                prompt_version_sha,
-                now,
-                now,
-            ),
-        )
-        conn.commit()
+    upsert_resume_profile_rows(
+        db_path,
+        [
+            {
+                "pdf_stem": source_pdf.stem,
+                "source_pdf": source_pdf,
+                "profile": profile,
+                "prompt_version_sha": prompt_version_sha,
+            }
+        ],
+        now=_utc_now_iso(),
+    )
 
 
 def _summarize_results(results: list[dict[str, Any]]) -> tuple[int, int, list[dict[str, Any]]]:
@@ -147,10 +124,45 @@ def _summarize_results(results: list[dict[str, Any]]) -> tuple[int, int, list[di
     return success_count, failure_count, failed_results
 
 
+def _summarize_cache_usage(results: list[dict[str, Any]]) -> dict[str, int]:
+    hits = sum(1 for result in results if result.get("cache_hit") is True)
+    misses = sum(1 for result in results if result.get("cache_hit") is False)
+    return {"hits": hits, "misses": misses}
+
+
+def _count_text_layer_results(results: list[dict[str, Any]]) -> int:
+    return sum(1 for result in results if result.get("text_layer_used") is True)
+
+
+def _count_local_parser_results(results: list[dict[str, Any]]) -> int:
+    return sum(1 for result in results if result.get("extractor") == "local")
+
+
 class ResumeExtractionBatchFlow(FlowSpec):
     input_dir = Parameter("input-dir", type=str, help="Path to source PDF folder.")
     output_dir = Parameter("output-dir", type=str, default="outputs")
     model = Parameter("model", type=str, default="gpt-5.1")
+    cascade_models = Parameter(
+        "cascade-models",
+        type=str,
+        default="",
+        help="Comma-separated models, cheapest first; overrides --model when set.",
+    )
+    mode = Parameter("mode", type=str, default="online")
+    extractor_backend = Parameter("extractor-backend", type=str, default="llm")
+    batch_poll_seconds = Parameter("batch-poll-seconds", type=int, default=60)
+    shard_size = Parameter("shard-size", type=int, default=200)
+    max_in_flight = Parameter("max-in-flight", type=int, default=16)
+    requests_per_minute = Parameter(
+        "requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    tokens_per_minute = Parameter("tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    budget_db_path = Parameter("budget-db-path", type=str, default=str(DEFAULT_BUDGET_DB_PATH))
+    text_layer = Parameter("text-layer", type=bool, default=False)
+    file_store_path = Parameter("file-store-path", type=str, default=str(DEFAULT_FILE_STORE_PATH))
+    use_cache = Parameter("use-cache", type=bool, default=True)
+    cache_path = Parameter("cache-path", type=str, default=str(DEFAULT_EXTRACTION_CACHE_PATH))
+    cache_max_mb = Parameter("cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024))
 
     @step
     def start(self):
@@ -164,8 +176,22 @@ class ResumeExtractionBatchFlow(FlowSpec):
         self.output_root = Path(self.output_dir).expanduser().resolve()
         self.output_root.mkdir(parents=True, exist_ok=True)
         self.sqlite_db_path = str(RESUME_SQLITE_PATH.resolve())
-        _ensure_resume_profiles_table(Path(self.sqlite_db_path))
+        ensure_resume_profiles_table(Path(self.sqlite_db_path))
         self.prompt_version_sha = get_resume_parser_prompt_sha()
+        self.extraction_mode = self.mode.strip().lower()
+        if self.extraction_mode not in {"online", "batch"}:
+            raise ValueError("--mode must be either 'online' or 'batch'.")
+        self.extractor = self.extractor_backend.strip().lower()
+        if self.extractor not in {"llm", "local"}:
+            raise ValueError("--extractor-backend must be either 'llm' or 'local'.")
+        if self.max_in_flight <= 0:
+            raise ValueError("--max-in-flight must be greater than 0.")
+        self.cascade_model_list = parse_cascade_models(self.cascade_models)
+        if self.cache_max_mb <= 0:
+            raise ValueError("--cache-max-mb must be greater than 0.")
+        self.extraction_cache_path = (
+            str(Path(self.cache_path).expanduser().resolve()) if self.use_cache else None
+        )
         # region agent log
         _debug_log(
             run_id="pre-fix",
@@ -185,38 +211,127 @@ class ResumeExtractionBatchFlow(FlowSpec):
             raise FileNotFoundError(f"No PDF files found in: {input_root}")
 
         self.pdf_paths = [str(path) for path in pdf_paths]
-        self.next(self.process_pdf, foreach="pdf_paths")
+        if self.extraction_mode == "batch":
+            # One task submits every request; the Batch API does the fan-out server side.
+            self.pdf_shards = [self.pdf_paths]
+        else:
+            self.pdf_shards = _shard_pdf_paths(self.pdf_paths, self.shard_size)
+        self.next(self.process_shard, foreach="pdf_shards")
+
+    def _batch_rate_limiter(self, model: str) -> AdaptiveRateLimiter:
+        return get_shared_rate_limiter(
+            model,
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+            initial_concurrency=min(4, self.max_in_flight),
+            max_concurrency=self.max_in_flight,
+            shared_budget=open_shared_budget(
+                self.budget_db_path,
+                name=model,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+            ),
+            priority=PRIORITY_BATCH,
+        )
 
     @step
-    def process_pdf(self):
+    def process_shard(self):
         load_dotenv()
-        source_pdf = Path(self.input).expanduser().resolve()
-        self.result = {
-            "source_pdf": str(source_pdf),
-            "output_path": None,
-            "success": False,
-            "error_message": None,
-        }
-
-        try:
-            extracted_profile = extract_resume_profile_from_pdf(source_pdf, model=self.model)
-            output_path = _persist_resume_profile(
-                profile=extracted_profile,
-                output_dir=self.output_root,
-                source_pdf=source_pdf,
+        cache = None
+        if self.extraction_cache_path:
+            cache = ResumeExtractionCache(
+                Path(self.extraction_cache_path),
+                max_bytes=self.cache_max_mb * 1024 * 1024,
             )
-            _upsert_resume_profile_row(
-                db_path=Path(self.sqlite_db_path),
-                source_pdf=source_pdf,
-                profile=extracted_profile,
-                prompt_version_sha=self.prompt_version_sha,
+        file_store = None
+        if self.file_store_path:
+            file_store = PdfFileStore(Path(self.file_store_path).expanduser().resolve())
+
+        pdf_paths = list(self.input)
+        local_outcomes: list[dict[str, Any]] = []
+        if self.extractor == "local":
+            # Rule-based LinkedIn parsing; PDFs failing its confidence checks go to the LLM.
+            local_outcomes, pdf_paths = extract_resume_profiles_locally(pdf_paths)
+
+        cascade = None
+        if self.cascade_model_list:
+            cascade = ModelCascade(
+                self.cascade_model_list,
+                rate_limiters={
+                    tier_model: self._batch_rate_limiter(tier_model)
+                    for tier_model in self.cascade_model_list
+                },
             )
-            self.result["output_path"] = str(output_path)
-            self.result["sqlite_db_path"] = self.sqlite_db_path
-            self.result["success"] = True
-        except Exception as exc:  # noqa: BLE001
-            self.result["error_message"] = f"{type(exc).__name__}: {exc}"
 
+        if not pdf_paths:
+            outcomes = []
+        elif self.extraction_mode == "batch":
+            batch_kwargs = {
+                "work_dir": self.output_root / "batch_requests",
+                "cache": cache,
+                "prompt_sha": self.prompt_version_sha,
+                "file_store": file_store,
+                "prefer_text_layer": self.text_layer,
+                "poll_interval_seconds": self.batch_poll_seconds,
+            }
+            if cascade is not None:
+                outcomes = iter_cascaded_batch_outcomes(pdf_paths, cascade=cascade, **batch_kwargs)
+            else:
+                outcomes = iter_resume_extraction_batch_outcomes(
+                    pdf_paths, model=self.model, **batch_kwargs
+                )
+        else:
+            outcomes = asyncio.run(
+                extract_resume_profiles_async(
+                    pdf_paths,
+                    model=self.model,
+                    max_in_flight=self.max_in_flight,
+                    cache=cache,
+                    prompt_sha=self.prompt_version_sha,
+                    rate_limiter=self._batch_rate_limiter(self.model),
+                    file_store=file_store,
+                    prefer_text_layer=self.text_layer,
+                    cascade=cascade,
+                )
+            )
+
+        self.shard_results: list[dict[str, Any]] = []
+        for outcome in itertools.chain(local_outcomes, outcomes):
+            source_pdf = Path(outcome["source_pdf"])
+            extractor = outcome.get("extractor", "llm")
+            result = {
+                "source_pdf": str(source_pdf),
+                "output_path": None,
+                "success": False,
+                "error_message": outcome["error_message"],
+                "cache_hit": outcome["cache_hit"],
+                "text_layer_used": outcome["text_layer_used"],
+                "extractor": extractor,
+                "model": outcome.get("model"),
+            }
+            if outcome["success"]:
+                try:
+                    output_path = _persist_resume_profile(
+                        profile=outcome["profile"],
+                        output_dir=self.output_root,
+                        source_pdf=source_pdf,
+                    )
+                    _upsert_resume_profile_row(
+                        db_path=Path(self.sqlite_db_path),
+                        source_pdf=source_pdf,
+                        profile=outcome["profile"],
+                        prompt_version_sha=(
+                            LOCAL_PARSER_VERSION if extractor == "local" else self.prompt_version_sha
+                        ),
+                    )
+                    result["output_path"] = str(output_path)
+                    result["sqlite_db_path"] = self.sqlite_db_path
+                    result["success"] = True
+                except Exception as exc:  # noqa: BLE001
+                    result["error_message"] = f"{type(exc).__name__}: {exc}"
+            self.shard_results.append(result)
+
+        self.shard_cascade_stats = cascade.tier_stats if cascade is not None else {}
         self.next(self.join)
 
     @step
@@ -250,12 +365,20 @@ class ResumeExtractionBatchFlow(FlowSpec):
             self.sqlite_db_path = str(RESUME_SQLITE_PATH.resolve())
             self.prompt_version_sha = "unknown"
 
-        self.results = [input_obj.result for input_obj in input_list]
+        self.results = [
+            result for input_obj in input_list for result in input_obj.shard_results
+        ]
         (
             self.success_count,
             self.failure_count,
             self.failed_results,
         ) = _summarize_results(self.results)
+        self.cache_usage = _summarize_cache_usage(self.results)
+        self.text_layer_count = _count_text_layer_results(self.results)
+        self.local_parser_count = _count_local_parser_results(self.results)
+        self.cascade_summary = summarize_cascade_stats(
+            merge_cascade_stats([input_obj.shard_cascade_stats for input_obj in input_list])
+        )
         self.generated_on = date.today().isoformat()
         self.next(self.end)
 
@@ -277,6 +400,25 @@ class ResumeExtractionBatchFlow(FlowSpec):
         print(f"Total PDFs processed: {len(self.results)}")
         print(f"Successful resumes: {self.success_count}")
         print(f"Failures: {self.failure_count}")
+        print(
+            f"Extraction cache: {self.cache_usage['hits']} hits, "
+            f"{self.cache_usage['misses']} misses"
+        )
+        if self.text_layer:
+            print(f"Sent as local text layer: {self.text_layer_count}")
+        if self.extractor_backend.strip().lower() == "local":
+            print(
+                f"Parsed locally: {self.local_parser_count}, "
+                f"LLM fallback: {len(self.results) - self.local_parser_count}"
+            )
+        for tier_model, tier_summary in self.cascade_summary.items():
+            hit_rate = tier_summary["hit_rate"]
+            mean_latency = tier_summary["mean_latency_seconds"]
+            print(
+                f"Cascade tier {tier_model}: {tier_summary['accepted']}/{tier_summary['attempts']} accepted"
+                f" (hit rate {'n/a' if hit_rate is None else f'{hit_rate:.1%}'}),"
+                f" mean latency {'n/a' if mean_latency is None else f'{mean_latency:.2f}s'}"
+            )
         print(f"SQLite output: {self.sqlite_db_path}")
         if self.failed_results:
             print("Failed files:")
@@ -5,12 +5,31 @@ from pathlib import Path
 from dotenv import load_dotenv
 from metaflow import FlowSpec, Parameter, step
 
-from flow.services.resume_indexer import backfill_missing_faiss_indexes
+from flow.services.embedding_cache import EmbeddingCache
+from flow.services.faiss_index_builder import (
+    DEFAULT_INDEX_FACTORY,
+    DEFAULT_METRIC,
+    DEFAULT_TRAIN_SAMPLE_SIZE,
+    METRICS,
+)
+from flow.services.rate_limiter import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    get_shared_rate_limiter,
+)
+from flow.services.resume_indexer import (
+    DEFAULT_BACKFILL_PAGE_SIZE,
+    DEFAULT_EMBEDDING_MAX_IN_FLIGHT,
+    backfill_missing_faiss_indexes,
+)
+from flow.services.shared_budget import PRIORITY_BATCH, open_shared_budget
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 DEFAULT_DB_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
 DEFAULT_INDEX_DIR = PROJECT_ROOT / "outputs" / "faiss_indexes"
+DEFAULT_BUDGET_DB_PATH = PROJECT_ROOT / "outputs" / "openai_budget.db"
+DEFAULT_EMBEDDING_CACHE_PATH = PROJECT_ROOT / "outputs" / "embedding_cache.db"
 
 
 class ResumeFaissBackfillFlow(FlowSpec):
@@ -18,27 +37,103 @@ class ResumeFaissBackfillFlow(FlowSpec):
     index_dir = Parameter("index-dir", type=str, default=str(DEFAULT_INDEX_DIR))
     model = Parameter("model", type=str, default="text-embedding-3-large")
     batch_size = Parameter("batch-size", type=int, default=32)
+    max_in_flight = Parameter("max-in-flight", type=int, default=DEFAULT_EMBEDDING_MAX_IN_FLIGHT)
+    page_size = Parameter("page-size", type=int, default=DEFAULT_BACKFILL_PAGE_SIZE)
+    checkpoint = Parameter("checkpoint", type=bool, default=True)
+    index_factory = Parameter(
+        "index-factory",
+        type=str,
+        default=DEFAULT_INDEX_FACTORY,
+        help=(
+            "FAISS index_factory spec, e.g. Flat, HNSW32, SQ8, IVF1024,PQ64, IVF1024,SQ8,RFlat "
+            "or PCA256,Flat / OPQ64_256,IVF1024,PQ64 (transform trained and stored in the index)."
+        ),
+    )
+    metric = Parameter(
+        "metric",
+        type=str,
+        default=DEFAULT_METRIC,
+        help="l2 (Euclidean distance) or cosine (inner product on L2-normalized vectors).",
+    )
+    dimensions = Parameter(
+        "dimensions",
+        type=int,
+        default=0,
+        help="Request shorter text-embedding-3 vectors; 0 keeps the model's native size.",
+    )
+    train_sample_size = Parameter("train-sample-size", type=int, default=DEFAULT_TRAIN_SAMPLE_SIZE)
+    nprobe = Parameter("nprobe", type=int, default=16)
+    ef_search = Parameter("ef-search", type=int, default=64)
+    rerank_factor = Parameter("rerank-factor", type=int, default=4)
     mode = Parameter("mode", type=str, default="full")
+    requests_per_minute = Parameter(
+        "requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    tokens_per_minute = Parameter("tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    budget_db_path = Parameter("budget-db-path", type=str, default=str(DEFAULT_BUDGET_DB_PATH))
+    use_cache = Parameter("use-cache", type=bool, default=True)
+    cache_path = Parameter("cache-path", type=str, default=str(DEFAULT_EMBEDDING_CACHE_PATH))
 
     @step
     def start(self):
         load_dotenv()
         normalized_mode = self.mode.strip().lower()
-        if normalized_mode not in {"full", "missing"}:
-            raise ValueError("--mode must be either 'full' or 'missing'.")
+        if normalized_mode not in {"full", "missing", "incremental"}:
+            raise ValueError("--mode must be one of 'full', 'missing' or 'incremental'.")
+        if self.max_in_flight <= 0:
+            raise ValueError("--max-in-flight must be greater than 0.")
+        if self.page_size <= 0:
+            raise ValueError("--page-size must be greater than 0.")
+        if self.metric.strip().lower() not in METRICS:
+            raise ValueError("--metric must be either 'l2' or 'cosine'.")
+        if self.dimensions < 0:
+            raise ValueError("--dimensions must not be negative.")
+        if self.train_sample_size <= 0:
+            raise ValueError("--train-sample-size must be greater than 0.")
 
         resolved_db_path = Path(self.db_path).expanduser().resolve()
         if not resolved_db_path.exists():
             raise FileNotFoundError(f"SQLite database not found: {resolved_db_path}")
 
         resolved_index_dir = Path(self.index_dir).expanduser().resolve()
+        embedding_cache = (
+            EmbeddingCache(Path(self.cache_path).expanduser().resolve()) if self.use_cache else None
+        )
         self.summary = backfill_missing_faiss_indexes(
             db_path=resolved_db_path,
             index_dir=resolved_index_dir,
             model=self.model,
             batch_size=self.batch_size,
             mode=normalized_mode,
+            rate_limiter=get_shared_rate_limiter(
+                self.model,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+                shared_budget=open_shared_budget(
+                    self.budget_db_path,
+                    name=self.model,
+                    requests_per_minute=self.requests_per_minute,
+                    tokens_per_minute=self.tokens_per_minute,
+                ),
+                priority=PRIORITY_BATCH,
+            ),
+            embedding_cache=embedding_cache,
+            max_in_flight=self.max_in_flight,
+            page_size=self.page_size,
+            checkpoint_dir=(
+                resolved_index_dir / ".backfill_checkpoint" if self.checkpoint else None
+            ),
+            index_factory=self.index_factory,
+            metric=self.metric,
+            dimensions=self.dimensions or None,
+            train_sample_size=self.train_sample_size,
+            search_params={
+                "nprobe": self.nprobe,
+                "efSearch": self.ef_search,
+                "k_factor_rf": self.rerank_factor,
+            },
         )
+        self.cache_usage = embedding_cache.stats() if embedding_cache is not None else None
         self.resolved_db_path = str(resolved_db_path)
         self.resolved_index_dir = str(resolved_index_dir)
         self.next(self.end)
@@ -50,6 +145,13 @@ class ResumeFaissBackfillFlow(FlowSpec):
         print(f"Backfill mode: {self.summary['mode']}")
         print(f"Rows selected: {self.summary['selected_count']}")
         print(f"Rows updated: {self.summary['processed_count']}")
+        if self.summary.get("resumed_chunk_count"):
+            print(f"Resumed from checkpoint: {self.summary['resumed_chunk_count']} chunks replayed")
+        if self.cache_usage is not None:
+            print(
+                f"Embedding cache: {self.cache_usage['hits']} hits, "
+                f"{self.cache_usage['misses']} misses"
+            )
         if self.summary["index_path"]:
             print(f"Shared FAISS index: {self.summary['index_path']}")
         else:
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+from metaflow import FlowSpec, Parameter, step
+
+from flow.services.embedding_cache import EmbeddingCache
+from flow.services.extraction_cache import ResumeExtractionCache
+from flow.services.faiss_index_builder import DEFAULT_METRIC, read_index_metadata, validate_metric
+from flow.services.knn_search import (
+    LoadedFaissIndex,
+    exclude_query_row,
+    fetch_profile_row,
+    merge_search_parameters,
+    require_matching_embedding_model,
+    resolve_neighbor_rows,
+    resolve_search_index_path,
+    score_key_for_metric,
+    stored_query_vector,
+)
+from flow.services.pdf_file_store import PdfFileStore
+from flow.services.rate_limiter import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    AdaptiveRateLimiter,
+    get_shared_rate_limiter,
+)
+from flow.services.resume_extractor import extract_resume_profiles_async, resolve_prompt_cache_sha
+from flow.services.resume_indexer import flatten_resume_profile, generate_embeddings
+from flow.services.shared_budget import PRIORITY_BATCH, open_shared_budget
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_DB_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
+DEFAULT_BUDGET_DB_PATH = PROJECT_ROOT / "outputs" / "openai_budget.db"
+DEFAULT_FILE_STORE_PATH = PROJECT_ROOT / "outputs" / "openai_files.db"
+DEFAULT_EXTRACTION_CACHE_PATH = PROJECT_ROOT / "outputs" / "extraction_cache.db"
+DEFAULT_EMBEDDING_CACHE_PATH = PROJECT_ROOT / "outputs" / "embedding_cache.db"
+DEFAULT_OUTPUT_PATH = PROJECT_ROOT / "outputs" / "knn_batch_results.jsonl"
+
+
+def _parse_stems(stems: str) -> list[str]:
+    # Comma-separated stems, or @path to a file with one stem per line.
+    if stems.startswith("@"):
+        lines = Path(stems[1:]).expanduser().read_text(encoding="utf-8").splitlines()
+    else:
+        lines = stems.split(",")
+    return list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+
+
+def _load_text_queries(jsonl_path: Path) -> list[dict[str, Any]]:
+    queries: list[dict[str, Any]] = []
+    with jsonl_path.open("r", encoding="utf-8") as file_obj:
+        for line_number, line in enumerate(file_obj, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get("text") if isinstance(record, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError(f"{jsonl_path}:{line_number} needs a non-empty 'text' field.")
+            queries.append(
+                {
+                    "query_id": str(record.get("id", f"line-{line_number}")),
+                    "source": "text",
+                    "text": text,
+                }
+            )
+    return queries
+
+
+def write_knn_batch_results(output_path: Path, results: list[dict[str, Any]], *, score_key: str) -> None:
+    # .csv writes one row per (query, neighbor); anything else is JSONL, one line per query.
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.tmp")
+    with temp_path.open("w", encoding="utf-8", newline="") as file_obj:
+        if output_path.suffix.lower() == ".csv":
+            writer = csv.writer(file_obj)
+            writer.writerow(["query_id", "source", "rank", score_key, "id", "pdf_stem", "full_name", "error"])
+            for result in results:
+                if result.get("error"):
+                    writer.writerow([result["query_id"], result["source"], "", "", "", "", "", result["error"]])
+                for neighbor in result.get("neighbors", []):
+                    writer.writerow(
+                        [
+                            result["query_id"],
+                            result["source"],
+                            neighbor["rank"],
+                            neighbor[score_key],
+                            neighbor.get("id"),
+                            neighbor.get("pdf_stem"),
+                            neighbor.get("full_name"),
+                            "",
+                        ]
+                    )
+        else:
+            for result in results:
+                file_obj.write(json.dumps(result) + "\n")
+    temp_path.replace(output_path)
+
+
+class ResumeKnnBatchSearchFlow(FlowSpec):
+    input_dir = Parameter("input-dir", type=str, default="", help="Folder of query resume PDFs.")
+    stems = Parameter("stems", type=str, default="", help="Indexed pdf_stems, comma-separated or @file.")
+    queries_jsonl = Parameter(
+        "queries-jsonl", type=str, default="", help='JSONL of free-text queries: {"id": ..., "text": ...}.'
+    )
+    top_n = Parameter("top-n", type=int, default=10)
+    output = Parameter("output", type=str, default=str(DEFAULT_OUTPUT_PATH), help="Results .jsonl or .csv.")
+    # Empty resolves the current index from the faiss_indexes registry in --db-path.
+    index_path = Parameter("index-path", type=str, default="")
+    db_path = Parameter("db-path", type=str, default=str(DEFAULT_DB_PATH))
+    extraction_model = Parameter("extraction-model", type=str, default="gpt-5.1")
+    embedding_model = Parameter("embedding-model", type=str, default="text-embedding-3-large")
+    batch_size = Parameter("batch-size", type=int, default=64)
+    max_in_flight = Parameter("max-in-flight", type=int, default=8)
+    # 0 keeps FAISS's default OpenMP thread count for the multi-row search.
+    threads = Parameter("threads", type=int, default=0)
+    requests_per_minute = Parameter(
+        "requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    tokens_per_minute = Parameter("tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    budget_db_path = Parameter("budget-db-path", type=str, default=str(DEFAULT_BUDGET_DB_PATH))
+    file_store_path = Parameter("file-store-path", type=str, default=str(DEFAULT_FILE_STORE_PATH))
+    text_layer = Parameter("text-layer", type=bool, default=False)
+    extraction_cache_path = Parameter(
+        "extraction-cache-path", type=str, default=str(DEFAULT_EXTRACTION_CACHE_PATH)
+    )
+    embedding_cache_path = Parameter(
+        "embedding-cache-path", type=str, default=str(DEFAULT_EMBEDDING_CACHE_PATH)
+    )
+    # 0 keeps the value stored with the index at build time.
+    nprobe = Parameter("nprobe", type=int, default=0)
+    ef_search = Parameter("ef-search", type=int, default=0)
+    rerank_factor = Parameter("rerank-factor", type=int, default=0)
+
+    @step
+    def start(self):
+        load_dotenv()
+        if self.top_n <= 0:
+            raise ValueError("--top-n must be greater than 0.")
+        if self.batch_size <= 0 or self.max_in_flight <= 0:
+            raise ValueError("--batch-size and --max-in-flight must be greater than 0.")
+        if not (self.input_dir or self.stems or self.queries_jsonl):
+            raise ValueError("Pass at least one of --input-dir, --stems or --queries-jsonl.")
+
+        self.resolved_db_path = Path(self.db_path).expanduser().resolve()
+        self.resolved_index_path = resolve_search_index_path(self.resolved_db_path, self.index_path)
+        self.index_metadata = read_index_metadata(self.resolved_index_path)
+        require_matching_embedding_model(self.index_metadata, self.embedding_model)
+        self.index_metric = validate_metric(self.index_metadata.get("metric", DEFAULT_METRIC))
+        self.search_params = merge_search_parameters(
+            self.index_metadata,
+            {"nprobe": self.nprobe, "efSearch": self.ef_search, "k_factor_rf": self.rerank_factor},
+        )
+
+        self.queries: list[dict[str, Any]] = []
+        if self.input_dir:
+            input_root = Path(self.input_dir).expanduser().resolve()
+            if not input_root.is_dir():
+                raise FileNotFoundError(f"Input directory not found: {input_root}")
+            self.queries.extend(
+                {"query_id": pdf_path.stem, "source": "pdf", "source_pdf": str(pdf_path)}
+                for pdf_path in sorted(path for path in input_root.glob("*.pdf") if path.is_file())
+            )
+        if self.stems:
+            self.queries.extend(
+                {"query_id": stem, "source": "stem", "pdf_stem": stem} for stem in _parse_stems(self.stems)
+            )
+        if self.queries_jsonl:
+            self.queries.extend(_load_text_queries(Path(self.queries_jsonl).expanduser().resolve()))
+        if not self.queries:
+            raise ValueError("No queries found in the given inputs.")
+        self.next(self.embed_queries)
+
+    def _batch_rate_limiter(self, model: str) -> AdaptiveRateLimiter:
+        return get_shared_rate_limiter(
+            model,
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+            initial_concurrency=min(4, self.max_in_flight),
+            max_concurrency=self.max_in_flight,
+            shared_budget=open_shared_budget(
+                self.budget_db_path,
+                name=model,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+            ),
+            priority=PRIORITY_BATCH,
+        )
+
+    @step
+    def embed_queries(self):
+        load_dotenv()
+        pdf_queries = [query for query in self.queries if query["source"] == "pdf"]
+        if pdf_queries:
+            outcomes = asyncio.run(
+                extract_resume_profiles_async(
+                    [query["source_pdf"] for query in pdf_queries],
+                    model=self.extraction_model,
+                    max_in_flight=self.max_in_flight,
+                    cache=(
+                        ResumeExtractionCache(Path(self.extraction_cache_path).expanduser().resolve())
+                        if self.extraction_cache_path
+                        else None
+                    ),
+                    prompt_sha=resolve_prompt_cache_sha(),
+                    rate_limiter=self._batch_rate_limiter(self.extraction_model),
+                    file_store=(
+                        PdfFileStore(Path(self.file_store_path).expanduser().resolve())
+                        if self.file_store_path
+                        else None
+                    ),
+                    prefer_text_layer=self.text_layer,
+                )
+            )
+            for query, outcome in zip(pdf_queries, outcomes):
+                if not outcome["success"]:
+                    query["error"] = outcome["error_message"]
+                    continue
+                query["text"] = flatten_resume_profile(outcome["profile"])
+                if not query["text"].strip():
+                    query["error"] = "Flattened resume profile is empty."
+
+        # PDFs and free text go through one packed, concurrent embedding pass.
+        text_queries = [query for query in self.queries if "text" in query and not query.get("error")]
+        if text_queries:
+            embeddings = generate_embeddings(
+                flattened_rows=[{"flattened_text": query["text"]} for query in text_queries],
+                model=self.embedding_model,
+                batch_size=self.batch_size,
+                rate_limiter=self._batch_rate_limiter(self.embedding_model),
+                cache=self._embedding_cache(),
+                max_in_flight=self.max_in_flight,
+                dimensions=self.index_metadata.get("embedding_dimensions"),
+            )
+        else:
+            embeddings = []
+        for query, embedding in zip(text_queries, embeddings):
+            query["embedding"] = embedding
+        self.next(self.search)
+
+    def _embedding_cache(self) -> EmbeddingCache | None:
+        if not self.embedding_cache_path:
+            return None
+        return EmbeddingCache(Path(self.embedding_cache_path).expanduser().resolve())
+
+    @step
+    def search(self):
+        import faiss
+
+        if self.threads > 0:
+            faiss.omp_set_num_threads(self.threads)
+        loaded_index = LoadedFaissIndex(self.resolved_index_path, search_param_overrides=self.search_params)
+        self.index_has_row_ids = loaded_index.has_row_ids
+        embedding_cache = self._embedding_cache()
+        for query in self.queries:
+            if query["source"] != "stem":
+                continue
+            try:
+                query_row = fetch_profile_row(self.resolved_db_path, pdf_stem=query["pdf_stem"])
+                query["row_id"] = query_row["id"]
+                query["embedding"] = stored_query_vector(
+                    loaded_index,
+                    self.resolved_db_path,
+                    query_row,
+                    embedding_model=self.embedding_model,
+                    embedding_cache=embedding_cache,
+                )
+            except LookupError as exc:
+                query["error"] = str(exc)
+
+        self.searchable = [position for position, query in enumerate(self.queries) if "embedding" in query]
+        self.knn_distances: list[list[float]] = []
+        self.knn_indices: list[list[int]] = []
+        self.search_seconds = 0.0
+        if self.searchable:
+            has_stem_queries = any(self.queries[position]["source"] == "stem" for position in self.searchable)
+            started_at = time.perf_counter()
+            # One multi-row search; FAISS parallelizes across query rows.
+            self.knn_distances, self.knn_indices = loaded_index.search(
+                [self.queries[position]["embedding"] for position in self.searchable],
+                self.top_n + has_stem_queries,
+            )
+            self.search_seconds = time.perf_counter() - started_at
+        self.next(self.resolve_and_write)
+
+    @step
+    def resolve_and_write(self):
+        neighbors_by_query = resolve_neighbor_rows(
+            self.resolved_db_path,
+            self.resolved_index_path,
+            has_row_ids=self.index_has_row_ids,
+            metric=self.index_metric,
+            knn_indices=self.knn_indices,
+            knn_scores=self.knn_distances,
+        )
+        neighbors_by_position = dict(zip(self.searchable, neighbors_by_query))
+
+        self.results: list[dict[str, Any]] = []
+        for position, query in enumerate(self.queries):
+            result = {"query_id": query["query_id"], "source": query["source"]}
+            if position in neighbors_by_position:
+                neighbors = neighbors_by_position[position]
+                if query.get("row_id") is not None:
+                    neighbors = exclude_query_row(neighbors, query["row_id"], self.top_n)
+                result["neighbors"] = neighbors[: self.top_n]
+            else:
+                result["error"] = query.get("error", "Query could not be embedded.")
+            self.results.append(result)
+
+        self.output_path = Path(self.output).expanduser().resolve()
+        write_knn_batch_results(
+            self.output_path, self.results, score_key=score_key_for_metric(self.index_metric)
+        )
+        self.next(self.end)
+
+    @step
+    def end(self):
+        failed = [result for result in self.results if "error" in result]
+        print(f"FAISS index: {self.resolved_index_path}")
+        print(f"Metric: {self.index_metric}")
+        print(f"Queries: {len(self.results)} (failed: {len(failed)})")
+        if self.searchable and self.search_seconds > 0:
+            print(
+                f"Search: {len(self.searchable)} queries in {self.search_seconds * 1000:.1f} ms "
+                f"({len(self.searchable) / self.search_seconds:.0f} queries/s)"
+            )
+        for result in failed[:10]:
+            print(f"  {result['source']} {result['query_id']}: {result['error']}")
+        print(f"Results: {self.output_path}")
+
+
+def main():
+    ResumeKnnBatchSearchFlow()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,243 @@
 from __future__ import annotations
 
-import sqlite3
+import hashlib
 from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
 from metaflow import FlowSpec, Parameter, step
 
-from flow.services.resume_extractor import extract_resume_profile_from_pdf
+from flow.services.embedding_cache import EmbeddingCache
+from flow.services.extraction_cache import ResumeExtractionCache
+from flow.services.faiss_index_builder import DEFAULT_METRIC, read_index_metadata, validate_metric
+from flow.services.knn_search import (
+    LoadedFaissIndex,
+    exclude_query_row,
+    fetch_profile_row,
+    merge_search_parameters,
+    require_matching_embedding_model,
+    resolve_neighbor_rows,
+    resolve_search_index_path,
+    score_key_for_metric,
+    stored_query_vector,
+)
+from flow.services.pdf_file_store import PdfFileStore
+from flow.services.rate_limiter import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    AdaptiveRateLimiter,
+)
+from flow.services.query_embedding_cache import DEFAULT_QUERY_CACHE_MAX_BYTES, QueryEmbeddingCache
+from flow.services.resume_extractor import extract_resume_profile_from_pdf, resolve_prompt_cache_sha
 from flow.services.resume_indexer import flatten_resume_profile, generate_embeddings
+from flow.services.shared_budget import PRIORITY_INTERACTIVE, open_shared_budget
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 DEFAULT_DB_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
-DEFAULT_INDEX_PATH = (
-    PROJECT_ROOT
-    / "outputs"
-    / "faiss_indexes"
-    / "resume_profiles_20260223T071759Z.faiss"
-)
-
-
-def _fetch_index_rows(db_path: Path, index_path: Path) -> list[dict[str, Any]]:
-    with sqlite3.connect(db_path) as conn:
-        rows = conn.execute(
-            """
-            SELECT id, pdf_stem, full_name
-            FROM resume_profiles
-            WHERE faiss_index_path = ?
-            ORDER BY id ASC
-            """,
-            (str(index_path),),
-        ).fetchall()
-    return [
-        {"id": int(row[0]), "pdf_stem": row[1], "full_name": row[2]}
-        for row in rows
-    ]
+DEFAULT_BUDGET_DB_PATH = PROJECT_ROOT / "outputs" / "openai_budget.db"
+DEFAULT_FILE_STORE_PATH = PROJECT_ROOT / "outputs" / "openai_files.db"
+DEFAULT_EXTRACTION_CACHE_PATH = PROJECT_ROOT / "outputs" / "extraction_cache.db"
+DEFAULT_EMBEDDING_CACHE_PATH = PROJECT_ROOT / "outputs" / "embedding_cache.db"
+DEFAULT_QUERY_CACHE_PATH = PROJECT_ROOT / "outputs" / "query_embedding_cache.db"
 
 
 class ResumeKnnSearchFlow(FlowSpec):
-    pdf_path = Parameter("pdf-path", type=str, help="Path to source resume PDF.")
+    pdf_path = Parameter("pdf-path", type=str, default="", help="Path to source resume PDF.")
+    # Query with a row already in resume_profiles: no extraction and no embedding call.
+    pdf_stem = Parameter("pdf-stem", type=str, default="", help="Query with an indexed resume's stem.")
+    row_id = Parameter("row-id", type=int, default=0, help="Query with an indexed resume_profiles.id.")
+    # Free text (e.g. a job description) is embedded as-is, skipping extraction.
+    query_text = Parameter("query-text", type=str, default="", help="Query with raw text.")
+    query_text_file = Parameter("query-text-file", type=str, default="", help="Query with a text file's contents.")
+    # Shared with the extraction batch flow, so a PDF it already extracted costs no LLM call.
+    extraction_cache_path = Parameter(
+        "extraction-cache-path", type=str, default=str(DEFAULT_EXTRACTION_CACHE_PATH)
+    )
+    embedding_cache_path = Parameter(
+        "embedding-cache-path", type=str, default=str(DEFAULT_EMBEDDING_CACHE_PATH)
+    )
+    # Re-running the same PDF (e.g. with another --top-n) skips extraction and embedding.
+    query_cache_path = Parameter("query-cache-path", type=str, default=str(DEFAULT_QUERY_CACHE_PATH))
+    query_cache_max_mb = Parameter(
+        "query-cache-max-mb", type=int, default=DEFAULT_QUERY_CACHE_MAX_BYTES // (1024 * 1024)
+    )
     top_n = Parameter("top-n", type=int, help="Number of nearest neighbors to return.")
-    index_path = Parameter("index-path", type=str, default=str(DEFAULT_INDEX_PATH))
+    # Empty resolves the current index from the faiss_indexes registry in --db-path.
+    index_path = Parameter("index-path", type=str, default="")
     db_path = Parameter("db-path", type=str, default=str(DEFAULT_DB_PATH))
     extraction_model = Parameter("extraction-model", type=str, default="gpt-5.1")
     embedding_model = Parameter("embedding-model", type=str, default="text-embedding-3-large")
+    requests_per_minute = Parameter(
+        "requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    tokens_per_minute = Parameter("tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    budget_db_path = Parameter("budget-db-path", type=str, default=str(DEFAULT_BUDGET_DB_PATH))
+    file_store_path = Parameter("file-store-path", type=str, default=str(DEFAULT_FILE_STORE_PATH))
+    text_layer = Parameter("text-layer", type=bool, default=False)
+    # 0 keeps the value stored with the index at build time.
+    nprobe = Parameter("nprobe", type=int, default=0)
+    ef_search = Parameter("ef-search", type=int, default=0)
+    rerank_factor = Parameter("rerank-factor", type=int, default=0)
 
     @step
     def start(self):
         load_dotenv()
-        self.source_pdf = Path(self.pdf_path).expanduser().resolve()
-        if not self.source_pdf.exists():
-            raise FileNotFoundError(f"PDF file not found: {self.source_pdf}")
-        if self.source_pdf.suffix.lower() != ".pdf":
-            raise ValueError(f"Input file must be a PDF: {self.source_pdf}")
-
-        self.resolved_index_path = Path(self.index_path).expanduser().resolve()
-        if not self.resolved_index_path.exists():
-            raise FileNotFoundError(f"FAISS index not found: {self.resolved_index_path}")
+        query_sources = [
+            bool(self.pdf_path),
+            bool(self.pdf_stem),
+            self.row_id > 0,
+            bool(self.query_text),
+            bool(self.query_text_file),
+        ]
+        if sum(query_sources) != 1:
+            raise ValueError(
+                "Pass exactly one of --pdf-path, --pdf-stem, --row-id, --query-text or --query-text-file."
+            )
 
         self.resolved_db_path = Path(self.db_path).expanduser().resolve()
+        self.source_pdf = None
+        self.query_row = None
+        self.query_text_input = None
+        if self.query_text or self.query_text_file:
+            if self.query_text_file:
+                text_path = Path(self.query_text_file).expanduser().resolve()
+                if not text_path.exists():
+                    raise FileNotFoundError(f"Query text file not found: {text_path}")
+                self.query_text_input = text_path.read_text(encoding="utf-8")
+            else:
+                self.query_text_input = self.query_text
+            if not self.query_text_input.strip():
+                raise ValueError("Query text is empty.")
+        elif self.pdf_path:
+            self.source_pdf = Path(self.pdf_path).expanduser().resolve()
+            if not self.source_pdf.exists():
+                raise FileNotFoundError(f"PDF file not found: {self.source_pdf}")
+            if self.source_pdf.suffix.lower() != ".pdf":
+                raise ValueError(f"Input file must be a PDF: {self.source_pdf}")
+        else:
+            if not self.resolved_db_path.exists():
+                raise FileNotFoundError(f"SQLite database not found: {self.resolved_db_path}")
+            self.query_row = fetch_profile_row(
+                self.resolved_db_path,
+                row_id=self.row_id if self.row_id > 0 else None,
+                pdf_stem=self.pdf_stem.strip() or None,
+            )
+        self.query_row_id = self.query_row["id"] if self.query_row else None
+
+        self.resolved_index_path = resolve_search_index_path(self.resolved_db_path, self.index_path)
+
         if self.top_n <= 0:
             raise ValueError("--top-n must be greater than 0.")
+        if self.query_cache_max_mb <= 0:
+            raise ValueError("--query-cache-max-mb must be greater than 0.")
+
+        self.index_metadata = read_index_metadata(self.resolved_index_path)
+        require_matching_embedding_model(self.index_metadata, self.embedding_model)
+        # The metric is a property of the index, never a query flag, so the two cannot disagree.
+        self.index_metric = validate_metric(self.index_metadata.get("metric", DEFAULT_METRIC))
+        self.search_params = merge_search_parameters(
+            self.index_metadata,
+            {"nprobe": self.nprobe, "efSearch": self.ef_search, "k_factor_rf": self.rerank_factor},
+        )
 
         self.next(self.extract_and_embed)
 
+    def _interactive_rate_limiter(self, model: str) -> AdaptiveRateLimiter:
+        return AdaptiveRateLimiter(
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+            shared_budget=open_shared_budget(
+                self.budget_db_path,
+                name=model,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+            ),
+            priority=PRIORITY_INTERACTIVE,
+        )
+
+    def _embed_query_text(self, text: str) -> list[float]:
+        return generate_embeddings(
+            flattened_rows=[{"flattened_text": text}],
+            model=self.embedding_model,
+            batch_size=1,
+            rate_limiter=self._interactive_rate_limiter(self.embedding_model),
+            # Reduced-dimension indexes need the query at the size they were built with.
+            dimensions=self.index_metadata.get("embedding_dimensions"),
+        )[0]
+
     @step
     def extract_and_embed(self):
         load_dotenv()
+        self.query_cache_stats = None
+        if self.query_row is not None:
+            # The stored vector is looked up next to the loaded index in the search step.
+            self.query_embedding = None
+            print(f"Querying with stored resume id={self.query_row['id']} pdf_stem={self.query_row['pdf_stem']}")
+            self.next(self.search)
+            return
+
+        if self.query_text_input is not None:
+            # Already query text: one embedding call, no LLM extraction.
+            self.flattened_profile = self.query_text_input
+            self.query_embedding = self._embed_query_text(self.flattened_profile)
+            print(f"Querying with free text ({len(self.flattened_profile)} chars)")
+            self.next(self.search)
+            return
+
+        prompt_sha = resolve_prompt_cache_sha()
+        query_cache = None
+        cache_identity: dict[str, Any] = {}
+        if self.query_cache_path:
+            query_cache = QueryEmbeddingCache(
+                Path(self.query_cache_path).expanduser().resolve(),
+                max_bytes=self.query_cache_max_mb * 1024 * 1024,
+            )
+            cache_identity = {
+                "pdf_sha256": hashlib.sha256(self.source_pdf.read_bytes()).hexdigest(),
+                "prompt_sha": prompt_sha,
+                "extraction_model": self.extraction_model,
+                "embedding_model": self.embedding_model,
+                "dimensions": self.index_metadata.get("embedding_dimensions"),
+            }
+            cached_query = query_cache.get(**cache_identity)
+            if cached_query is not None:
+                self.flattened_profile = cached_query["flattened_text"]
+                self.query_embedding = cached_query["embedding"]
+                self.query_cache_stats = query_cache.stats()
+                print("Query cache hit: skipping extraction and embedding.")
+                self.next(self.search)
+                return
+
         self.resume_profile = extract_resume_profile_from_pdf(
             self.source_pdf,
             model=self.extraction_model,
+            cache=(
+                ResumeExtractionCache(Path(self.extraction_cache_path).expanduser().resolve())
+                if self.extraction_cache_path
+                else None
+            ),
+            prompt_sha=prompt_sha,
+            rate_limiter=self._interactive_rate_limiter(self.extraction_model),
+            file_store=(
+                PdfFileStore(Path(self.file_store_path).expanduser().resolve())
+                if self.file_store_path
+                else None
+            ),
+            prefer_text_layer=self.text_layer,
         )
         self.flattened_profile = flatten_resume_profile(self.resume_profile)
         if not self.flattened_profile.strip():
             raise ValueError("Flattened resume profile is empty.")
 
-        embeddings = generate_embeddings(
-            flattened_rows=[{"flattened_text": self.flattened_profile}],
-            model=self.embedding_model,
-            batch_size=1,
-        )
-        self.query_embedding = embeddings[0]
+        self.query_embedding = self._embed_query_text(self.flattened_profile)
+        if query_cache is not None:
+            query_cache.put(
+                **cache_identity,
+                flattened_text=self.flattened_profile,
+                embedding=self.query_embedding,
+            )
+            self.query_cache_stats = query_cache.stats()
 
         print("Flattened resume profile:")
         print(self.flattened_profile)
@@ -89,64 +245,53 @@ class ResumeKnnSearchFlow(FlowSpec):
 
     @step
     def search(self):
-        try:
-            import faiss
-        except ImportError as exc:
-            raise ImportError(
-                "faiss is not installed. Install `faiss-cpu` to run kNN search."
-            ) from exc
-
-        try:
-            import numpy as np
-        except ImportError as exc:
-            raise ImportError("numpy is required to run kNN search.") from exc
-
-        index = faiss.read_index(str(self.resolved_index_path))
-        if index.ntotal <= 0:
-            raise ValueError(f"FAISS index is empty: {self.resolved_index_path}")
-
-        query_vector = np.array([self.query_embedding], dtype="float32")
-        if query_vector.shape[1] != index.d:
-            raise ValueError(
-                f"Embedding dimension mismatch: query has {query_vector.shape[1]}, "
-                f"index expects {index.d}."
+        loaded_index = LoadedFaissIndex(
+            self.resolved_index_path, search_param_overrides=self.search_params
+        )
+        self.index_has_row_ids = loaded_index.has_row_ids
+        top_k = self.top_n
+        if self.query_embedding is None:
+            self.query_embedding = stored_query_vector(
+                loaded_index,
+                self.resolved_db_path,
+                self.query_row,
+                embedding_model=self.embedding_model,
+                embedding_cache=(
+                    EmbeddingCache(Path(self.embedding_cache_path).expanduser().resolve())
+                    if self.embedding_cache_path
+                    else None
+                ),
             )
-
-        self.effective_k = min(self.top_n, index.ntotal)
-        distances, indices = index.search(query_vector, self.effective_k)
-        self.knn_distances = [float(value) for value in distances[0].tolist()]
-        self.knn_indices = [int(value) for value in indices[0].tolist()]
+            # One extra neighbor makes room for the query row, which is dropped when resolving.
+            top_k += 1
+        distances, indices = loaded_index.search([self.query_embedding], top_k)
+        self.knn_distances = distances[0]
+        self.knn_indices = indices[0]
+        self.effective_k = len(self.knn_indices)
         self.next(self.resolve_neighbors)
 
     @step
     def resolve_neighbors(self):
-        mapped_rows: list[dict[str, Any]] = []
-        if self.resolved_db_path.exists():
-            mapped_rows = _fetch_index_rows(
-                db_path=self.resolved_db_path,
-                index_path=self.resolved_index_path,
-            )
-
-        self.neighbors: list[dict[str, Any]] = []
-        for rank, (faiss_idx, distance) in enumerate(
-            zip(self.knn_indices, self.knn_distances),
-            start=1,
-        ):
-            row_data: dict[str, Any] = {
-                "rank": rank,
-                "distance": distance,
-                "faiss_index_position": faiss_idx,
-            }
-            if 0 <= faiss_idx < len(mapped_rows):
-                row_data.update(mapped_rows[faiss_idx])
-            self.neighbors.append(row_data)
+        score_key = score_key_for_metric(self.index_metric)
+        self.neighbors: list[dict[str, Any]] = resolve_neighbor_rows(
+            self.resolved_db_path,
+            self.resolved_index_path,
+            has_row_ids=self.index_has_row_ids,
+            metric=self.index_metric,
+            knn_indices=[self.knn_indices],
+            knn_scores=[self.knn_distances],
+        )[0]
+        if self.query_row_id is not None:
+            self.neighbors = exclude_query_row(self.neighbors, self.query_row_id, self.top_n)
+            self.effective_k = len(self.neighbors)
 
         print()
         print(f"Top {self.effective_k} nearest neighbors:")
         for neighbor in self.neighbors:
+            faiss_key = "faiss_id" if self.index_has_row_ids else "faiss_index_position"
             base = (
-                f"[{neighbor['rank']}] distance={neighbor['distance']:.6f} "
-                f"faiss_index_position={neighbor['faiss_index_position']}"
+                f"[{neighbor['rank']}] {score_key}={neighbor[score_key]:.6f} "
+                f"{faiss_key}={neighbor[faiss_key]}"
             )
             if "id" in neighbor:
                 print(
@@ -162,9 +307,25 @@ class ResumeKnnSearchFlow(FlowSpec):
     @step
     def end(self):
         print()
-        print(f"Query PDF: {self.source_pdf}")
+        if self.source_pdf is not None:
+            print(f"Query PDF: {self.source_pdf}")
+        elif self.query_text_input is not None:
+            preview = " ".join(self.query_text_input.split())
+            print(f"Query text: {preview[:80]}{'...' if len(preview) > 80 else ''}")
+        else:
+            print(f"Query resume: id={self.query_row['id']} pdf_stem={self.query_row['pdf_stem']}")
         print(f"FAISS index: {self.resolved_index_path}")
+        print(f"Index factory: {self.index_metadata.get('index_factory', 'Flat')}")
+        print(f"Metric: {self.index_metric}")
+        if self.search_params:
+            print(f"Search params: {self.search_params}")
         print(f"SQLite mapping DB: {self.resolved_db_path}")
+        if self.query_cache_stats is not None:
+            print(
+                f"Query cache: hits={self.query_cache_stats['hits']} "
+                f"entries={self.query_cache_stats['entry_count']} "
+                f"bytes={self.query_cache_stats['total_bytes']}/{self.query_cache_stats['max_bytes']}"
+            )
         print(f"Requested top_n: {self.top_n}")
         print(f"Returned neighbors: {len(self.neighbors)}")
 
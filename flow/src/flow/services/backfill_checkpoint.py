@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _replace_durably(temp_path: Path, target_path: Path) -> None:
+    with temp_path.open("rb") as file_obj:
+        os.fsync(file_obj.fileno())
+    os.replace(temp_path, target_path)
+
+
+class BackfillCheckpoint:
+    # Embedded pages of one backfill run. Each page is written as its own chunk file before
+    # the manifest is replaced, so the manifest only ever lists chunks fully on disk.
+    def __init__(self, directory: Path, *, run_key: dict[str, Any]) -> None:
+        self.directory = Path(directory)
+        self.run_key = dict(run_key)
+        self.last_id: int | None = None
+        self.started_at = _utc_now_iso()
+        self.chunk_names: list[str] = []
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def load(self) -> bool:
+        # Returns True when a checkpoint for the same run was found; a mismatched one is discarded.
+        if not self.manifest_path.exists():
+            return False
+        manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("run_key") != self.run_key:
+            self.clear()
+            return False
+        self.last_id = manifest["last_id"]
+        self.started_at = manifest["started_at"]
+        self.chunk_names = list(manifest["chunks"])
+        return True
+
+    def committed_chunks(self) -> Iterator[tuple[Any, Any]]:
+        import numpy as np
+
+        for chunk_name in self.chunk_names:
+            with np.load(self.directory / chunk_name) as chunk:
+                yield chunk["ids"], chunk["vectors"]
+
+    def commit_chunk(self, ids: Any, vectors: Any, *, last_id: int) -> None:
+        import numpy as np
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        chunk_name = f"chunk_{len(self.chunk_names):06d}.npz"
+        temp_path = self.directory / f".{chunk_name}.tmp"
+        with temp_path.open("wb") as file_obj:
+            np.savez(file_obj, ids=ids, vectors=vectors)
+        _replace_durably(temp_path, self.directory / chunk_name)
+
+        self.chunk_names.append(chunk_name)
+        self.last_id = last_id if self.last_id is None else max(self.last_id, last_id)
+        manifest = {
+            "run_key": self.run_key,
+            "started_at": self.started_at,
+            "last_id": self.last_id,
+            "chunks": self.chunk_names,
+        }
+        temp_manifest = self.directory / f".{MANIFEST_NAME}.tmp"
+        temp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        _replace_durably(temp_manifest, self.manifest_path)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.last_id = None
+        self.started_at = _utc_now_iso()
+        self.chunk_names = []
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# SQLite caps bound parameters per statement; look up hashes in chunks below it.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def compute_text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def decode_vector(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self.hits = 0
+        self.misses = 0
+        self._ensure_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    def _ensure_table(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # dimensions is the requested output size; 0 means the model's native size.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    text_sha256 TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (text_sha256, model, dimensions)
+                )
+                """
+            )
+            conn.commit()
+
+    def get_many(
+        self,
+        text_sha256s: list[str],
+        *,
+        model: str,
+        dimensions: int | None = None,
+    ) -> dict[str, list[float]]:
+        unique_hashes = list(dict.fromkeys(text_sha256s))
+        found: dict[str, list[float]] = {}
+        with self._connect() as conn:
+            for start in range(0, len(unique_hashes), _LOOKUP_CHUNK_SIZE):
+                chunk = unique_hashes[start : start + _LOOKUP_CHUNK_SIZE]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"""
+                    SELECT text_sha256, embedding
+                    FROM embeddings
+                    WHERE model = ? AND dimensions = ? AND text_sha256 IN ({placeholders})
+                    """,
+                    [model, dimensions or 0, *chunk],
+                ).fetchall()
+                found.update((row[0], decode_vector(row[1])) for row in rows)
+        self.hits += sum(1 for text_sha256 in text_sha256s if text_sha256 in found)
+        self.misses += sum(1 for text_sha256 in text_sha256s if text_sha256 not in found)
+        return found
+
+    def put_many(
+        self,
+        entries: list[tuple[str, list[float]]],
+        *,
+        model: str,
+        dimensions: int | None = None,
+    ) -> None:
+        if not entries:
+            return
+        now = _utc_now_iso()
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO embeddings (text_sha256, model, dimensions, embedding, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(text_sha256, model, dimensions) DO UPDATE SET
+                    embedding = excluded.embedding,
+                    created_at = excluded.created_at
+                """,
+                [
+                    (text_sha256, model, dimensions or 0, encode_vector(vector), now)
+                    for text_sha256, vector in entries
+                ],
+            )
+            conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            entry_count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entry_count": int(entry_count)}
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from flow.schemas.resume_profile import ResumeProfile
+from flow.services.sqlite_lru_cache import SqliteLruCache
+
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def compute_extraction_cache_key(*, pdf_sha256: str, prompt_sha: str, model: str) -> str:
+    material = f"{pdf_sha256}\x00{prompt_sha}\x00{model}".encode("utf-8")
+    return hashlib.sha256(material).hexdigest()
+
+
+class ResumeExtractionCache(SqliteLruCache):
+    table_name = "extraction_cache"
+
+    def __init__(self, db_path: Path, *, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        super().__init__(db_path, max_bytes=max_bytes)
+
+    def _ensure_table(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    pdf_sha256 TEXT NOT NULL,
+                    prompt_sha TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    profile_json TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_accessed_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_accessed
+                ON extraction_cache (last_accessed_at)
+                """
+            )
+            conn.commit()
+
+    def get(self, *, pdf_sha256: str, prompt_sha: str, model: str) -> dict[str, Any] | None:
+        cache_key = compute_extraction_cache_key(
+            pdf_sha256=pdf_sha256, prompt_sha=prompt_sha, model=model
+        )
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT profile_json FROM extraction_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            try:
+                profile = ResumeProfile.model_validate_json(row[0]).model_dump(mode="json")
+            except ValidationError:
+                # Entry predates a schema change; drop it and treat as a miss.
+                conn.execute("DELETE FROM extraction_cache WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+                self.misses += 1
+                return None
+
+            self._touch(conn, cache_key, _utc_now_iso())
+            conn.commit()
+        self.hits += 1
+        return profile
+
+    def put(
+        self,
+        *,
+        pdf_sha256: str,
+        prompt_sha: str,
+        model: str,
+        profile: dict[str, Any],
+    ) -> None:
+        cache_key = compute_extraction_cache_key(
+            pdf_sha256=pdf_sha256, prompt_sha=prompt_sha, model=model
+        )
+        payload = json.dumps(profile, ensure_ascii=False)
+        now = _utc_now_iso()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO extraction_cache (
+                    cache_key,
+                    pdf_sha256,
+                    prompt_sha,
+                    model,
+                    profile_json,
+                    size_bytes,
+                    created_at,
+                    last_accessed_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    profile_json = excluded.profile_json,
+                    size_bytes = excluded.size_bytes,
+                    last_accessed_at = excluded.last_accessed_at
+                """,
+                (
+                    cache_key,
+                    pdf_sha256,
+                    prompt_sha,
+                    model,
+                    payload,
+                    len(payload.encode("utf-8")),
+                    now,
+                    now,
+                ),
+            )
+            self._evict_to_max_bytes(conn)
+            conn.commit()
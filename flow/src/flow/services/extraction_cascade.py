@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from flow.services.rate_limiter import AdaptiveRateLimiter, get_shared_rate_limiter
+
+
+def parse_cascade_models(value: str | None) -> list[str]:
+    return [model.strip() for model in (value or "").split(",") if model.strip()]
+
+
+def profile_sanity_failures(profile: dict[str, Any]) -> list[str]:
+    failures: list[str] = []
+    personal_info = profile.get("personal_information") or {}
+    full_name = personal_info.get("full_name")
+    if not isinstance(full_name, str) or not full_name.strip():
+        failures.append("full_name is missing")
+    if not profile.get("experience"):
+        failures.append("experience is empty")
+    return failures
+
+
+def _empty_tier_stats() -> dict[str, float]:
+    return {"attempts": 0, "accepted": 0, "timed_attempts": 0, "latency_seconds_total": 0.0}
+
+
+def merge_cascade_stats(stats_list: list[dict[str, dict[str, float]]]) -> dict[str, dict[str, float]]:
+    merged: dict[str, dict[str, float]] = {}
+    for stats in stats_list:
+        for model, tier_stats in stats.items():
+            target = merged.setdefault(model, _empty_tier_stats())
+            for key in target:
+                target[key] += tier_stats.get(key, 0)
+    return merged
+
+
+def summarize_cascade_stats(tier_stats: dict[str, dict[str, float]]) -> dict[str, dict[str, Any]]:
+    summary: dict[str, dict[str, Any]] = {}
+    for model, stats in tier_stats.items():
+        attempts = int(stats["attempts"])
+        timed_attempts = int(stats["timed_attempts"])
+        summary[model] = {
+            "attempts": attempts,
+            "accepted": int(stats["accepted"]),
+            "hit_rate": stats["accepted"] / attempts if attempts else None,
+            "mean_latency_seconds": (
+                stats["latency_seconds_total"] / timed_attempts if timed_attempts else None
+            ),
+        }
+    return summary
+
+
+class ModelCascade:
+    def __init__(
+        self,
+        models: list[str],
+        *,
+        rate_limiters: dict[str, AdaptiveRateLimiter] | None = None,
+    ) -> None:
+        if not models:
+            raise ValueError("models must contain at least one model.")
+        self.models = list(models)
+        self.rate_limiters = dict(rate_limiters or {})
+        self.tier_stats = {model: _empty_tier_stats() for model in self.models}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, model: str) -> AdaptiveRateLimiter:
+        return self.rate_limiters.get(model) or get_shared_rate_limiter(model)
+
+    def record(self, model: str, *, accepted: bool, latency_seconds: float | None = None) -> None:
+        with self._lock:
+            stats = self.tier_stats.setdefault(model, _empty_tier_stats())
+            stats["attempts"] += 1
+            stats["accepted"] += int(accepted)
+            if latency_seconds is not None:
+                stats["timed_attempts"] += 1
+                stats["latency_seconds_total"] += latency_seconds
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return summarize_cascade_stats(self.tier_stats)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+DEFAULT_INDEX_FACTORY = "Flat"
+DEFAULT_METRIC = "l2"
+METRICS = ("l2", "cosine")
+# Roughly 39 training points per centroid for IVF1024; bounds the vectors buffered before training.
+DEFAULT_TRAIN_SAMPLE_SIZE = 40_000
+# Search-time knobs persisted with an index: IVF probes, HNSW beam width, refine (re-rank) depth.
+SEARCH_PARAMETER_NAMES = ("nprobe", "efSearch", "k_factor_rf")
+
+
+def index_metadata_path(index_path: Path) -> Path:
+    return Path(index_path).with_suffix(".meta.json")
+
+
+def read_index_metadata(index_path: Path) -> dict[str, Any]:
+    # Indexes written before metadata existed are exact flat L2 indexes with no search params.
+    metadata_path = index_metadata_path(index_path)
+    if not metadata_path.exists():
+        return {}
+    return json.loads(metadata_path.read_text(encoding="utf-8"))
+
+
+def write_index_metadata(index_path: Path, metadata: dict[str, Any]) -> Path:
+    metadata_path = index_metadata_path(index_path)
+    temp_path = metadata_path.with_name(f".{metadata_path.name}.tmp")
+    temp_path.write_text(json.dumps(metadata, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temp_path, metadata_path)
+    return metadata_path
+
+
+def validate_metric(metric: str) -> str:
+    normalized_metric = metric.strip().lower()
+    if normalized_metric not in METRICS:
+        raise ValueError("metric must be either 'l2' or 'cosine'.")
+    return normalized_metric
+
+
+def prepare_vectors(vectors: Any, metric: str) -> Any:
+    # Cosine is inner product on unit vectors; normalize a float32 copy, never the caller's array.
+    import faiss
+    import numpy as np
+
+    prepared = np.array(vectors, dtype="float32", copy=True)
+    if metric == "cosine":
+        faiss.normalize_L2(prepared)
+    return prepared
+
+
+def apply_search_parameters(index: Any, search_params: dict[str, int]) -> None:
+    import faiss
+
+    parameter_space = faiss.ParameterSpace()
+    for name, value in search_params.items():
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError as exc:
+            raise ValueError(f"Search parameter {name!r} does not apply to this index type.") from exc
+
+
+def supported_search_parameters(index: Any, search_params: dict[str, int]) -> dict[str, int]:
+    # Keeps only the parameters the built index understands, so metadata never lies about it.
+    supported: dict[str, int] = {}
+    for name, value in search_params.items():
+        if not value:
+            continue
+        try:
+            apply_search_parameters(index, {name: value})
+        except ValueError:
+            continue
+        supported[name] = value
+    return supported
+
+
+def supports_vector_removal(index: Any) -> bool:
+    # HNSW graphs and refine (RFlat) wrappers implement no remove_ids; an empty removal probes it.
+    import numpy as np
+
+    try:
+        index.remove_ids(np.array([], dtype="int64"))
+    except RuntimeError:
+        return False
+    return True
+
+
+class StreamingIndexBuilder:
+    # Adds id-keyed float32 chunks to a FAISS index built from a factory spec. Indexes that
+    # need training (IVF, PQ, SQ) buffer the first train_sample_size vectors, train on them,
+    # then add the buffer and every later chunk directly.
+    def __init__(
+        self,
+        index_factory: str = DEFAULT_INDEX_FACTORY,
+        *,
+        metric: str = DEFAULT_METRIC,
+        train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE,
+        index: Any | None = None,
+    ) -> None:
+        if train_sample_size <= 0:
+            raise ValueError("train_sample_size must be greater than 0.")
+        self.index_factory = index_factory
+        self.metric = validate_metric(metric)
+        self.train_sample_size = train_sample_size
+        self.index = index
+        # Ids currently in the index, so replacing only removes vectors that are really there.
+        self._indexed_ids: set[int] = set()
+        if index is not None and hasattr(index, "id_map"):
+            import faiss
+
+            self._indexed_ids = set(faiss.vector_to_array(index.id_map).tolist())
+        self._pending_ids: list[Any] = []
+        self._pending_vectors: list[Any] = []
+
+    @property
+    def indexed_ids(self) -> set[int]:
+        return set(self._indexed_ids)
+
+    @property
+    def _buffered_count(self) -> int:
+        return sum(len(ids) for ids in self._pending_ids)
+
+    def add(self, ids: Any, vectors: Any, *, replace_existing: bool = False) -> None:
+        import faiss
+
+        vectors = prepare_vectors(vectors, self.metric)
+        if self.index is None:
+            faiss_metric = faiss.METRIC_INNER_PRODUCT if self.metric == "cosine" else faiss.METRIC_L2
+            # FAISS ids are resume_profiles.id, so neighbors resolve without positional mapping.
+            self.index = faiss.IndexIDMap2(
+                faiss.index_factory(vectors.shape[1], self.index_factory, faiss_metric)
+            )
+        elif vectors.shape[1] != self.index.d:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.index.d}."
+            )
+
+        if replace_existing:
+            self.remove(ids)
+        if self.index.is_trained:
+            self._add_to_index(ids, vectors)
+            return
+        self._pending_ids.append(ids)
+        self._pending_vectors.append(vectors)
+        if self._buffered_count >= self.train_sample_size:
+            self._train_and_flush()
+
+    def remove(self, ids: Any) -> None:
+        import numpy as np
+
+        if self._pending_ids:
+            kept = [~np.isin(pending, ids) for pending in self._pending_ids]
+            self._pending_ids = [pending[mask] for pending, mask in zip(self._pending_ids, kept)]
+            self._pending_vectors = [pending[mask] for pending, mask in zip(self._pending_vectors, kept)]
+        present_ids = [int(row_id) for row_id in ids if int(row_id) in self._indexed_ids]
+        if self.index is None or not present_ids:
+            return
+        try:
+            self.index.remove_ids(np.array(present_ids, dtype="int64"))
+        except RuntimeError as exc:
+            raise ValueError(
+                f"Index type {self.index_factory!r} does not support removing vectors; "
+                "rebuild with mode='full'."
+            ) from exc
+        self._indexed_ids.difference_update(present_ids)
+
+    def _add_to_index(self, ids: Any, vectors: Any) -> None:
+        self.index.add_with_ids(vectors, ids)
+        self._indexed_ids.update(int(row_id) for row_id in ids)
+
+    def _train_and_flush(self) -> None:
+        import numpy as np
+
+        ids = np.concatenate(self._pending_ids)
+        vectors = np.concatenate(self._pending_vectors)
+        self._pending_ids = []
+        self._pending_vectors = []
+        if len(ids) == 0:
+            return
+        self.index.train(vectors[: self.train_sample_size])
+        self._add_to_index(ids, vectors)
+
+    def finish(self) -> Any | None:
+        # Corpora smaller than the sample size are trained on everything that was added.
+        if self.index is not None and not self.index.is_trained:
+            self._train_and_flush()
+        return self.index
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+STATUS_READY = "ready"
+STATUS_CURRENT = "current"
+STATUS_RETIRED = "retired"
+_CHECKSUM_CHUNK_BYTES = 1024 * 1024
+_REGISTRY_COLUMNS = (
+    "id",
+    "path",
+    "model",
+    "metric",
+    "dimension",
+    "ntotal",
+    "checksum",
+    "created_at",
+    "status",
+)
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def compute_file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(_CHECKSUM_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ensure_registry_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS faiss_indexes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL UNIQUE,
+            model TEXT,
+            metric TEXT,
+            dimension INTEGER,
+            ntotal INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('{STATUS_READY}', '{STATUS_CURRENT}', '{STATUS_RETIRED}'))
+        )
+        """
+    )
+    # At most one row can be current; promotion swaps it inside a single transaction.
+    conn.execute(
+        f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_faiss_indexes_single_current
+        ON faiss_indexes (status) WHERE status = '{STATUS_CURRENT}'
+        """
+    )
+
+
+def _fetch_entry(db_path: Path, where_sql: str, params: tuple[Any, ...]) -> dict[str, Any] | None:
+    # Read-only: a DB without a registry (or no DB at all) simply has no registered indexes.
+    if not Path(db_path).exists():
+        return None
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        has_registry = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'faiss_indexes'"
+        ).fetchone()
+        if not has_registry:
+            return None
+        row = conn.execute(
+            f"SELECT {', '.join(_REGISTRY_COLUMNS)} FROM faiss_indexes WHERE {where_sql}",
+            params,
+        ).fetchone()
+    return dict(zip(_REGISTRY_COLUMNS, row)) if row else None
+
+
+def register_faiss_index(db_path: Path, index_path: Path, metadata: dict[str, Any]) -> dict[str, Any]:
+    # Called only after the index file is fully written; re-registering a path that was
+    # rewritten in place refreshes its counts and checksum but keeps its status.
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        _ensure_registry_table(conn)
+        conn.execute(
+            f"""
+            INSERT INTO faiss_indexes (path, model, metric, dimension, ntotal, checksum, created_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, '{STATUS_READY}')
+            ON CONFLICT(path) DO UPDATE SET
+                model = excluded.model,
+                metric = excluded.metric,
+                dimension = excluded.dimension,
+                ntotal = excluded.ntotal,
+                checksum = excluded.checksum
+            """,
+            (
+                str(index_path),
+                metadata.get("model"),
+                metadata.get("metric"),
+                metadata.get("dimension"),
+                int(metadata["ntotal"]),
+                compute_file_sha256(index_path),
+                metadata.get("created_at") or _utc_now_iso(),
+            ),
+        )
+        conn.commit()
+    return fetch_registered_faiss_index(db_path, index_path)
+
+
+def fetch_registered_faiss_index(db_path: Path, index_path: Path) -> dict[str, Any] | None:
+    return _fetch_entry(db_path, "path = ?", (str(index_path),))
+
+
+def fetch_current_registered_index(db_path: Path) -> dict[str, Any] | None:
+    return _fetch_entry(db_path, "status = ?", (STATUS_CURRENT,))
+
+
+def promote_faiss_index(db_path: Path, index_path: Path) -> dict[str, Any]:
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        _ensure_registry_table(conn)
+        # IMMEDIATE takes the write lock up front, so readers see either the old or the new
+        # current index and two concurrent promotions cannot interleave.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status FROM faiss_indexes WHERE path = ?",
+                (str(index_path),),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"{index_path} is not registered; register it before promoting.")
+            if not Path(index_path).exists():
+                raise ValueError(f"{index_path} no longer exists on disk; cannot promote it.")
+            conn.execute(
+                "UPDATE faiss_indexes SET status = ? WHERE status = ? AND path != ?",
+                (STATUS_RETIRED, STATUS_CURRENT, str(index_path)),
+            )
+            conn.execute(
+                "UPDATE faiss_indexes SET status = ? WHERE path = ?",
+                (STATUS_CURRENT, str(index_path)),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return fetch_registered_faiss_index(db_path, index_path)
+
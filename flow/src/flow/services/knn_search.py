@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from flow.services.embedding_cache import EmbeddingCache, compute_text_sha256
+from flow.services.faiss_index_builder import (
+    DEFAULT_INDEX_FACTORY,
+    DEFAULT_METRIC,
+    apply_search_parameters,
+    prepare_vectors,
+    read_index_metadata,
+    validate_metric,
+)
+from flow.services.resume_indexer import build_flattened_text_rows, fetch_current_faiss_index_path
+
+
+# A batch search resolves every neighbor of every query; stay under SQLite's bound-parameter cap.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def fetch_index_rows(db_path: Path, index_path: Path) -> list[dict[str, Any]]:
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, pdf_stem, full_name
+            FROM resume_profiles
+            WHERE faiss_index_path = ?
+            ORDER BY id ASC
+            """,
+            (str(index_path),),
+        ).fetchall()
+    return [
+        {"id": int(row[0]), "pdf_stem": row[1], "full_name": row[2]}
+        for row in rows
+    ]
+
+
+def fetch_rows_by_id(db_path: Path, row_ids: list[int]) -> dict[int, dict[str, Any]]:
+    if not row_ids:
+        return {}
+    unique_ids = list(dict.fromkeys(row_ids))
+    rows_by_id: dict[int, dict[str, Any]] = {}
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        for start in range(0, len(unique_ids), _LOOKUP_CHUNK_SIZE):
+            chunk = unique_ids[start : start + _LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(
+                f"SELECT id, pdf_stem, full_name FROM resume_profiles WHERE id IN ({placeholders})",
+                chunk,
+            ).fetchall():
+                rows_by_id[int(row[0])] = {"id": int(row[0]), "pdf_stem": row[1], "full_name": row[2]}
+    return rows_by_id
+
+
+def fetch_profile_row(
+    db_path: Path,
+    *,
+    row_id: int | None = None,
+    pdf_stem: str | None = None,
+) -> dict[str, Any]:
+    if (row_id is None) == (pdf_stem is None):
+        raise ValueError("Provide exactly one of row_id or pdf_stem.")
+    column, value = ("id", int(row_id)) if row_id is not None else ("pdf_stem", pdf_stem)
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        row = conn.execute(
+            f"SELECT id, pdf_stem, full_name, profile_json FROM resume_profiles WHERE {column} = ?",
+            (value,),
+        ).fetchone()
+    if row is None:
+        raise LookupError(f"No resume_profiles row found for {column}: {value}")
+    return {"id": int(row[0]), "pdf_stem": row[1], "full_name": row[2], "profile_json": row[3]}
+
+
+def resolve_search_index_path(db_path: Path, index_path: str | Path | None) -> Path:
+    # An explicit path wins; otherwise the registry's current index in db_path.
+    if index_path:
+        resolved_index_path = Path(index_path).expanduser().resolve()
+    else:
+        if not Path(db_path).exists():
+            raise FileNotFoundError(f"SQLite database not found: {db_path}")
+        current_index_path = fetch_current_faiss_index_path(Path(db_path))
+        if current_index_path is None:
+            raise ValueError(
+                f"No current FAISS index in {db_path}; run the backfill flow or pass --index-path."
+            )
+        resolved_index_path = current_index_path
+    if not resolved_index_path.exists():
+        raise FileNotFoundError(f"FAISS index not found: {resolved_index_path}")
+    return resolved_index_path
+
+
+def require_matching_embedding_model(metadata: dict[str, Any], embedding_model: str) -> None:
+    index_model = metadata.get("model")
+    if index_model and index_model != embedding_model:
+        raise ValueError(
+            f"Index was built with {index_model!r} embeddings; "
+            f"--embedding-model is {embedding_model!r}."
+        )
+
+
+def index_factory_has_refine(index_factory: str) -> bool:
+    # k_factor_rf only exists on refine wrappers: an "RFlat" or "Refine(...)" factory component.
+    return any(
+        component.strip().startswith(("RFlat", "Refine")) for component in index_factory.split(",")
+    )
+
+
+def merge_search_parameters(metadata: dict[str, Any], overrides: dict[str, int]) -> dict[str, int]:
+    # Non-positive overrides keep the value stored with the index at build time.
+    index_factory = metadata.get("index_factory", DEFAULT_INDEX_FACTORY)
+    if overrides.get("k_factor_rf", 0) > 0 and not index_factory_has_refine(index_factory):
+        raise ValueError(
+            f"--rerank-factor needs an index built with an RFlat suffix (e.g. 'IVF1024,SQ8,RFlat'); "
+            f"this index uses {index_factory!r}."
+        )
+    return {
+        **metadata.get("search_params", {}),
+        **{name: value for name, value in overrides.items() if value > 0},
+    }
+
+
+def score_key_for_metric(metric: str) -> str:
+    # Inner-product scores on unit vectors are cosine similarities (higher is closer).
+    return "similarity" if metric == "cosine" else "distance"
+
+
+class LoadedFaissIndex:
+    # A FAISS index read once from disk with its metadata sidecar and search params applied.
+    # Searching is read-only, so one instance can serve many threads.
+    def __init__(self, index_path: Path, *, search_param_overrides: dict[str, int] | None = None) -> None:
+        try:
+            import faiss
+        except ImportError as exc:
+            raise ImportError(
+                "faiss is not installed. Install `faiss-cpu` to run kNN search."
+            ) from exc
+
+        self.path = Path(index_path)
+        self.metadata = read_index_metadata(self.path)
+        self.metric = validate_metric(self.metadata.get("metric", DEFAULT_METRIC))
+        self.search_params = merge_search_parameters(self.metadata, search_param_overrides or {})
+        self.index = faiss.read_index(str(self.path))
+        if self.index.ntotal <= 0:
+            raise ValueError(f"FAISS index is empty: {self.path}")
+        apply_search_parameters(self.index, self.search_params)
+        # ID-map indexes return resume_profiles.id; legacy flat indexes return positions.
+        self.has_row_ids = isinstance(self.index, faiss.IndexIDMap)
+        # IVF lists only reconstruct by id through a direct map (8 bytes per vector).
+        ivf_index = faiss.try_extract_index_ivf(self.index)
+        if ivf_index is not None:
+            ivf_index.make_direct_map()
+
+    def reconstruct_row(self, row_id: int, db_path: Path) -> list[float] | None:
+        # Flat and HNSW return the stored vector; SQ/PQ codes decode to an approximation.
+        key = row_id
+        if not self.has_row_ids:
+            positions = [row["id"] for row in fetch_index_rows(db_path, self.path)]
+            if row_id not in positions or len(positions) != self.index.ntotal:
+                return None
+            key = positions.index(row_id)
+        try:
+            return [float(value) for value in self.index.reconstruct(key).tolist()]
+        except RuntimeError:
+            return None
+
+    def search(self, query_vectors: Any, top_k: int) -> tuple[list[list[float]], list[list[int]]]:
+        vectors = prepare_vectors(query_vectors, self.metric)
+        if vectors.ndim != 2 or vectors.shape[1] != self.index.d:
+            raise ValueError(
+                f"Embedding dimension mismatch: query has {vectors.shape[-1]}, "
+                f"index expects {self.index.d}."
+            )
+        scores, indices = self.index.search(vectors, min(top_k, self.index.ntotal))
+        return (
+            [[float(value) for value in row] for row in scores.tolist()],
+            [[int(value) for value in row] for row in indices.tolist()],
+        )
+
+
+def stored_query_vector(
+    loaded_index: LoadedFaissIndex,
+    db_path: Path,
+    row: dict[str, Any],
+    *,
+    embedding_model: str,
+    embedding_cache: EmbeddingCache | None = None,
+) -> list[float]:
+    # Zero API calls. The cache holds the exact vector for the row's current text; the index
+    # copy may be lossy (SQ/PQ) or predate a re-extraction, so it is the fallback.
+    if embedding_cache is not None:
+        flattened_text = build_flattened_text_rows([row])[0]["flattened_text"]
+        cached = embedding_cache.get_many(
+            [compute_text_sha256(flattened_text)],
+            model=embedding_model,
+            dimensions=loaded_index.metadata.get("embedding_dimensions"),
+        )
+        if cached:
+            return next(iter(cached.values()))
+    vector = loaded_index.reconstruct_row(row["id"], db_path)
+    if vector is None:
+        raise LookupError(
+            f"Row {row['id']} ({row['pdf_stem']}) is neither in the embedding cache nor stored in "
+            f"{loaded_index.path}; index it with the backfill flow first."
+        )
+    return vector
+
+
+def exclude_query_row(neighbors: list[dict[str, Any]], row_id: int, top_n: int) -> list[dict[str, Any]]:
+    # A stored vector's nearest neighbor is itself; drop it and re-rank the rest.
+    kept = [neighbor for neighbor in neighbors if neighbor.get("id") != row_id][:top_n]
+    return [{**neighbor, "rank": rank} for rank, neighbor in enumerate(kept, start=1)]
+
+
+def resolve_neighbor_rows(
+    db_path: Path,
+    index_path: Path,
+    *,
+    has_row_ids: bool,
+    metric: str,
+    knn_indices: list[list[int]],
+    knn_scores: list[list[float]],
+) -> list[list[dict[str, Any]]]:
+    # One SQLite lookup covers every query; rows are attached to each ranked neighbor.
+    mapped_rows: list[dict[str, Any]] = []
+    rows_by_id: dict[int, dict[str, Any]] = {}
+    if Path(db_path).exists():
+        if has_row_ids:
+            rows_by_id = fetch_rows_by_id(
+                db_path,
+                [faiss_id for row in knn_indices for faiss_id in row if faiss_id >= 0],
+            )
+        else:
+            mapped_rows = fetch_index_rows(db_path=db_path, index_path=index_path)
+
+    score_key = score_key_for_metric(metric)
+    results: list[list[dict[str, Any]]] = []
+    for query_indices, query_scores in zip(knn_indices, knn_scores):
+        neighbors: list[dict[str, Any]] = []
+        for rank, (faiss_idx, score) in enumerate(zip(query_indices, query_scores), start=1):
+            row_data: dict[str, Any] = {"rank": rank, score_key: score}
+            if has_row_ids:
+                row_data["faiss_id"] = faiss_idx
+                row_data.update(rows_by_id.get(faiss_idx, {}))
+            else:
+                row_data["faiss_index_position"] = faiss_idx
+                if 0 <= faiss_idx < len(mapped_rows):
+                    row_data.update(mapped_rows[faiss_idx])
+            neighbors.append(row_data)
+        results.append(neighbors)
+    return results
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+
+from flow.services.embedding_cache import EmbeddingCache
+from flow.services.knn_search import (
+    LoadedFaissIndex,
+    exclude_query_row,
+    fetch_profile_row,
+    require_matching_embedding_model,
+    resolve_neighbor_rows,
+    stored_query_vector,
+)
+from flow.services.rate_limiter import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    AdaptiveRateLimiter,
+)
+from flow.services.resume_indexer import fetch_current_faiss_index_path, generate_embeddings
+from flow.services.shared_budget import PRIORITY_INTERACTIVE, open_shared_budget
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_DB_PATH = PROJECT_ROOT / "outputs" / "resume_profiles.db"
+DEFAULT_BUDGET_DB_PATH = PROJECT_ROOT / "outputs" / "openai_budget.db"
+DEFAULT_EMBEDDING_CACHE_PATH = PROJECT_ROOT / "outputs" / "embedding_cache.db"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RELOAD_INTERVAL_SECONDS = 2.0
+
+
+def _index_file_signature(index_path: Path) -> tuple[str, int, int, int]:
+    # os.replace gives a rewritten index a new inode, so a pinned file replaced in place shows up too.
+    stat = index_path.stat()
+    return (str(index_path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ResidentKnnSearcher:
+    # Serves searches from one in-memory LoadedFaissIndex. Reloads are lazy: a request checks
+    # the current index file at most every reload_interval_seconds, builds a newly promoted
+    # index off to the side and swaps a single reference, so in-flight queries finish on the
+    # old index and the first query after a swap pays the load.
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        embedding_model: str,
+        index_path: Path | None = None,
+        search_param_overrides: dict[str, int] | None = None,
+        reload_interval_seconds: float = DEFAULT_RELOAD_INTERVAL_SECONDS,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+    ) -> None:
+        if reload_interval_seconds < 0:
+            raise ValueError("reload_interval_seconds must not be negative.")
+        self.db_path = Path(db_path)
+        self.embedding_model = embedding_model
+        self.pinned_index_path = Path(index_path) if index_path else None
+        self.search_param_overrides = dict(search_param_overrides or {})
+        self.reload_interval_seconds = reload_interval_seconds
+        self.rate_limiter = rate_limiter
+        self.embedding_cache = embedding_cache
+        self.reload_count = 0
+        self.last_reload_error: str | None = None
+        self._loaded: LoadedFaissIndex | None = None
+        self._signature: tuple[str, int, int, int] | None = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload_if_changed(force=True)
+
+    @property
+    def loaded_index(self) -> LoadedFaissIndex:
+        if self._loaded is None:
+            raise ValueError("No FAISS index is loaded.")
+        return self._loaded
+
+    def _resolve_index_path(self) -> Path:
+        if self.pinned_index_path is not None:
+            return self.pinned_index_path
+        current_index_path = fetch_current_faiss_index_path(self.db_path)
+        if current_index_path is None:
+            raise ValueError(f"No current FAISS index in {self.db_path}; run the backfill flow first.")
+        return current_index_path
+
+    def reload_if_changed(self, *, force: bool = False) -> bool:
+        if not force and time.monotonic() - self._checked_at < self.reload_interval_seconds:
+            return False
+        with self._reload_lock:
+            if not force and time.monotonic() - self._checked_at < self.reload_interval_seconds:
+                return False
+            self._checked_at = time.monotonic()
+            try:
+                index_path = self._resolve_index_path()
+                signature = _index_file_signature(index_path)
+                if signature == self._signature:
+                    return False
+                loaded = LoadedFaissIndex(index_path, search_param_overrides=self.search_param_overrides)
+                require_matching_embedding_model(loaded.metadata, self.embedding_model)
+            except (OSError, ValueError) as exc:
+                # The first load must succeed; later failures keep serving the last good index.
+                if self._loaded is None:
+                    raise
+                self.last_reload_error = str(exc)
+                return False
+            self._loaded, self._signature = loaded, signature
+            self.reload_count += 1
+            self.last_reload_error = None
+            return True
+
+    def _embed_text(self, text: str, loaded: LoadedFaissIndex) -> list[float]:
+        if not text.strip():
+            raise ValueError("Query text is empty.")
+        return generate_embeddings(
+            flattened_rows=[{"flattened_text": text}],
+            model=self.embedding_model,
+            batch_size=1,
+            rate_limiter=self.rate_limiter,
+            dimensions=loaded.metadata.get("embedding_dimensions"),
+        )[0]
+
+    def search(
+        self,
+        *,
+        top_n: int,
+        vector: list[float] | None = None,
+        text: str | None = None,
+        row_id: int | None = None,
+        pdf_stem: str | None = None,
+    ) -> dict[str, Any]:
+        if top_n <= 0:
+            raise ValueError("top_n must be greater than 0.")
+        if sum(value is not None for value in (vector, text, row_id, pdf_stem)) != 1:
+            raise ValueError("Provide exactly one of 'vector', 'text', 'row_id' or 'pdf_stem'.")
+        self.reload_if_changed()
+        loaded = self.loaded_index
+        query_row = None
+        if row_id is not None or pdf_stem is not None:
+            query_row = fetch_profile_row(self.db_path, row_id=row_id, pdf_stem=pdf_stem)
+            vector = stored_query_vector(
+                loaded,
+                self.db_path,
+                query_row,
+                embedding_model=self.embedding_model,
+                embedding_cache=self.embedding_cache,
+            )
+        elif vector is None:
+            vector = self._embed_text(text, loaded)
+
+        started_at = time.perf_counter()
+        # A stored query finds itself first; ask for one extra and drop it below.
+        scores, indices = loaded.search([vector], top_n + (query_row is not None))
+        neighbors = resolve_neighbor_rows(
+            self.db_path,
+            loaded.path,
+            has_row_ids=loaded.has_row_ids,
+            metric=loaded.metric,
+            knn_indices=indices,
+            knn_scores=scores,
+        )[0]
+        if query_row is not None:
+            neighbors = exclude_query_row(neighbors, query_row["id"], top_n)
+        return {
+            "index_path": str(loaded.path),
+            "metric": loaded.metric,
+            "search_ms": (time.perf_counter() - started_at) * 1000,
+            "neighbors": neighbors,
+        }
+
+    def describe(self) -> dict[str, Any]:
+        loaded = self.loaded_index
+        return {
+            "index_path": str(loaded.path),
+            "index_factory": loaded.metadata.get("index_factory", "Flat"),
+            "model": loaded.metadata.get("model"),
+            "metric": loaded.metric,
+            "ntotal": int(loaded.index.ntotal),
+            "search_params": loaded.search_params,
+            "reload_count": self.reload_count,
+            "last_reload_error": self.last_reload_error,
+        }
+
+
+# POST /search takes {"top_n": N} plus one of "vector", "text", "row_id" or "pdf_stem";
+# GET /health describes the loaded index. Errors are JSON: 400 bad request, 404 unknown
+# resume, 500 otherwise.
+class KnnSearchHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address: tuple[str, int], searcher: ResidentKnnSearcher) -> None:
+        super().__init__(server_address, _KnnSearchHandler)
+        self.searcher = searcher
+
+
+class _KnnSearchHandler(BaseHTTPRequestHandler):
+    server: KnnSearchHTTPServer
+
+    def _send_json(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self.server.searcher.reload_if_changed()
+        self._send_json(200, self.server.searcher.describe())
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path != "/search":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            result = self.server.searcher.search(
+                top_n=int(request.get("top_n", 10)),
+                vector=request.get("vector"),
+                text=request.get("text"),
+                row_id=request.get("row_id"),
+                pdf_stem=request.get("pdf_stem"),
+            )
+        except LookupError as exc:
+            self._send_json(404, {"error": str(exc)})
+            return
+        except (ValueError, TypeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        except Exception as exc:
+            # SQLite, OpenAI or FAISS failures: answer with JSON instead of dropping the connection.
+            traceback.print_exc()
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve kNN search over the current FAISS index from memory."
+    )
+    parser.add_argument("--db-path", type=Path, default=DEFAULT_DB_PATH)
+    parser.add_argument(
+        "--index-path", type=Path, default=None, help="Pin one index instead of the registry's current."
+    )
+    parser.add_argument("--embedding-model", default="text-embedding-3-large")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--reload-interval", type=float, default=DEFAULT_RELOAD_INTERVAL_SECONDS)
+    parser.add_argument("--nprobe", type=int, default=0)
+    parser.add_argument("--ef-search", type=int, default=0)
+    parser.add_argument("--rerank-factor", type=int, default=0)
+    parser.add_argument("--requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE)
+    parser.add_argument("--tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    parser.add_argument("--budget-db-path", default=str(DEFAULT_BUDGET_DB_PATH))
+    parser.add_argument(
+        "--embedding-cache-path",
+        default=str(DEFAULT_EMBEDDING_CACHE_PATH),
+        help="Looked up before reconstructing a stored vector from the index; empty disables.",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    searcher = ResidentKnnSearcher(
+        args.db_path.expanduser().resolve(),
+        embedding_model=args.embedding_model,
+        index_path=args.index_path.expanduser().resolve() if args.index_path else None,
+        search_param_overrides={
+            "nprobe": args.nprobe,
+            "efSearch": args.ef_search,
+            "k_factor_rf": args.rerank_factor,
+        },
+        reload_interval_seconds=args.reload_interval,
+        rate_limiter=AdaptiveRateLimiter(
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+            shared_budget=open_shared_budget(
+                args.budget_db_path,
+                name=args.embedding_model,
+                requests_per_minute=args.requests_per_minute,
+                tokens_per_minute=args.tokens_per_minute,
+            ),
+            priority=PRIORITY_INTERACTIVE,
+        ),
+        embedding_cache=(
+            EmbeddingCache(Path(args.embedding_cache_path).expanduser().resolve())
+            if args.embedding_cache_path
+            else None
+        ),
+    )
+    server = KnnSearchHTTPServer((args.host, args.port), searcher)
+    print(f"Serving {searcher.describe()['index_path']} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+from flow.schemas.resume_profile import ResumeProfile
+
+
+# Stored as prompt_version_sha for rows mapped from extension DOM payloads.
+DOM_MAPPER_VERSION = "linkedin-dom-v1"
+
+EMPLOYMENT_TYPES = {
+    "full-time",
+    "part-time",
+    "contract",
+    "internship",
+    "self-employed",
+    "freelance",
+    "apprenticeship",
+    "seasonal",
+}
+_MONTH_ABBR = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*"
+_DOM_DATE = rf"(?:{_MONTH_ABBR} )?\d{{4}}"
+_DOM_DATE_RANGE = re.compile(
+    rf"^(?P<start>{_DOM_DATE})(?: - (?P<end>{_DOM_DATE}|Present))?(?: · (?P<duration>.+))?$"
+)
+_YEAR = re.compile(r"\d{4}")
+_WORK_ARRANGEMENTS = ("remote", "hybrid", "on-site")
+
+
+def _collapse_lines(item: dict[str, Any]) -> list[str]:
+    lines = [
+        str(item.get(key) or "").strip() for key in ("title", "subtitle", "meta")
+    ] + [str(line).strip() for line in item.get("details") or []]
+    collapsed: list[str] = []
+    for line in lines:
+        # LinkedIn renders visually hidden copies of each line, so innerText repeats them.
+        if line and (not collapsed or collapsed[-1] != line):
+            collapsed.append(line)
+    return collapsed
+
+
+def _is_employment_type(line: str) -> bool:
+    return line.split(" · ", 1)[0].strip().lower() in EMPLOYMENT_TYPES
+
+
+def _is_dom_location(line: str) -> bool:
+    lowered = line.lower()
+    return len(line) <= 80 and (
+        "," in line or lowered.endswith(" area") or any(word in lowered for word in _WORK_ARRANGEMENTS)
+    )
+
+
+def _strip_employment_type(company_line: str) -> str:
+    company, _, suffix = company_line.rpartition(" · ")
+    return company if company and suffix.strip().lower() in EMPLOYMENT_TYPES else company_line
+
+
+def _experience_role(
+    lines: list[str], *, company: str, title_index: int, date_index: int, body_end: int
+) -> dict[str, Any]:
+    dates = _DOM_DATE_RANGE.match(lines[date_index])
+    body = lines[date_index + 1 : body_end]
+    location = None
+    if body and _is_dom_location(body[0]):
+        location, body = body[0], body[1:]
+    return {
+        "company": company,
+        "title": lines[title_index],
+        "start_date": dates.group("start"),
+        "end_date": dates.group("end"),
+        "duration": dates.group("duration"),
+        "location": location,
+        "description_bullets": [line.lstrip("-•● ").strip() for line in body if line.lstrip("-•● ").strip()],
+    }
+
+
+def _map_experience_item(item: dict[str, Any]) -> list[dict[str, Any]]:
+    lines = _collapse_lines(item)
+    date_indexes = [index for index, line in enumerate(lines) if _DOM_DATE_RANGE.match(line)]
+    if len(lines) < 2 or lines[1].lower() in EMPLOYMENT_TYPES:
+        # Nested <li> for one role inside a company group; the group item covers it.
+        return []
+    if not date_indexes:
+        return [
+            {
+                "company": _strip_employment_type(lines[1]),
+                "title": lines[0],
+                "start_date": None,
+                "end_date": None,
+                "duration": None,
+                "location": None,
+                "description_bullets": lines[2:],
+            }
+        ]
+
+    if date_indexes[0] == 2 and len(date_indexes) == 1:
+        # Single role: "Title / Company · Full-time / dates / location / description".
+        return [
+            _experience_role(
+                lines,
+                company=_strip_employment_type(lines[1]),
+                title_index=0,
+                date_index=2,
+                body_end=len(lines),
+            )
+        ]
+
+    # Grouped roles: "Company / Full-time · 5 yrs / location / (Title / type? / dates / ...)+".
+    title_indexes = []
+    for date_index in date_indexes:
+        title_index = date_index - 1
+        if title_index > 0 and _is_employment_type(lines[title_index]):
+            title_index -= 1
+        title_indexes.append(title_index)
+    roles = []
+    for position, (title_index, date_index) in enumerate(zip(title_indexes, date_indexes)):
+        if title_index <= 0:
+            continue
+        body_end = title_indexes[position + 1] if position + 1 < len(title_indexes) else len(lines)
+        roles.append(
+            _experience_role(
+                lines,
+                company=lines[0],
+                title_index=title_index,
+                date_index=date_index,
+                body_end=body_end,
+            )
+        )
+    return roles
+
+
+def _map_education_item(item: dict[str, Any]) -> dict[str, Any] | None:
+    lines = _collapse_lines(item)
+    if not lines:
+        return None
+    institution, rest = lines[0], lines[1:]
+    degree_line = None
+    years_line = None
+    for line in rest[:2]:
+        if _DOM_DATE_RANGE.match(line):
+            years_line = line
+            break
+        if degree_line is None:
+            degree_line = line
+
+    degree, _, field = (degree_line or "").partition(", ")
+    start_year = end_year = None
+    if years_line is not None:
+        dates = _DOM_DATE_RANGE.match(years_line)
+        start_match = _YEAR.search(dates.group("start"))
+        end_match = _YEAR.search(dates.group("end") or "")
+        start_year = start_match.group(0) if start_match else None
+        end_year = end_match.group(0) if end_match else None
+    return {
+        "institution": institution,
+        "degree": degree or None,
+        "field_of_study": field or None,
+        "start_year": start_year,
+        "end_year": end_year,
+    }
+
+
+def _unique(values: list[str]) -> list[str]:
+    seen: set[str] = set()
+    return [value for value in values if value and not (value in seen or seen.add(value))]
+
+
+def _canonical_linkedin_url(source_url: str | None, profile_slug: str) -> str | None:
+    if not source_url or "linkedin.com/in/" not in source_url:
+        return None
+    return f"https://www.linkedin.com/in/{profile_slug}"
+
+
+def map_linkedin_dom_payload(payload: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    # Accept both the bare extractProfile() result and the {"ok": true, "data": ...} message.
+    if "data" in payload and "sections" not in payload:
+        if payload.get("ok") is False:
+            raise ValueError(f"Extension reported a failed extraction: {payload.get('error')}")
+        payload = payload["data"]
+
+    metadata = payload.get("metadata") or {}
+    sections = payload.get("sections")
+    if not isinstance(sections, dict):
+        raise ValueError("Payload has no 'sections' object.")
+    profile_slug = str(metadata.get("profileSlug") or "").strip()
+    if not profile_slug or profile_slug == "unknown":
+        raise ValueError("Payload metadata has no profileSlug.")
+
+    experience: list[dict[str, Any]] = []
+    seen_roles: set[tuple[str, str, str | None]] = set()
+    for item in sections.get("Experience") or []:
+        for role in _map_experience_item(item):
+            role_key = (role["company"], role["title"], role["start_date"])
+            if role_key not in seen_roles:
+                seen_roles.add(role_key)
+                experience.append(role)
+    education = [
+        entry
+        for entry in (_map_education_item(item) for item in sections.get("Education") or [])
+        if entry is not None
+    ]
+    languages = []
+    for item in sections.get("Languages") or []:
+        lines = _collapse_lines(item)
+        if lines:
+            languages.append(f"{lines[0]} ({lines[1]})" if len(lines) > 1 else lines[0])
+
+    profile = {
+        "personal_information": {
+            # The extension scrapes profile sections only, not the top card.
+            "full_name": None,
+            "headline": None,
+            "location": None,
+            "linkedin_url": _canonical_linkedin_url(metadata.get("sourceUrl"), profile_slug),
+        },
+        "skills": {
+            "top_skills": _unique([str(item.get("skill") or "").strip() for item in sections.get("Skills") or []]),
+            "languages": _unique(languages),
+        },
+        "experience": experience,
+        "education": education,
+    }
+    return profile_slug, ResumeProfile.model_validate(profile).model_dump()
+
+
+def iter_linkedin_dom_documents(input_root: Path) -> Iterator[tuple[str, str]]:
+    # Yields (source label, raw JSON text); *.jsonl files hold one payload per line.
+    for path in sorted(input_root.glob("*.json")):
+        yield str(path), path.read_text(encoding="utf-8")
+    for path in sorted(input_root.glob("*.jsonl")):
+        with path.open("r", encoding="utf-8") as file_obj:
+            for line_number, line in enumerate(file_obj, start=1):
+                if line.strip():
+                    yield f"{path}:{line_number}", line
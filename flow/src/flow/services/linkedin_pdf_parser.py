@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from flow.schemas.resume_profile import ResumeProfile
+from flow.services.pdf_text_layer import extract_pdf_text_layer, is_text_layer_usable, require_pypdf
+
+
+# Stored as prompt_version_sha for rows produced without the LLM.
+LOCAL_PARSER_VERSION = "linkedin-local-v1"
+
+LEFT_COLUMN_HEADINGS = {
+    "Contact",
+    "Top Skills",
+    "Languages",
+    "Certifications",
+    "Honors-Awards",
+    "Publications",
+    "Patents",
+}
+MAIN_COLUMN_HEADINGS = {"Summary", "Experience", "Education"}
+
+_PAGE_FOOTER = re.compile(r"^Page \d+ of \d+$")
+_MONTH = r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+_DATE = rf"(?:{_MONTH} )?\d{{4}}"
+_DATE_RANGE = re.compile(
+    rf"^(?P<start>{_DATE}) - (?P<end>{_DATE}|Present)(?: \((?P<duration>[^()]*)\))?$"
+)
+_DURATION_ONLY = re.compile(r"^(?:less than a year|\d+ years?(?: \d+ months?)?|\d+ months?)$")
+_EDUCATION_YEARS = re.compile(r"\((?P<years>[^()]*\d{4}[^()]*)\)$")
+_YEAR = re.compile(r"\d{4}")
+_BULLET_PREFIX = re.compile(r"^[-•●▪◦*]\s*")
+_LINKEDIN_URL = re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/in/[^\s()]+")
+
+
+def _split_columns(text: str) -> tuple[list[str], list[str]] | None:
+    blocks = [
+        [line.strip() for line in block.splitlines() if line.strip()]
+        for block in text.split("\n\n")
+    ]
+    blocks = [
+        [line for line in block if not _PAGE_FOOTER.match(line)] for block in blocks
+    ]
+    blocks = [block for block in blocks if block]
+    if len(blocks) < 2 or blocks[0][0] not in LEFT_COLUMN_HEADINGS:
+        return None
+    return blocks[0], [line for block in blocks[1:] for line in block]
+
+
+def _split_sections(lines: list[str], headings: set[str]) -> tuple[list[str], dict[str, list[str]]]:
+    preamble: list[str] = []
+    sections: dict[str, list[str]] = {}
+    current: list[str] = preamble
+    for line in lines:
+        if line in headings and line not in sections:
+            current = sections.setdefault(line, [])
+        else:
+            current.append(line)
+    return preamble, sections
+
+
+def _parse_linkedin_url(contact_lines: list[str]) -> str | None:
+    for index, line in enumerate(contact_lines):
+        if "linkedin.com/in/" not in line:
+            continue
+        # Long profile URLs wrap onto the next line before the "(LinkedIn)" label.
+        joined = line
+        for next_line in contact_lines[index + 1 : index + 3]:
+            if "(LinkedIn)" in joined:
+                break
+            joined += next_line
+        match = _LINKEDIN_URL.search(joined)
+        return match.group(0) if match else None
+    return None
+
+
+def _looks_like_location(line: str) -> bool:
+    if len(line) > 80 or line.endswith(".") or _BULLET_PREFIX.match(line):
+        return False
+    lowered = line.lower()
+    if "," in line or lowered.endswith(" area") or "remote" in lowered:
+        return True
+    words = line.split()
+    return len(words) <= 4 and all(word[:1].isupper() and not any(ch.isdigit() for ch in word) for word in words)
+
+
+def _looks_like_description(line: str) -> bool:
+    # Company names are short and capitalized; bullets, sentences and wrapped
+    # continuation lines are not.
+    return (
+        line.endswith((".", "!", "?", ";"))
+        or len(line) > 60
+        or bool(_BULLET_PREFIX.match(line))
+        or line[:1].islower()
+    )
+
+
+def _group_description_bullets(lines: list[str]) -> list[str]:
+    bullets: list[str] = []
+    for line in lines:
+        marker = _BULLET_PREFIX.match(line)
+        text = line[marker.end() :] if marker else line
+        if marker or not bullets or bullets[-1].endswith((".", "!", "?", ":")):
+            bullets.append(text)
+        else:
+            # PDF line wraps split one sentence across lines; rejoin the continuation.
+            bullets[-1] = f"{bullets[-1]} {text}"
+    return [bullet.strip() for bullet in bullets if bullet.strip()]
+
+
+def _parse_experience(lines: list[str], failures: list[str]) -> list[dict[str, Any]]:
+    date_indexes = [index for index, line in enumerate(lines) if _DATE_RANGE.match(line)]
+    if not date_indexes:
+        failures.append("experience section has no date ranges")
+        return []
+
+    headers: list[tuple[int, str, str]] = []
+    group_company: str | None = None
+    previous_date_index = -1
+    for date_index in date_indexes:
+        title_index = date_index - 1
+        company_index = date_index - 2
+        if title_index <= previous_date_index:
+            failures.append(f"role at line {date_index} has no title")
+            return []
+
+        if company_index > previous_date_index and _DURATION_ONLY.match(lines[company_index]):
+            # Several roles at one company: "Company / total duration / Title / dates".
+            company_index -= 1
+            if company_index <= previous_date_index:
+                failures.append(f"role group at line {date_index} has no company")
+                return []
+            group_company = lines[company_index]
+            headers.append((company_index, group_company, lines[title_index]))
+        elif group_company is not None and (
+            company_index <= previous_date_index
+            or (company_index == previous_date_index + 1 and _looks_like_location(lines[company_index]))
+            or _looks_like_description(lines[company_index])
+        ):
+            # The line above the title belongs to the previous role: another role in the group.
+            headers.append((title_index, group_company, lines[title_index]))
+        elif company_index <= previous_date_index:
+            failures.append(f"role '{lines[title_index]}' has no company")
+            return []
+        else:
+            group_company = None
+            headers.append((company_index, lines[company_index], lines[title_index]))
+        previous_date_index = date_index
+
+    if headers[0][0] != 0:
+        failures.append("unparsed lines before the first role")
+        return []
+
+    entries: list[dict[str, Any]] = []
+    for position, ((_, company, title), date_index) in enumerate(zip(headers, date_indexes)):
+        body_end = headers[position + 1][0] if position + 1 < len(headers) else len(lines)
+        body = lines[date_index + 1 : body_end]
+        location = None
+        if body and _looks_like_location(body[0]):
+            location, body = body[0], body[1:]
+        dates = _DATE_RANGE.match(lines[date_index])
+        entries.append(
+            {
+                "company": company,
+                "title": title,
+                "start_date": dates.group("start"),
+                "end_date": dates.group("end"),
+                "duration": dates.group("duration"),
+                "location": location,
+                "description_bullets": _group_description_bullets(body),
+            }
+        )
+    return entries
+
+
+def _parse_education_detail(detail: str) -> dict[str, str | None]:
+    years_match = _EDUCATION_YEARS.search(detail)
+    years = years_match.group("years") if years_match else ""
+    degree_text = detail[: years_match.start()] if years_match else detail
+    degree_text = degree_text.strip().rstrip("·•").strip()
+    degree, _, field = degree_text.partition(", ")
+
+    year_parts = [_YEAR.search(part) for part in years.split(" - ")] if years else []
+    start_year = year_parts[0].group(0) if len(year_parts) == 2 and year_parts[0] else None
+    end_year = year_parts[-1].group(0) if year_parts and year_parts[-1] else None
+    return {
+        "degree": degree or None,
+        "field_of_study": field or None,
+        "start_year": start_year,
+        "end_year": end_year,
+    }
+
+
+def _parse_education(lines: list[str], failures: list[str]) -> list[dict[str, Any]]:
+    entries: list[dict[str, Any]] = []
+    segment_start = 0
+    for index, line in enumerate(lines):
+        if not (_EDUCATION_YEARS.search(line) or "·" in line):
+            continue
+        segment = lines[segment_start : index + 1]
+        if len(segment) < 2:
+            failures.append(f"education detail '{line}' has no institution")
+            return []
+        entries.append({"institution": segment[0], **_parse_education_detail(" ".join(segment[1:]))})
+        segment_start = index + 1
+
+    remainder = lines[segment_start:]
+    if len(remainder) > 2:
+        failures.append("unparsed lines in education section")
+        return []
+    if remainder:
+        detail = _parse_education_detail(remainder[1]) if len(remainder) == 2 else {
+            "degree": None,
+            "field_of_study": None,
+            "start_year": None,
+            "end_year": None,
+        }
+        entries.append({"institution": remainder[0], **detail})
+    return entries
+
+
+def _looks_like_name(line: str) -> bool:
+    words = line.split()
+    return 1 < len(words) <= 6 and not any(ch.isdigit() or ch == "@" for ch in line)
+
+
+def parse_linkedin_profile_text(text: str) -> tuple[dict[str, Any] | None, list[str]]:
+    failures: list[str] = []
+    columns = _split_columns(text)
+    if columns is None:
+        return None, ["no LinkedIn left column detected"]
+    left_lines, main_lines = columns
+
+    _, left_sections = _split_sections(left_lines, LEFT_COLUMN_HEADINGS)
+    header_lines, main_sections = _split_sections(main_lines, MAIN_COLUMN_HEADINGS)
+    if len(header_lines) < 3:
+        failures.append("main column header needs name, headline and location")
+    elif not _looks_like_name(header_lines[0]):
+        failures.append(f"first main-column line does not look like a name: {header_lines[0]!r}")
+    if "Experience" not in main_sections:
+        failures.append("no Experience section")
+    if failures:
+        return None, failures
+
+    profile = {
+        "personal_information": {
+            "full_name": header_lines[0],
+            "headline": " ".join(header_lines[1:-1]),
+            "location": header_lines[-1],
+            "linkedin_url": _parse_linkedin_url(left_sections.get("Contact", [])),
+        },
+        "skills": {
+            "top_skills": left_sections.get("Top Skills", []),
+            "languages": left_sections.get("Languages", []),
+        },
+        "experience": _parse_experience(main_sections["Experience"], failures),
+        "education": _parse_education(main_sections.get("Education", []), failures),
+    }
+    if failures:
+        return None, failures
+
+    try:
+        return ResumeProfile.model_validate(profile).model_dump(), []
+    except ValidationError as exc:
+        return None, [f"parsed profile failed validation: {exc.error_count()} errors"]
+
+
+def extract_resume_profile_locally(pdf_bytes: bytes) -> tuple[dict[str, Any] | None, list[str]]:
+    require_pypdf()
+    try:
+        text = extract_pdf_text_layer(pdf_bytes)
+    except Exception as exc:  # noqa: BLE001
+        return None, [f"text layer unreadable: {type(exc).__name__}"]
+    if not is_text_layer_usable(text):
+        return None, ["text layer empty or garbled"]
+    return parse_linkedin_profile_text(text)
+
+
+def extract_resume_profiles_locally(
+    pdf_paths: list[str | Path],
+) -> tuple[list[dict[str, Any]], list[str | Path]]:
+    outcomes: list[dict[str, Any]] = []
+    fallback_paths: list[str | Path] = []
+    for pdf_path in pdf_paths:
+        source_path = Path(pdf_path).expanduser().resolve()
+        try:
+            profile, _ = extract_resume_profile_locally(source_path.read_bytes())
+        except OSError:
+            profile = None
+        if profile is None:
+            # Failed confidence checks (or unreadable files) go to the LLM path.
+            fallback_paths.append(pdf_path)
+            continue
+        outcomes.append(
+            {
+                "source_pdf": str(source_path),
+                "profile": profile,
+                "success": True,
+                "error_message": None,
+                "cache_hit": None,
+                "text_layer_used": None,
+                "extractor": "local",
+            }
+        )
+    return outcomes, fallback_paths
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import openai
+
+
+FILE_PURPOSE = "user_data"
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def is_missing_file_error(exc: BaseException, file_id: str) -> bool:
+    # Only errors naming this file mean the upload is gone; a 404 for a wrong model or
+    # endpoint must not evict a valid file id.
+    return isinstance(exc, (openai.NotFoundError, openai.BadRequestError)) and file_id in str(exc)
+
+
+class PdfFileStore:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self.upload_count = 0
+        self.reuse_count = 0
+        self._ensure_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    def _ensure_table(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS uploaded_pdf_files (
+                    content_sha256 TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    uploaded_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.commit()
+
+    def get_file_id(self, content_sha256: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT file_id FROM uploaded_pdf_files WHERE content_sha256 = ?",
+                (content_sha256,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, *, content_sha256: str, file_id: str, filename: str, size_bytes: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO uploaded_pdf_files (content_sha256, file_id, filename, size_bytes, uploaded_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(content_sha256) DO UPDATE SET
+                    file_id = excluded.file_id,
+                    filename = excluded.filename,
+                    uploaded_at = excluded.uploaded_at
+                """,
+                (content_sha256, file_id, filename, size_bytes, _utc_now_iso()),
+            )
+            conn.commit()
+
+    def forget(self, content_sha256: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM uploaded_pdf_files WHERE content_sha256 = ?",
+                (content_sha256,),
+            )
+            conn.commit()
+
+    def get_or_upload(self, client: Any, *, pdf_bytes: bytes, filename: str) -> str:
+        content_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        file_id = self.get_file_id(content_sha256)
+        if file_id is not None:
+            self.reuse_count += 1
+            return file_id
+
+        uploaded = client.files.create(
+            file=(filename, pdf_bytes, "application/pdf"),
+            purpose=FILE_PURPOSE,
+        )
+        self.upload_count += 1
+        self.record(
+            content_sha256=content_sha256,
+            file_id=uploaded.id,
+            filename=filename,
+            size_bytes=len(pdf_bytes),
+        )
+        return uploaded.id
+
+    async def get_or_upload_async(self, client: Any, *, pdf_bytes: bytes, filename: str) -> str:
+        content_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        file_id = self.get_file_id(content_sha256)
+        if file_id is not None:
+            self.reuse_count += 1
+            return file_id
+
+        uploaded = await client.files.create(
+            file=(filename, pdf_bytes, "application/pdf"),
+            purpose=FILE_PURPOSE,
+        )
+        self.upload_count += 1
+        self.record(
+            content_sha256=content_sha256,
+            file_id=uploaded.id,
+            filename=filename,
+            size_bytes=len(pdf_bytes),
+        )
+        return uploaded.id
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import io
+import re
+from typing import Any
+
+
+# LinkedIn "Save to PDF" exports place the sidebar in roughly the left third of page one.
+LEFT_COLUMN_MAX_RATIO = 0.33
+MIN_COLUMN_LINES = 3
+MIN_USABLE_CHARS = 200
+MIN_READABLE_RATIO = 0.85
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+_READABLE_CHARS = re.compile(r"[\w\s.,;:!?()\[\]{}'\"/\\&%@#+\-–—•·|]", re.UNICODE)
+
+
+def _group_fragments_into_lines(fragments: list[tuple[float, float, str]]) -> list[str]:
+    # Fragments sharing a baseline (within 2pt) form one line, read left to right.
+    lines: list[tuple[float, list[tuple[float, str]]]] = []
+    for x, y, text in sorted(fragments, key=lambda item: (-item[1], item[0])):
+        if lines and abs(lines[-1][0] - y) <= 2.0:
+            lines[-1][1].append((x, text))
+        else:
+            lines.append((y, [(x, text)]))
+    rendered: list[str] = []
+    for _, parts in lines:
+        line = " ".join(text.strip() for _, text in sorted(parts) if text.strip())
+        if line:
+            rendered.append(line)
+    return rendered
+
+
+def _page_fragments(page: Any) -> list[tuple[float, float, str]]:
+    fragments: list[tuple[float, float, str]] = []
+
+    def visitor(text: str, cm: list[float], tm: list[float], *_: Any) -> None:
+        if not text.strip():
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        for offset, chunk in enumerate(text.splitlines()):
+            if chunk.strip():
+                fragments.append((x, y - offset * 0.01, chunk))
+
+    page.extract_text(visitor_text=visitor)
+    return fragments
+
+
+def _page_text(page: Any) -> str:
+    fragments = _page_fragments(page)
+    if not fragments:
+        return ""
+
+    split_x = float(page.mediabox.left) + float(page.mediabox.width) * LEFT_COLUMN_MAX_RATIO
+    left = [fragment for fragment in fragments if fragment[0] < split_x]
+    main = [fragment for fragment in fragments if fragment[0] >= split_x]
+    left_lines = _group_fragments_into_lines(left)
+    main_lines = _group_fragments_into_lines(main)
+    if len(left_lines) >= MIN_COLUMN_LINES and len(main_lines) >= MIN_COLUMN_LINES:
+        return "\n".join([*left_lines, "", *main_lines])
+    return "\n".join(_group_fragments_into_lines(fragments))
+
+
+def require_pypdf() -> Any:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ImportError(
+            "pypdf is not installed. Install `pypdf` to read PDF text layers locally."
+        ) from exc
+    return PdfReader
+
+
+def extract_pdf_text_layer(pdf_bytes: bytes) -> str:
+    PdfReader = require_pypdf()
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    page_texts = [_page_text(page) for page in reader.pages]
+    return "\n\n".join(text for text in page_texts if text.strip()).strip()
+
+
+def is_text_layer_usable(text: str) -> bool:
+    stripped = text.strip()
+    if len(stripped) < MIN_USABLE_CHARS:
+        return False
+    if _CID_PATTERN.search(stripped) or "�" in stripped:
+        return False
+
+    readable = len(_READABLE_CHARS.findall(stripped))
+    if readable / len(stripped) < MIN_READABLE_RATIO:
+        return False
+
+    words = stripped.split()
+    average_word_length = sum(len(word) for word in words) / len(words)
+    return 2.0 <= average_word_length <= 15.0
+
+
+def usable_text_layer_or_none(pdf_bytes: bytes) -> str | None:
+    # A missing pypdf is a setup error, raised before the catch-all below.
+    require_pypdf()
+    try:
+        text = extract_pdf_text_layer(pdf_bytes)
+    except Exception:  # noqa: BLE001
+        # Unparseable PDFs fall back to sending the file itself.
+        return None
+    return text if is_text_layer_usable(text) else None
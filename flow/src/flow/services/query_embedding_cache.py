@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from flow.services.embedding_cache import decode_vector, encode_vector
+from flow.services.sqlite_lru_cache import SqliteLruCache
+
+
+DEFAULT_QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def compute_query_cache_key(
+    *,
+    pdf_sha256: str,
+    prompt_sha: str,
+    extraction_model: str,
+    embedding_model: str,
+    dimensions: int | None = None,
+) -> str:
+    # The prompt and output dimensions change the flattened text or the vector, so they key too.
+    material = (
+        f"{pdf_sha256}\x00{prompt_sha}\x00{extraction_model}\x00{embedding_model}\x00{dimensions or 0}"
+    ).encode("utf-8")
+    return hashlib.sha256(material).hexdigest()
+
+
+class QueryEmbeddingCache(SqliteLruCache):
+    # PDF -> (flattened text, query vector) for kNN queries, so re-running a search on the same
+    # resume skips both extraction and embedding. Bounded by max_bytes with LRU eviction.
+    table_name = "query_embedding_cache"
+
+    def __init__(self, db_path: Path, *, max_bytes: int = DEFAULT_QUERY_CACHE_MAX_BYTES) -> None:
+        super().__init__(db_path, max_bytes=max_bytes)
+
+    def _ensure_table(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_embedding_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    pdf_sha256 TEXT NOT NULL,
+                    extraction_model TEXT NOT NULL,
+                    embedding_model TEXT NOT NULL,
+                    flattened_text TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_accessed_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_query_embedding_cache_last_accessed
+                ON query_embedding_cache (last_accessed_at)
+                """
+            )
+            conn.commit()
+
+    def get(
+        self,
+        *,
+        pdf_sha256: str,
+        prompt_sha: str,
+        extraction_model: str,
+        embedding_model: str,
+        dimensions: int | None = None,
+    ) -> dict[str, Any] | None:
+        cache_key = compute_query_cache_key(
+            pdf_sha256=pdf_sha256,
+            prompt_sha=prompt_sha,
+            extraction_model=extraction_model,
+            embedding_model=embedding_model,
+            dimensions=dimensions,
+        )
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT flattened_text, embedding FROM query_embedding_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touch(conn, cache_key, _utc_now_iso())
+            conn.commit()
+        self.hits += 1
+        return {"flattened_text": row[0], "embedding": decode_vector(row[1])}
+
+    def put(
+        self,
+        *,
+        pdf_sha256: str,
+        prompt_sha: str,
+        extraction_model: str,
+        embedding_model: str,
+        flattened_text: str,
+        embedding: list[float],
+        dimensions: int | None = None,
+    ) -> None:
+        cache_key = compute_query_cache_key(
+            pdf_sha256=pdf_sha256,
+            prompt_sha=prompt_sha,
+            extraction_model=extraction_model,
+            embedding_model=embedding_model,
+            dimensions=dimensions,
+        )
+        embedding_blob = encode_vector(embedding)
+        now = _utc_now_iso()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO query_embedding_cache (
+                    cache_key,
+                    pdf_sha256,
+                    extraction_model,
+                    embedding_model,
+                    flattened_text,
+                    embedding,
+                    size_bytes,
+                    created_at,
+                    last_accessed_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    flattened_text = excluded.flattened_text,
+                    embedding = excluded.embedding,
+                    size_bytes = excluded.size_bytes,
+                    last_accessed_at = excluded.last_accessed_at
+                """,
+                (
+                    cache_key,
+                    pdf_sha256,
+                    extraction_model,
+                    embedding_model,
+                    flattened_text,
+                    embedding_blob,
+                    len(flattened_text.encode("utf-8")) + len(embedding_blob),
+                    now,
+                    now,
+                ),
+            )
+            self._evict_to_max_bytes(conn)
+            conn.commit()
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+import openai
+
+from flow.services.shared_budget import PRIORITY_BATCH, SharedTokenBudget
+
+
+T = TypeVar("T")
+
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 500_000
+_POLL_INTERVAL_SECONDS = 0.05
+
+
+def estimate_text_tokens(text: str) -> int:
+    # OpenAI tokenizers average roughly four characters per token for English text.
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _retry_after_seconds(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+    return None
+
+
+def _is_rate_limit_error(exc: BaseException) -> bool:
+    return isinstance(exc, openai.RateLimitError)
+
+
+def _is_retryable_error(exc: BaseException) -> bool:
+    return isinstance(
+        exc,
+        (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.InternalServerError,
+        ),
+    )
+
+
+def _usage_total_tokens(result: Any) -> int | None:
+    usage = getattr(result, "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    if isinstance(total_tokens, int) and not isinstance(total_tokens, bool):
+        return total_tokens
+    return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        if per_minute <= 0:
+            raise ValueError("per_minute must be greater than 0.")
+        self.capacity = float(per_minute)
+        self.refill_per_second = float(per_minute) / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+    def seconds_until_available(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    def credit(self, amount: float) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        latency_target_seconds: float = 30.0,
+        decrease_factor: float = 0.5,
+        max_retries: int = 6,
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        shared_budget: SharedTokenBudget | None = None,
+        priority: int = PRIORITY_BATCH,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError(
+                "Concurrency bounds must satisfy 1 <= min <= initial <= max."
+            )
+        if not 0.0 < decrease_factor < 1.0:
+            raise ValueError("decrease_factor must be between 0 and 1.")
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0.")
+
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.shared_budget = shared_budget
+        self.priority = priority
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._request_bucket = TokenBucket(requests_per_minute, clock=clock)
+        self._token_bucket = TokenBucket(tokens_per_minute, clock=clock)
+        self._concurrency = float(initial_concurrency)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease_at = float("-inf")
+        self.rate_limited_count = 0
+        self.retry_count = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        with self._lock:
+            return int(self._concurrency)
+
+    def _reserve_local(self, estimated_tokens: int) -> float:
+        # Takes a slot and the local budget in one step; the shared budget is asked afterwards,
+        # outside the lock, because its SQLite transaction can wait up to its busy timeout.
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._in_flight >= int(self._concurrency):
+                return _POLL_INTERVAL_SECONDS
+            wait_seconds = max(
+                self._request_bucket.seconds_until_available(1),
+                self._token_bucket.seconds_until_available(estimated_tokens),
+            )
+            if wait_seconds > 0:
+                return wait_seconds
+            self._request_bucket.consume(1)
+            self._token_bucket.consume(estimated_tokens)
+            self._in_flight += 1
+            return 0.0
+
+    def _cancel_local(self, estimated_tokens: int) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._request_bucket.credit(1)
+            self._token_bucket.credit(estimated_tokens)
+
+    def _try_shared_budget(self, estimated_tokens: int, waiter_id: str) -> float:
+        return self.shared_budget.try_acquire(
+            tokens=estimated_tokens,
+            priority=self.priority,
+            waiter_id=waiter_id,
+        )
+
+    def _try_acquire(self, estimated_tokens: int, waiter_id: str) -> float:
+        wait_seconds = self._reserve_local(estimated_tokens)
+        if wait_seconds > 0 or self.shared_budget is None:
+            return wait_seconds
+        try:
+            wait_seconds = self._try_shared_budget(estimated_tokens, waiter_id)
+        except BaseException:
+            self._cancel_local(estimated_tokens)
+            raise
+        if wait_seconds > 0:
+            self._cancel_local(estimated_tokens)
+        return wait_seconds
+
+    async def _try_acquire_async(self, estimated_tokens: int, waiter_id: str) -> float:
+        # Same as _try_acquire, with the blocking shared-budget call kept off the event loop.
+        wait_seconds = self._reserve_local(estimated_tokens)
+        if wait_seconds > 0 or self.shared_budget is None:
+            return wait_seconds
+        try:
+            wait_seconds = await asyncio.to_thread(self._try_shared_budget, estimated_tokens, waiter_id)
+        except BaseException:
+            self._cancel_local(estimated_tokens)
+            raise
+        if wait_seconds > 0:
+            self._cancel_local(estimated_tokens)
+        return wait_seconds
+
+    def _decrease(self, now: float) -> None:
+        # Concurrent failures from the same overload window count as one congestion signal.
+        if now - self._last_decrease_at < 1.0:
+            return
+        self._concurrency = max(float(self.min_concurrency), self._concurrency * self.decrease_factor)
+        self._last_decrease_at = now
+
+    def _new_waiter_id(self) -> str:
+        return self.shared_budget.new_waiter_id() if self.shared_budget is not None else ""
+
+    def _abandon_wait(self, waiter_id: str) -> None:
+        if self.shared_budget is not None:
+            self.shared_budget.release_waiter(waiter_id)
+
+    def _release_success(self, *, latency_seconds: float, estimated_tokens: int, actual_tokens: int | None) -> None:
+        if self.shared_budget is not None and actual_tokens is not None:
+            self.shared_budget.adjust_tokens(estimated_tokens - actual_tokens)
+        with self._lock:
+            self._in_flight -= 1
+            if actual_tokens is not None and actual_tokens < estimated_tokens:
+                self._token_bucket.credit(estimated_tokens - actual_tokens)
+            elif actual_tokens is not None and actual_tokens > estimated_tokens:
+                self._token_bucket.consume(actual_tokens - estimated_tokens)
+
+            if latency_seconds > self.latency_target_seconds:
+                self._decrease(self._clock())
+            else:
+                # Additive increase: roughly +1 slot once a full window of requests succeeds.
+                self._concurrency = min(
+                    float(self.max_concurrency),
+                    self._concurrency + 1.0 / max(self._concurrency, 1.0),
+                )
+
+    def _release_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            now = self._clock()
+            if _is_rate_limit_error(exc):
+                self.rate_limited_count += 1
+                self._decrease(now)
+                retry_after = _retry_after_seconds(exc)
+                if retry_after is not None:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif _is_retryable_error(exc):
+                self._decrease(now)
+
+    def _backoff_seconds(self, attempt: int, exc: BaseException) -> float:
+        ceiling = min(self.max_backoff_seconds, self.base_backoff_seconds * (2**attempt))
+        delay = random.uniform(0.0, ceiling)
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(self, fn: Callable[[], T], *, estimated_tokens: int = 1) -> T:
+        attempt = 0
+        waiter_id = self._new_waiter_id()
+        while True:
+            try:
+                while (wait_seconds := self._try_acquire(estimated_tokens, waiter_id)) > 0:
+                    time.sleep(min(wait_seconds, 1.0))
+            except BaseException:
+                self._abandon_wait(waiter_id)
+                raise
+
+            started_at = self._clock()
+            try:
+                result = fn()
+            except Exception as exc:
+                self._release_failure(exc)
+                if not _is_retryable_error(exc) or attempt >= self.max_retries:
+                    raise
+                self.retry_count += 1
+                time.sleep(self._backoff_seconds(attempt, exc))
+                attempt += 1
+                continue
+
+            self._release_success(
+                latency_seconds=self._clock() - started_at,
+                estimated_tokens=estimated_tokens,
+                actual_tokens=_usage_total_tokens(result),
+            )
+            return result
+
+    async def call_async(
+        self, fn: Callable[[], Awaitable[T]], *, estimated_tokens: int = 1
+    ) -> T:
+        attempt = 0
+        waiter_id = self._new_waiter_id()
+        while True:
+            try:
+                while (wait_seconds := await self._try_acquire_async(estimated_tokens, waiter_id)) > 0:
+                    await asyncio.sleep(min(wait_seconds, 1.0))
+            except BaseException:
+                self._abandon_wait(waiter_id)
+                raise
+
+            started_at = self._clock()
+            try:
+                result = await fn()
+            except Exception as exc:
+                self._release_failure(exc)
+                if not _is_retryable_error(exc) or attempt >= self.max_retries:
+                    raise
+                self.retry_count += 1
+                await asyncio.sleep(self._backoff_seconds(attempt, exc))
+                attempt += 1
+                continue
+
+            self._release_success(
+                latency_seconds=self._clock() - started_at,
+                estimated_tokens=estimated_tokens,
+                actual_tokens=_usage_total_tokens(result),
+            )
+            return result
+
+
+_SHARED_LIMITERS: dict[tuple[Any, ...], AdaptiveRateLimiter] = {}
+_SHARED_LIMITERS_LOCK = threading.Lock()
+
+
+def _limiter_kwarg_key(value: Any) -> Any:
+    # Flows open a fresh SharedTokenBudget per call; the same SQLite file and name is one budget.
+    if isinstance(value, SharedTokenBudget):
+        return ("shared_budget", str(value.db_path), value.name, value.request_rate, value.token_rate)
+    return value
+
+
+def get_shared_rate_limiter(model: str, **limiter_kwargs: Any) -> AdaptiveRateLimiter:
+    # OpenAI budgets are enforced per model, so callers for the same model share one limiter.
+    # Callers asking for different settings (budget, priority, RPM/TPM) get their own limiter
+    # rather than silently receiving one configured by someone else.
+    cache_key = (
+        model,
+        *sorted((name, _limiter_kwarg_key(value)) for name, value in limiter_kwargs.items()),
+    )
+    with _SHARED_LIMITERS_LOCK:
+        limiter = _SHARED_LIMITERS.get(cache_key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(**limiter_kwargs)
+            _SHARED_LIMITERS[cache_key] = limiter
+        return limiter
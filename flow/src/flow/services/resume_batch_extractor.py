@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from openai import OpenAI
+
+from flow.services.extraction_cache import ResumeExtractionCache
+from flow.services.extraction_cascade import ModelCascade, profile_sanity_failures
+from flow.services.pdf_file_store import PdfFileStore
+from flow.services.pdf_text_layer import usable_text_layer_or_none
+from flow.services.resume_extractor import (
+    build_extraction_input,
+    get_cached_profile,
+    parse_resume_profile_text,
+    read_pdf_bytes,
+    require_openai_api_key,
+)
+
+
+BATCH_ENDPOINT = "/v1/responses"
+BATCH_COMPLETION_WINDOW = "24h"
+# OpenAI caps batch input files at 50,000 requests and 200 MB; stay under the byte limit.
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_FILE_BYTES = 190 * 1024 * 1024
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _new_outcome(source_pdf: Path | str) -> dict[str, Any]:
+    return {
+        "source_pdf": str(source_pdf),
+        "profile": None,
+        "success": False,
+        "error_message": None,
+        "cache_hit": None,
+        "text_layer_used": None,
+        "model": None,
+    }
+
+
+def _build_batch_request_line(
+    custom_id: str,
+    *,
+    model: str,
+    filename: str,
+    pdf_bytes: bytes,
+    file_id: str | None = None,
+    pdf_text: str | None = None,
+) -> str:
+    payload = {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "input": build_extraction_input(
+                filename=filename, pdf_bytes=pdf_bytes, file_id=file_id, pdf_text=pdf_text
+            ),
+        },
+    }
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _extract_response_body_text(body: dict[str, Any]) -> str:
+    output_text = body.get("output_text")
+    if isinstance(output_text, str) and output_text.strip():
+        return output_text
+
+    chunks: list[str] = []
+    output = body.get("output")
+    if isinstance(output, list):
+        for item in output:
+            content = item.get("content") if isinstance(item, dict) else None
+            if not isinstance(content, list):
+                continue
+            for entry in content:
+                text_value = entry.get("text") if isinstance(entry, dict) else None
+                if isinstance(text_value, str) and text_value.strip():
+                    chunks.append(text_value)
+    if chunks:
+        return "\n".join(chunks)
+
+    raise ValueError("Batch response body did not include parseable text content.")
+
+
+def write_batch_request_files(
+    pending_requests: Iterable[tuple[str, str]],
+    *,
+    work_dir: Path,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_file_bytes: int = MAX_BATCH_FILE_BYTES,
+) -> list[Path]:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    request_paths: list[Path] = []
+    file_obj = None
+    request_count = 0
+    file_bytes = 0
+    try:
+        for _, request_line in pending_requests:
+            line_bytes = len(request_line.encode("utf-8")) + 1
+            if file_obj is None or request_count >= max_requests or (
+                request_count > 0 and file_bytes + line_bytes > max_file_bytes
+            ):
+                if file_obj is not None:
+                    file_obj.close()
+                request_path = work_dir / f"resume_batch_requests_{len(request_paths):04d}.jsonl"
+                request_paths.append(request_path)
+                file_obj = request_path.open("w", encoding="utf-8")
+                request_count = 0
+                file_bytes = 0
+            file_obj.write(request_line)
+            file_obj.write("\n")
+            request_count += 1
+            file_bytes += line_bytes
+    finally:
+        if file_obj is not None:
+            file_obj.close()
+    return request_paths
+
+
+def submit_batch_request_file(client: Any, request_path: Path) -> str:
+    with request_path.open("rb") as file_obj:
+        uploaded = client.files.create(file=file_obj, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+        metadata={"source": "resume_extraction_batch_flow"},
+    )
+    return batch.id
+
+
+def _iter_file_lines(client: Any, file_id: str) -> Iterator[str]:
+    with client.files.with_streaming_response.content(file_id) as response:
+        for line in response.iter_lines():
+            if line.strip():
+                yield line
+
+
+def _outcome_from_result_line(
+    result: dict[str, Any],
+    *,
+    source_pdf: str,
+) -> dict[str, Any]:
+    outcome = _new_outcome(source_pdf)
+    try:
+        error = result.get("error")
+        response = result.get("response") or {}
+        status_code = response.get("status_code")
+        if error or status_code != 200:
+            message = error.get("message") if isinstance(error, dict) else None
+            if message is None:
+                body_error = (response.get("body") or {}).get("error")
+                message = body_error.get("message") if isinstance(body_error, dict) else None
+            raise RuntimeError(f"Batch request failed (status={status_code}): {message or 'unknown error'}")
+
+        outcome["profile"] = parse_resume_profile_text(
+            _extract_response_body_text(response.get("body") or {})
+        )
+        outcome["success"] = True
+    except Exception as exc:  # noqa: BLE001
+        outcome["error_message"] = f"{type(exc).__name__}: {exc}"
+    return outcome
+
+
+def iter_resume_extraction_batch_outcomes(
+    pdf_paths: list[str | Path],
+    *,
+    model: str = "gpt-5.1",
+    work_dir: Path,
+    client: Any | None = None,
+    cache: ResumeExtractionCache | None = None,
+    prompt_sha: str | None = None,
+    file_store: PdfFileStore | None = None,
+    prefer_text_layer: bool = False,
+    poll_interval_seconds: float = 30.0,
+    timeout_seconds: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[dict[str, Any]]:
+    if client is None and file_store is not None:
+        client = OpenAI(api_key=require_openai_api_key())
+    pending: dict[str, tuple[str, dict[str, str], bool]] = {}
+    immediate_outcomes: list[dict[str, Any]] = []
+
+    def _iter_request_lines() -> Iterator[tuple[str, str]]:
+        for position, pdf_path in enumerate(pdf_paths):
+            outcome = _new_outcome(Path(pdf_path).expanduser().resolve())
+            try:
+                source_path, pdf_bytes = read_pdf_bytes(pdf_path)
+                cached_profile, cache_identity = get_cached_profile(
+                    cache, pdf_bytes=pdf_bytes, prompt_sha=prompt_sha, model=model
+                )
+            except Exception as exc:  # noqa: BLE001
+                outcome["error_message"] = f"{type(exc).__name__}: {exc}"
+                immediate_outcomes.append(outcome)
+                continue
+
+            if cached_profile is not None:
+                outcome.update(profile=cached_profile, success=True, cache_hit=True, model=model)
+                immediate_outcomes.append(outcome)
+                continue
+
+            pdf_text = usable_text_layer_or_none(pdf_bytes) if prefer_text_layer else None
+            file_id = None
+            if file_store is not None and pdf_text is None:
+                try:
+                    file_id = file_store.get_or_upload(
+                        client, pdf_bytes=pdf_bytes, filename=source_path.name
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    outcome["error_message"] = f"{type(exc).__name__}: {exc}"
+                    immediate_outcomes.append(outcome)
+                    continue
+
+            custom_id = f"resume-{position:06d}"
+            pending[custom_id] = (str(source_path), cache_identity, pdf_text is not None)
+            yield custom_id, _build_batch_request_line(
+                custom_id,
+                model=model,
+                filename=source_path.name,
+                pdf_bytes=pdf_bytes,
+                file_id=file_id,
+                pdf_text=pdf_text,
+            )
+
+    request_paths = write_batch_request_files(_iter_request_lines(), work_dir=work_dir)
+    yield from immediate_outcomes
+    if not request_paths:
+        return
+
+    if client is None:
+        client = OpenAI(api_key=require_openai_api_key())
+    open_batch_ids = [submit_batch_request_file(client, path) for path in request_paths]
+
+    started_at = time.monotonic()
+    while open_batch_ids:
+        still_open: list[str] = []
+        for batch_id in open_batch_ids:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status not in TERMINAL_BATCH_STATUSES:
+                still_open.append(batch_id)
+                continue
+
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                for line in _iter_file_lines(client, file_id):
+                    result = json.loads(line)
+                    custom_id = result.get("custom_id")
+                    if custom_id not in pending:
+                        continue
+                    source_pdf, cache_identity, text_layer_used = pending.pop(custom_id)
+                    outcome = _outcome_from_result_line(result, source_pdf=source_pdf)
+                    outcome["text_layer_used"] = text_layer_used
+                    if outcome["success"]:
+                        outcome["model"] = model
+                    if cache is not None:
+                        outcome["cache_hit"] = False
+                        if outcome["success"]:
+                            cache.put(**cache_identity, profile=outcome["profile"])
+                    yield outcome
+
+        open_batch_ids = still_open
+        if not open_batch_ids:
+            break
+        if timeout_seconds is not None and time.monotonic() - started_at > timeout_seconds:
+            raise TimeoutError(f"Batch jobs did not finish within {timeout_seconds}s: {open_batch_ids}")
+        sleep(poll_interval_seconds)
+
+    for custom_id, (source_pdf, _, _) in pending.items():
+        outcome = _new_outcome(source_pdf)
+        outcome["error_message"] = f"RuntimeError: Batch output had no result for {custom_id}."
+        if cache is not None:
+            outcome["cache_hit"] = False
+        yield outcome
+
+
+def iter_cascaded_batch_outcomes(
+    pdf_paths: list[str | Path],
+    *,
+    cascade: ModelCascade,
+    work_dir: Path,
+    **batch_kwargs: Any,
+) -> Iterator[dict[str, Any]]:
+    # Each tier is one round of Batch API jobs; only rejected PDFs go to the next round.
+    remaining = list(pdf_paths)
+    for position, tier_model in enumerate(cascade.models):
+        is_last_tier = position == len(cascade.models) - 1
+        escalated: list[str] = []
+        for outcome in iter_resume_extraction_batch_outcomes(
+            remaining,
+            model=tier_model,
+            work_dir=work_dir / f"tier_{position}",
+            **batch_kwargs,
+        ):
+            accepted = outcome["success"] and not profile_sanity_failures(outcome["profile"])
+            if not outcome["cache_hit"]:
+                # Batch turnaround is queue time, so only hit rates are recorded here.
+                cascade.record(tier_model, accepted=accepted)
+            if accepted or is_last_tier:
+                yield outcome
+            else:
+                escalated.append(outcome["source_pdf"])
+        if not escalated:
+            return
+        remaining = escalated
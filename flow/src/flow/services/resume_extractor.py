@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import hashlib
 import json
 import os
 import subprocess
+import time
 from importlib.resources import files
 from pathlib import Path
 from typing import Any
 
-from openai import OpenAI
+import openai
+from openai import AsyncOpenAI, OpenAI
 
 from flow.schemas.resume_profile import ResumeProfile
+from flow.services.extraction_cache import ResumeExtractionCache
+from flow.services.extraction_cascade import ModelCascade, profile_sanity_failures
+from flow.services.pdf_file_store import PdfFileStore, is_missing_file_error
+from flow.services.pdf_text_layer import usable_text_layer_or_none
+from flow.services.rate_limiter import (
+    AdaptiveRateLimiter,
+    estimate_text_tokens,
+    get_shared_rate_limiter,
+)
+
+
+# Rough allowance for a LinkedIn export's page text + images; reconciled against usage.
+PDF_TOKEN_ESTIMATE = 6000
 
 
 def _load_resume_prompt() -> str:
@@ -93,11 +110,7 @@ def _extract_response_text(response: Any) -> str:
     raise ValueError("OpenAI response did not include parseable text content.")
 
 
-def extract_resume_profile_from_pdf(pdf_path: str | Path, model: str = "gpt-5.1") -> dict[str, Any]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise EnvironmentError("OPENAI_API_KEY is not set.")
-
+def read_pdf_bytes(pdf_path: str | Path) -> tuple[Path, bytes]:
     source_path = Path(pdf_path).expanduser().resolve()
     if not source_path.exists():
         raise FileNotFoundError(f"PDF file not found: {source_path}")
@@ -107,32 +120,67 @@ def extract_resume_profile_from_pdf(pdf_path: str | Path, model: str = "gpt-5.1"
     pdf_bytes = source_path.read_bytes()
     if not pdf_bytes:
         raise ValueError(f"PDF file is empty: {source_path}")
+    return source_path, pdf_bytes
+
+
+def resolve_prompt_cache_sha(prompt_sha: str | None = None) -> str:
+    resolved = prompt_sha if prompt_sha is not None else get_resume_parser_prompt_sha()
+    if resolved != "unknown":
+        return resolved
+    # Outside a git checkout the blob sha is unavailable; key on the prompt text instead.
+    prompt_digest = hashlib.sha256(_load_resume_prompt().encode("utf-8")).hexdigest()
+    return f"text:{prompt_digest}"
+
+
+def build_extraction_input(
+    *,
+    filename: str,
+    pdf_bytes: bytes,
+    file_id: str | None = None,
+    pdf_text: str | None = None,
+) -> list[dict[str, Any]]:
+    instruction = "Parse this resume PDF and return strict JSON only."
+    if pdf_text is not None:
+        instruction = (
+            "Parse this resume and return strict JSON only. The text below was extracted "
+            "from the PDF's text layer: the left column (contact, LinkedIn URL, Top Skills, "
+            "Languages) comes first, followed by the main column."
+        )
+        document_content: dict[str, Any] = {"type": "input_text", "text": pdf_text}
+    elif file_id is not None:
+        document_content = {"type": "input_file", "file_id": file_id}
+    else:
+        encoded_pdf = base64.b64encode(pdf_bytes).decode("ascii")
+        document_content = {
+            "type": "input_file",
+            "filename": filename,
+            "file_data": f"data:application/pdf;base64,{encoded_pdf}",
+        }
+    return [
+        {
+            "role": "system",
+            "content": [{"type": "input_text", "text": _load_resume_prompt()}],
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": instruction},
+                document_content,
+            ],
+        },
+    ]
+
+
+def _estimate_extraction_tokens(pdf_text: str | None = None) -> int:
+    document_tokens = PDF_TOKEN_ESTIMATE if pdf_text is None else estimate_text_tokens(pdf_text)
+    return estimate_text_tokens(_load_resume_prompt()) + document_tokens
 
-    client = OpenAI(api_key=api_key)
-    encoded_pdf = base64.b64encode(pdf_bytes).decode("ascii")
-
-    response = client.responses.create(
-        model=model,
-        input=[
-            {
-                "role": "system",
-                "content": [{"type": "input_text", "text": _load_resume_prompt()}],
-            },
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": "Parse this resume PDF and return strict JSON only."},
-                    {
-                        "type": "input_file",
-                        "filename": source_path.name,
-                        "file_data": f"data:application/pdf;base64,{encoded_pdf}",
-                    },
-                ],
-            },
-        ],
-    )
 
-    response_text = _extract_response_text(response)
+def parse_resume_profile_response(response: Any) -> dict[str, Any]:
+    return parse_resume_profile_text(_extract_response_text(response))
+
+
+def parse_resume_profile_text(response_text: str) -> dict[str, Any]:
     try:
         parsed = json.loads(response_text)
     except json.JSONDecodeError as exc:
@@ -143,3 +191,293 @@ def extract_resume_profile_from_pdf(pdf_path: str | Path, model: str = "gpt-5.1"
 
     validated = ResumeProfile.model_validate(parsed)
     return validated.model_dump(mode="json")
+
+
+def require_openai_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OPENAI_API_KEY is not set.")
+    return api_key
+
+
+def get_cached_profile(
+    cache: ResumeExtractionCache | None,
+    *,
+    pdf_bytes: bytes,
+    prompt_sha: str | None,
+    model: str,
+) -> tuple[dict[str, Any] | None, dict[str, str]]:
+    if cache is None:
+        return None, {}
+    cache_identity = {
+        "pdf_sha256": hashlib.sha256(pdf_bytes).hexdigest(),
+        "prompt_sha": resolve_prompt_cache_sha(prompt_sha),
+        "model": model,
+    }
+    return cache.get(**cache_identity), cache_identity
+
+
+def _create_extraction_response(
+    client: OpenAI,
+    limiter: AdaptiveRateLimiter,
+    *,
+    model: str,
+    source_path: Path,
+    pdf_bytes: bytes,
+    file_store: PdfFileStore | None,
+    pdf_text: str | None = None,
+) -> Any:
+    def _create(file_id: str | None) -> Any:
+        extraction_input = build_extraction_input(
+            filename=source_path.name, pdf_bytes=pdf_bytes, file_id=file_id, pdf_text=pdf_text
+        )
+        return limiter.call(
+            lambda: client.responses.create(model=model, input=extraction_input),
+            estimated_tokens=_estimate_extraction_tokens(pdf_text),
+        )
+
+    if file_store is None or pdf_text is not None:
+        return _create(None)
+
+    file_id = file_store.get_or_upload(client, pdf_bytes=pdf_bytes, filename=source_path.name)
+    try:
+        return _create(file_id)
+    except openai.APIStatusError as exc:
+        if not is_missing_file_error(exc, file_id):
+            raise
+    # The recorded upload was deleted or expired upstream; upload it again once.
+    file_store.forget(hashlib.sha256(pdf_bytes).hexdigest())
+    return _create(file_store.get_or_upload(client, pdf_bytes=pdf_bytes, filename=source_path.name))
+
+
+async def _create_extraction_response_async(
+    client: AsyncOpenAI,
+    limiter: AdaptiveRateLimiter,
+    *,
+    model: str,
+    source_path: Path,
+    pdf_bytes: bytes,
+    file_store: PdfFileStore | None,
+    pdf_text: str | None = None,
+) -> Any:
+    async def _create(file_id: str | None) -> Any:
+        extraction_input = build_extraction_input(
+            filename=source_path.name, pdf_bytes=pdf_bytes, file_id=file_id, pdf_text=pdf_text
+        )
+        return await limiter.call_async(
+            lambda: client.responses.create(model=model, input=extraction_input),
+            estimated_tokens=_estimate_extraction_tokens(pdf_text),
+        )
+
+    if file_store is None or pdf_text is not None:
+        return await _create(None)
+
+    file_id = await file_store.get_or_upload_async(
+        client, pdf_bytes=pdf_bytes, filename=source_path.name
+    )
+    try:
+        return await _create(file_id)
+    except openai.APIStatusError as exc:
+        if not is_missing_file_error(exc, file_id):
+            raise
+    file_store.forget(hashlib.sha256(pdf_bytes).hexdigest())
+    return await _create(
+        await file_store.get_or_upload_async(client, pdf_bytes=pdf_bytes, filename=source_path.name)
+    )
+
+
+def _get_cascade_cached_profile(
+    cache: ResumeExtractionCache | None,
+    *,
+    pdf_bytes: bytes,
+    prompt_sha: str | None,
+    models: list[str],
+) -> tuple[dict[str, Any] | None, str | None, dict[str, dict[str, str]]]:
+    cache_identities: dict[str, dict[str, str]] = {}
+    for position, tier_model in enumerate(models):
+        cached_profile, cache_identities[tier_model] = get_cached_profile(
+            cache, pdf_bytes=pdf_bytes, prompt_sha=prompt_sha, model=tier_model
+        )
+        # A cheaper tier's cached profile only counts if it would have been accepted.
+        if cached_profile is not None and (
+            position == len(models) - 1 or not profile_sanity_failures(cached_profile)
+        ):
+            return cached_profile, tier_model, cache_identities
+    return None, None, cache_identities
+
+
+def extract_resume_profile_from_pdf(
+    pdf_path: str | Path,
+    model: str = "gpt-5.1",
+    *,
+    cache: ResumeExtractionCache | None = None,
+    prompt_sha: str | None = None,
+    rate_limiter: AdaptiveRateLimiter | None = None,
+    file_store: PdfFileStore | None = None,
+    prefer_text_layer: bool = False,
+    cascade: ModelCascade | None = None,
+) -> dict[str, Any]:
+    source_path, pdf_bytes = read_pdf_bytes(pdf_path)
+    models = cascade.models if cascade is not None else [model]
+    cached_profile, _, cache_identities = _get_cascade_cached_profile(
+        cache, pdf_bytes=pdf_bytes, prompt_sha=prompt_sha, models=models
+    )
+    if cached_profile is not None:
+        return cached_profile
+
+    # Retries are owned by the rate limiter so it can observe and adapt to 429s.
+    client = OpenAI(api_key=require_openai_api_key(), max_retries=0)
+    pdf_text = usable_text_layer_or_none(pdf_bytes) if prefer_text_layer else None
+    for position, tier_model in enumerate(models):
+        is_last_tier = position == len(models) - 1
+        if cascade is not None:
+            limiter = cascade.limiter_for(tier_model)
+        else:
+            limiter = rate_limiter or get_shared_rate_limiter(model)
+        started_at = time.monotonic()
+        try:
+            response = _create_extraction_response(
+                client,
+                limiter,
+                model=tier_model,
+                source_path=source_path,
+                pdf_bytes=pdf_bytes,
+                file_store=file_store,
+                pdf_text=pdf_text,
+            )
+            profile = parse_resume_profile_response(response)
+        except Exception:
+            if cascade is not None:
+                cascade.record(tier_model, accepted=False, latency_seconds=time.monotonic() - started_at)
+            if is_last_tier:
+                raise
+            continue
+
+        accepted = cascade is None or not profile_sanity_failures(profile)
+        if cascade is not None:
+            cascade.record(tier_model, accepted=accepted, latency_seconds=time.monotonic() - started_at)
+        if accepted or is_last_tier:
+            if cache is not None:
+                cache.put(**cache_identities[tier_model], profile=profile)
+            return profile
+    raise AssertionError("unreachable: the last cascade tier always returns or raises")
+
+
+async def _extract_resume_profile_outcome_async(
+    pdf_path: str | Path,
+    *,
+    client: AsyncOpenAI,
+    model: str,
+    semaphore: asyncio.Semaphore,
+    cache: ResumeExtractionCache | None,
+    prompt_sha: str | None,
+    rate_limiter: AdaptiveRateLimiter,
+    file_store: PdfFileStore | None,
+    prefer_text_layer: bool,
+    cascade: ModelCascade | None = None,
+) -> dict[str, Any]:
+    outcome: dict[str, Any] = {
+        "source_pdf": str(Path(pdf_path).expanduser().resolve()),
+        "profile": None,
+        "success": False,
+        "error_message": None,
+        "cache_hit": None,
+        "text_layer_used": None,
+        "model": None,
+    }
+    models = cascade.models if cascade is not None else [model]
+    try:
+        # Disk and SQLite I/O go to worker threads so thousands of queued paths do not stall
+        # the in-flight HTTP calls on the event loop.
+        source_path, pdf_bytes = await asyncio.to_thread(read_pdf_bytes, pdf_path)
+        cached_profile, cached_model, cache_identities = await asyncio.to_thread(
+            _get_cascade_cached_profile, cache, pdf_bytes=pdf_bytes, prompt_sha=prompt_sha, models=models
+        )
+        if cache is not None:
+            outcome["cache_hit"] = cached_profile is not None
+        if cached_profile is not None:
+            outcome.update(profile=cached_profile, success=True, model=cached_model)
+            return outcome
+
+        pdf_text = None
+        if prefer_text_layer:
+            pdf_text = await asyncio.to_thread(usable_text_layer_or_none, pdf_bytes)
+        outcome["text_layer_used"] = pdf_text is not None
+        for position, tier_model in enumerate(models):
+            is_last_tier = position == len(models) - 1
+            limiter = cascade.limiter_for(tier_model) if cascade is not None else rate_limiter
+            async with semaphore:
+                started_at = time.monotonic()
+                try:
+                    response = await _create_extraction_response_async(
+                        client,
+                        limiter,
+                        model=tier_model,
+                        source_path=source_path,
+                        pdf_bytes=pdf_bytes,
+                        file_store=file_store,
+                        pdf_text=pdf_text,
+                    )
+                    profile = parse_resume_profile_response(response)
+                except Exception:
+                    if cascade is not None:
+                        cascade.record(
+                            tier_model, accepted=False, latency_seconds=time.monotonic() - started_at
+                        )
+                    if is_last_tier:
+                        raise
+                    continue
+                latency_seconds = time.monotonic() - started_at
+
+            accepted = cascade is None or not profile_sanity_failures(profile)
+            if cascade is not None:
+                cascade.record(tier_model, accepted=accepted, latency_seconds=latency_seconds)
+            if accepted or is_last_tier:
+                if cache is not None:
+                    await asyncio.to_thread(cache.put, **cache_identities[tier_model], profile=profile)
+                outcome.update(profile=profile, success=True, model=tier_model)
+                break
+    except Exception as exc:  # noqa: BLE001
+        outcome["error_message"] = f"{type(exc).__name__}: {exc}"
+    return outcome
+
+
+async def extract_resume_profiles_async(
+    pdf_paths: list[str | Path],
+    *,
+    model: str = "gpt-5.1",
+    max_in_flight: int = 8,
+    cache: ResumeExtractionCache | None = None,
+    prompt_sha: str | None = None,
+    rate_limiter: AdaptiveRateLimiter | None = None,
+    file_store: PdfFileStore | None = None,
+    prefer_text_layer: bool = False,
+    cascade: ModelCascade | None = None,
+) -> list[dict[str, Any]]:
+    if max_in_flight <= 0:
+        raise ValueError("max_in_flight must be greater than 0.")
+    if not pdf_paths:
+        return []
+
+    limiter = rate_limiter or get_shared_rate_limiter(model)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    async with AsyncOpenAI(api_key=require_openai_api_key(), max_retries=0) as client:
+        return list(
+            await asyncio.gather(
+                *(
+                    _extract_resume_profile_outcome_async(
+                        pdf_path,
+                        client=client,
+                        model=model,
+                        semaphore=semaphore,
+                        cache=cache,
+                        prompt_sha=prompt_sha,
+                        rate_limiter=limiter,
+                        file_store=file_store,
+                        prefer_text_layer=prefer_text_layer,
+                        cascade=cascade,
+                    )
+                    for pdf_path in pdf_paths
+                )
+            )
+        )
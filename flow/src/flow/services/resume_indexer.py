@@ -1,13 +1,50 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import os
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-
-from openai import OpenAI
+from typing import Any, Callable, Iterable, Iterator
+
+from openai import AsyncOpenAI
+
+from flow.services.backfill_checkpoint import BackfillCheckpoint
+from flow.services.embedding_cache import EmbeddingCache, compute_text_sha256
+from flow.services.faiss_index_registry import (
+    fetch_current_registered_index,
+    fetch_registered_faiss_index,
+    promote_faiss_index,
+    register_faiss_index,
+)
+from flow.services.faiss_index_builder import (
+    DEFAULT_INDEX_FACTORY,
+    DEFAULT_METRIC,
+    DEFAULT_TRAIN_SAMPLE_SIZE,
+    StreamingIndexBuilder,
+    read_index_metadata,
+    supported_search_parameters,
+    supports_vector_removal,
+    validate_metric,
+    write_index_metadata,
+)
+from flow.services.rate_limiter import (
+    AdaptiveRateLimiter,
+    estimate_text_tokens,
+    get_shared_rate_limiter,
+)
+
+
+DEFAULT_EMBEDDING_MAX_IN_FLIGHT = 4
+# Rows read, flattened and embedded per step of a streaming backfill; bounds peak memory.
+DEFAULT_BACKFILL_PAGE_SIZE = 1000
+# OpenAI embedding limits: 8,191 tokens per input and 300,000 tokens per request.
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+EMBEDDING_MAX_REQUEST_TOKENS = 300_000
+# Truncation assumes denser text than estimate_text_tokens so the real count stays under the limit.
+_TRUNCATION_CHARS_PER_TOKEN = 3
 
 
 def _utc_now_iso() -> str:
@@ -60,6 +97,13 @@ def _coerce_string_list(value: Any) -> list[str]:
     return values
 
 
+def _require_openai_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OPENAI_API_KEY is not set.")
+    return api_key
+
+
 def flatten_resume_profile(profile: dict[str, Any]) -> str:
     lines: list[str] = []
     personal_info = profile.get("personal_information")
@@ -168,36 +212,136 @@ def build_flattened_text_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]
     return flattened_rows
 
 
+def truncate_embedding_text(text: str, *, max_tokens: int = EMBEDDING_MAX_INPUT_TOKENS) -> str:
+    max_chars = max_tokens * _TRUNCATION_CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    # Keep the head of the profile (name, headline, skills, latest roles) and cut on a line break.
+    cut = text.rfind("\n", 0, max_chars + 1)
+    return text[: cut if cut > 0 else max_chars]
+
+
+def pack_embedding_batches(
+    texts: list[str],
+    *,
+    max_batch_inputs: int,
+    max_batch_tokens: int = EMBEDDING_MAX_REQUEST_TOKENS,
+) -> list[list[int]]:
+    # Greedily packs input positions into requests bounded by input count and estimated tokens.
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for position, text in enumerate(texts):
+        tokens = estimate_text_tokens(text)
+        if current and (len(current) >= max_batch_inputs or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(position)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _embed_batches_async(
+    batches: list[list[str]],
+    *,
+    model: str,
+    limiter: AdaptiveRateLimiter,
+    max_in_flight: int,
+    on_batch: Callable[[int, list[list[float]]], None],
+    dimensions: int | None = None,
+) -> None:
+    semaphore = asyncio.Semaphore(max_in_flight)
+    # text-embedding-3 models truncate and renormalize server side when dimensions is set.
+    request_options = {"dimensions": dimensions} if dimensions else {}
+    # Retries are owned by the rate limiter so it can observe and adapt to 429s.
+    async with AsyncOpenAI(api_key=_require_openai_api_key(), max_retries=0) as client:
+
+        async def embed(batch_index: int, batch: list[str]) -> None:
+            async with semaphore:
+                response = await limiter.call_async(
+                    lambda: client.embeddings.create(model=model, input=batch, **request_options),
+                    estimated_tokens=sum(estimate_text_tokens(text) for text in batch),
+                )
+            response_data = sorted(response.data, key=lambda item: item.index)
+            if len(response_data) != len(batch):
+                raise ValueError("Embedding count did not match flattened row count.")
+            on_batch(batch_index, [item.embedding for item in response_data])
+
+        await asyncio.gather(*(embed(batch_index, batch) for batch_index, batch in enumerate(batches)))
+
+
 def generate_embeddings(
     *,
     flattened_rows: list[dict[str, Any]],
     model: str,
     batch_size: int,
+    rate_limiter: AdaptiveRateLimiter | None = None,
+    cache: EmbeddingCache | None = None,
+    max_in_flight: int = DEFAULT_EMBEDDING_MAX_IN_FLIGHT,
+    max_batch_tokens: int = EMBEDDING_MAX_REQUEST_TOKENS,
+    dimensions: int | None = None,
 ) -> list[list[float]]:
     if batch_size <= 0:
         raise ValueError("batch_size must be greater than 0.")
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise EnvironmentError("OPENAI_API_KEY is not set.")
+    if max_in_flight <= 0:
+        raise ValueError("max_in_flight must be greater than 0.")
+    if dimensions is not None and dimensions < 0:
+        raise ValueError("dimensions must not be negative.")
 
     texts = [row["flattened_text"] for row in flattened_rows]
-    client = OpenAI(api_key=api_key)
-    embeddings: list[list[float]] = []
-
-    for index in range(0, len(texts), batch_size):
-        batch = texts[index : index + batch_size]
-        response = client.embeddings.create(model=model, input=batch)
-        response_data = sorted(response.data, key=lambda item: item.index)
-        embeddings.extend(item.embedding for item in response_data)
-
-    if len(embeddings) != len(flattened_rows):
-        raise ValueError("Embedding count did not match flattened row count.")
+    embeddings: list[list[float] | None] = [None] * len(texts)
+    text_hashes: list[str] = []
+    if cache is not None:
+        text_hashes = [compute_text_sha256(text) for text in texts]
+        cached = cache.get_many(text_hashes, model=model, dimensions=dimensions)
+        embeddings = [cached.get(text_hash) for text_hash in text_hashes]
+    miss_positions = [position for position, embedding in enumerate(embeddings) if embedding is None]
+    if not miss_positions:
+        return embeddings
+
+    miss_texts = [truncate_embedding_text(texts[position]) for position in miss_positions]
+    batch_positions = [
+        [miss_positions[offset] for offset in batch]
+        for batch in pack_embedding_batches(
+            miss_texts, max_batch_inputs=batch_size, max_batch_tokens=max_batch_tokens
+        )
+    ]
+    truncated_by_position = dict(zip(miss_positions, miss_texts))
+
+    def store_batch(batch_index: int, vectors: list[list[float]]) -> None:
+        positions = batch_positions[batch_index]
+        for position, vector in zip(positions, vectors):
+            embeddings[position] = vector
+        if cache is not None:
+            # Store per batch so an interrupted backfill keeps what it already paid for.
+            cache.put_many(
+                [(text_hashes[position], embeddings[position]) for position in positions],
+                model=model,
+                dimensions=dimensions,
+            )
 
+    asyncio.run(
+        _embed_batches_async(
+            [[truncated_by_position[position] for position in positions] for positions in batch_positions],
+            model=model,
+            limiter=rate_limiter or get_shared_rate_limiter(model),
+            max_in_flight=max_in_flight,
+            on_batch=store_batch,
+            dimensions=dimensions,
+        )
+    )
     return embeddings
 
 
-def write_shared_faiss_index(embeddings: list[list[float]], index_dir: Path) -> Path:
+def write_shared_faiss_index(
+    embeddings: list[list[float]],
+    index_dir: Path,
+    *,
+    row_ids: list[int] | None = None,
+) -> Path:
     if not embeddings:
         raise ValueError("No embeddings provided; cannot build FAISS index.")
 
@@ -211,6 +355,8 @@ def write_shared_faiss_index(embeddings: list[list[float]], index_dir: Path) ->
                 f"Embedding at position {idx} has dimension {len(embedding)}; "
                 f"expected {vector_size}."
             )
+    if row_ids is not None and len(row_ids) != len(embeddings):
+        raise ValueError("row_ids must have one id per embedding.")
 
     try:
         import faiss
@@ -224,35 +370,502 @@ def write_shared_faiss_index(embeddings: list[list[float]], index_dir: Path) ->
     except ImportError as exc:
         raise ImportError("numpy is required to build FAISS indexes.") from exc
 
-    index_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    index_path = index_dir / f"resume_profiles_{timestamp}.faiss"
-
     vectors = np.array(embeddings, dtype="float32")
-    index = faiss.IndexFlatL2(vector_size)
-    index.add(vectors)
-    faiss.write_index(index, str(index_path))
-    return index_path
+    if row_ids is None:
+        index = faiss.IndexFlatL2(vector_size)
+        index.add(vectors)
+    else:
+        # FAISS ids are resume_profiles.id, so neighbors resolve without positional mapping.
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(vector_size))
+        index.add_with_ids(vectors, np.array(row_ids, dtype="int64"))
+    return _save_new_faiss_index(index, index_dir)
+
+
+def _ensure_faiss_tracking_columns(db_path: Path) -> None:
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        existing_columns = {
+            row[1] for row in conn.execute("PRAGMA table_info(resume_profiles)").fetchall()
+        }
+        if "faiss_indexed_at" not in existing_columns:
+            conn.execute("ALTER TABLE resume_profiles ADD COLUMN faiss_indexed_at TEXT")
+        conn.commit()
 
 
 def update_rows_faiss_index_path(db_path: Path, row_ids: list[int], index_path: Path) -> int:
     if not row_ids:
         return 0
 
+    _ensure_faiss_tracking_columns(db_path)
     now = _utc_now_iso()
     with sqlite3.connect(db_path, timeout=30.0) as conn:
         conn.executemany(
             """
             UPDATE resume_profiles
-            SET faiss_index_path = ?, updated_at = ?
+            SET faiss_index_path = ?, faiss_indexed_at = ?, updated_at = ?
             WHERE id = ?
             """,
-            [(str(index_path), now, row_id) for row_id in row_ids],
+            [(str(index_path), now, now, row_id) for row_id in row_ids],
         )
         conn.commit()
     return len(row_ids)
 
 
+def _repoint_rows_faiss_index_path(db_path: Path, from_path: Path, to_path: Path) -> None:
+    # Rows carried over unchanged into a rebuilt file keep their faiss_indexed_at.
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        conn.execute(
+            "UPDATE resume_profiles SET faiss_index_path = ? WHERE faiss_index_path = ?",
+            (str(to_path), str(from_path)),
+        )
+        conn.commit()
+
+
+def fetch_current_faiss_index_path(db_path: Path) -> Path | None:
+    current = fetch_current_registered_index(db_path)
+    if current is not None:
+        return Path(current["path"])
+    # DBs from before the registry: the file most recently written to the row pointers.
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT faiss_index_path
+            FROM resume_profiles
+            WHERE faiss_index_path IS NOT NULL
+            GROUP BY faiss_index_path
+            ORDER BY MAX(updated_at) DESC
+            LIMIT 1
+            """
+        ).fetchone()
+    return Path(row[0]) if row else None
+
+
+# Rows that need an embedding in incremental mode: never indexed, indexed into another
+# file, or re-extracted since they were indexed.
+_INCREMENTAL_PENDING_SQL = """
+    (
+        faiss_index_path IS NULL
+        OR faiss_index_path != ?
+        OR (faiss_indexed_at IS NOT NULL AND updated_at > faiss_indexed_at)
+    )
+"""
+
+
+def iter_profile_row_pages(
+    db_path: Path,
+    *,
+    where_sql: str = "",
+    params: tuple[Any, ...] = (),
+    page_size: int = DEFAULT_BACKFILL_PAGE_SIZE,
+    after_id: int | None = None,
+) -> Iterator[list[dict[str, Any]]]:
+    if page_size <= 0:
+        raise ValueError("page_size must be greater than 0.")
+
+    # Keyset pagination: each page is a short query, so no cursor stays open across API calls.
+    last_id = -(2**63) if after_id is None else after_id
+    filter_sql = f"AND {where_sql}" if where_sql else ""
+    while True:
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, pdf_stem, profile_json
+                FROM resume_profiles
+                WHERE id > ? {filter_sql}
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (last_id, *params, page_size),
+            ).fetchall()
+        if not rows:
+            return
+        yield [{"id": row[0], "pdf_stem": row[1], "profile_json": row[2]} for row in rows]
+        last_id = rows[-1][0]
+
+
+def _fetch_indexed_row_ids(db_path: Path, index_path: Path) -> list[int]:
+    with sqlite3.connect(db_path) as conn:
+        return [
+            int(row[0])
+            for row in conn.execute(
+                "SELECT id FROM resume_profiles WHERE faiss_index_path = ? ORDER BY id ASC",
+                (str(index_path),),
+            ).fetchall()
+        ]
+
+
+def _fetch_existing_row_ids(db_path: Path, row_ids: list[int]) -> set[int]:
+    existing: set[int] = set()
+    with sqlite3.connect(db_path) as conn:
+        for start in range(0, len(row_ids), 500):
+            chunk = row_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            existing.update(
+                int(row[0])
+                for row in conn.execute(
+                    f"SELECT id FROM resume_profiles WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+            )
+    return existing
+
+
+def _stream_rows_into_index(
+    db_path: Path,
+    builder: StreamingIndexBuilder,
+    *,
+    where_sql: str,
+    params: tuple[Any, ...],
+    page_size: int,
+    model: str,
+    batch_size: int,
+    rate_limiter: AdaptiveRateLimiter | None,
+    embedding_cache: EmbeddingCache | None,
+    max_in_flight: int,
+    replace_existing: bool = False,
+    checkpoint: BackfillCheckpoint | None = None,
+    dimensions: int | None = None,
+) -> tuple[list[int], int]:
+    import numpy as np
+
+    row_ids: list[int] = []
+    resumed_chunk_count = 0
+    pages: Iterable[list[dict[str, Any]]] = iter_profile_row_pages(
+        db_path, where_sql=where_sql, params=params, page_size=page_size
+    )
+    if checkpoint is not None and checkpoint.load():
+        # Rows re-extracted while the run was down are embedded again before continuing.
+        changed_filter = "id <= ? AND updated_at > ?" + (f" AND {where_sql}" if where_sql else "")
+        changed_params = (checkpoint.last_id, checkpoint.started_at, *params)
+        with sqlite3.connect(db_path, timeout=30.0) as conn:
+            changed_ids = {
+                int(row[0])
+                for row in conn.execute(
+                    f"SELECT id FROM resume_profiles WHERE {changed_filter}", changed_params
+                ).fetchall()
+            }
+        # Replay committed chunks from disk instead of paying for those embeddings again. Rows
+        # changed or deleted since are dropped here rather than removed later, so a resume never
+        # needs remove_ids (which HNSW and RFlat indexes lack).
+        for ids, vectors in checkpoint.committed_chunks():
+            resumed_chunk_count += 1
+            existing_ids = _fetch_existing_row_ids(db_path, ids.tolist())
+            keep = np.array(
+                [int(row_id) in existing_ids and int(row_id) not in changed_ids for row_id in ids],
+                dtype=bool,
+            )
+            if not keep.any():
+                continue
+            builder.add(ids[keep], vectors[keep], replace_existing=replace_existing)
+            row_ids.extend(ids[keep].tolist())
+        pages = itertools.chain(
+            iter_profile_row_pages(
+                db_path,
+                where_sql=changed_filter,
+                params=changed_params,
+                page_size=page_size,
+            ),
+            iter_profile_row_pages(
+                db_path,
+                where_sql=where_sql,
+                params=params,
+                page_size=page_size,
+                after_id=checkpoint.last_id,
+            ),
+        )
+
+    # Only one page of text and vectors is alive at a time (plus the training sample, if any).
+    for page in pages:
+        flattened_rows = build_flattened_text_rows(page)
+        vectors = np.array(
+            generate_embeddings(
+                flattened_rows=flattened_rows,
+                model=model,
+                batch_size=batch_size,
+                rate_limiter=rate_limiter,
+                cache=embedding_cache,
+                max_in_flight=max_in_flight,
+                dimensions=dimensions,
+            ),
+            dtype="float32",
+        )
+        page_ids = np.array([int(row["id"]) for row in flattened_rows], dtype="int64")
+        builder.add(page_ids, vectors, replace_existing=replace_existing)
+        row_ids.extend(page_ids.tolist())
+        if checkpoint is not None:
+            checkpoint.commit_chunk(page_ids, vectors, last_id=int(page_ids[-1]))
+
+    return list(dict.fromkeys(row_ids)), resumed_chunk_count
+
+
+def _open_checkpoint(
+    checkpoint_dir: Path | None,
+    *,
+    mode: str,
+    model: str,
+    db_path: Path,
+    index_path: Path | None = None,
+    index_factory: str = DEFAULT_INDEX_FACTORY,
+    metric: str = DEFAULT_METRIC,
+    dimensions: int | None = None,
+) -> BackfillCheckpoint | None:
+    if checkpoint_dir is None:
+        return None
+    # A checkpoint only resumes the same kind of run; anything else starts over.
+    run_key = {
+        "mode": mode,
+        "model": model,
+        "db_path": str(db_path),
+        "index_path": str(index_path) if index_path else None,
+        "index_factory": index_factory,
+        "metric": metric,
+        "dimensions": dimensions,
+    }
+    return BackfillCheckpoint(checkpoint_dir, run_key=run_key)
+
+
+def _write_faiss_index_atomic(index: Any, index_path: Path) -> None:
+    import faiss
+
+    temp_path = index_path.with_name(f".{index_path.name}.tmp")
+    faiss.write_index(index, str(temp_path))
+    os.replace(temp_path, index_path)
+
+
+def _save_new_faiss_index(index: Any, index_dir: Path, metadata: dict[str, Any] | None = None) -> Path:
+    index_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    index_path = index_dir / f"resume_profiles_{timestamp}.faiss"
+    # Never overwrite an existing (possibly current) index built within the same second.
+    for suffix in itertools.count(1):
+        if not index_path.exists():
+            break
+        index_path = index_dir / f"resume_profiles_{timestamp}_{suffix}.faiss"
+    _write_faiss_index_atomic(index, index_path)
+    if metadata is not None:
+        write_index_metadata(index_path, {**metadata, "ntotal": int(index.ntotal)})
+    return index_path
+
+
+def _as_row_id_index(index: Any, indexed_ids: list[int], index_path: Path) -> Any:
+    import faiss
+    import numpy as np
+
+    if isinstance(index, faiss.IndexIDMap):
+        return index
+    # Legacy index: position i is the i-th row ORDER BY id. Re-key its stored vectors by row id.
+    if index.ntotal != len(indexed_ids):
+        raise ValueError(
+            f"{index_path} holds {index.ntotal} vectors but {len(indexed_ids)} rows reference it; "
+            "positions cannot be mapped to rows. Rebuild with mode='full'."
+        )
+    id_index = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+    if index.ntotal:
+        id_index.add_with_ids(index.reconstruct_n(0, index.ntotal), np.array(indexed_ids, dtype="int64"))
+    return id_index
+
+
+def append_to_current_faiss_index(
+    *,
+    db_path: Path,
+    index_dir: Path,
+    model: str,
+    batch_size: int,
+    rate_limiter: AdaptiveRateLimiter | None = None,
+    embedding_cache: EmbeddingCache | None = None,
+    max_in_flight: int = DEFAULT_EMBEDDING_MAX_IN_FLIGHT,
+    page_size: int = DEFAULT_BACKFILL_PAGE_SIZE,
+    checkpoint_dir: Path | None = None,
+    index_factory: str = DEFAULT_INDEX_FACTORY,
+    metric: str = DEFAULT_METRIC,
+    dimensions: int | None = None,
+    train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE,
+    search_params: dict[str, int] | None = None,
+) -> dict[str, Any]:
+    index_path = fetch_current_faiss_index_path(db_path)
+    if index_path is None or not index_path.exists():
+        # Nothing to append to yet: build the first shared index from every row.
+        summary = backfill_missing_faiss_indexes(
+            db_path=db_path,
+            index_dir=index_dir,
+            model=model,
+            batch_size=batch_size,
+            mode="full",
+            rate_limiter=rate_limiter,
+            embedding_cache=embedding_cache,
+            max_in_flight=max_in_flight,
+            page_size=page_size,
+            checkpoint_dir=checkpoint_dir,
+            index_factory=index_factory,
+            metric=metric,
+            dimensions=dimensions,
+            train_sample_size=train_sample_size,
+            search_params=search_params,
+        )
+        return {**summary, "mode": "incremental", "removed_count": 0}
+
+    try:
+        import faiss
+        import numpy as np
+    except ImportError as exc:
+        raise ImportError(
+            "faiss and numpy are required for incremental backfill. Install `faiss-cpu`."
+        ) from exc
+
+    _ensure_faiss_tracking_columns(db_path)
+    metadata = read_index_metadata(index_path)
+    if metadata.get("model", model) != model:
+        raise ValueError(
+            f"{index_path} was built with {metadata['model']!r}; cannot append {model!r} embeddings."
+        )
+    index_metric = metadata.get("metric", DEFAULT_METRIC)
+    if index_metric != validate_metric(metric):
+        raise ValueError(
+            f"{index_path} uses the {index_metric!r} metric; cannot append with {metric!r}. "
+            "Rebuild with mode='full' to change metrics."
+        )
+    index_dimensions = metadata.get("embedding_dimensions")
+    if index_dimensions != (dimensions or None):
+        raise ValueError(
+            f"{index_path} holds {index_dimensions or 'native'}-dimension embeddings; "
+            f"cannot append {dimensions or 'native'}-dimension embeddings."
+        )
+    indexed_ids = _fetch_indexed_row_ids(db_path, index_path)
+    loaded_index = faiss.read_index(str(index_path))
+    builder = StreamingIndexBuilder(
+        metadata.get("index_factory", DEFAULT_INDEX_FACTORY),
+        metric=index_metric,
+        index=_as_row_id_index(loaded_index, indexed_ids, index_path),
+    )
+    # Rows deleted from SQLite (or re-pointed elsewhere) leave orphaned vectors behind.
+    orphaned_ids = builder.indexed_ids - set(indexed_ids)
+    # Pure appends work on any index; replacing or dropping vectors needs remove_ids. Check
+    # that up front so an HNSW/RFlat index fails before any embedding is paid for.
+    if not supports_vector_removal(builder.index):
+        with sqlite3.connect(db_path, timeout=30.0) as conn:
+            pending_ids = {
+                int(row[0])
+                for row in conn.execute(
+                    f"SELECT id FROM resume_profiles WHERE {_INCREMENTAL_PENDING_SQL}",
+                    (str(index_path),),
+                ).fetchall()
+            }
+        replaced_ids = pending_ids & builder.indexed_ids
+        if orphaned_ids or replaced_ids:
+            raise ValueError(
+                f"Incremental mode is unsupported for index factory {builder.index_factory!r} when "
+                f"vectors must be replaced or removed ({len(replaced_ids)} changed, "
+                f"{len(orphaned_ids)} deleted rows); rebuild with mode='full'."
+            )
+    if orphaned_ids:
+        builder.remove(np.array(sorted(orphaned_ids), dtype="int64"))
+
+    checkpoint = _open_checkpoint(
+        checkpoint_dir,
+        mode="incremental",
+        model=model,
+        db_path=db_path,
+        index_path=index_path,
+        index_factory=builder.index_factory,
+        metric=builder.metric,
+        dimensions=index_dimensions,
+    )
+    pending_ids, resumed_chunk_count = _stream_rows_into_index(
+        db_path,
+        builder,
+        where_sql=_INCREMENTAL_PENDING_SQL,
+        params=(str(index_path),),
+        page_size=page_size,
+        model=model,
+        batch_size=batch_size,
+        rate_limiter=rate_limiter,
+        embedding_cache=embedding_cache,
+        max_in_flight=max_in_flight,
+        replace_existing=True,
+        checkpoint=checkpoint,
+        dimensions=index_dimensions,
+    )
+    index = builder.finish()
+    summary: dict[str, Any] = {
+        "mode": "incremental",
+        "selected_count": len(pending_ids),
+        "pending_count": len(pending_ids),
+        "processed_count": 0,
+        "removed_count": len(orphaned_ids),
+        "resumed_chunk_count": resumed_chunk_count,
+        "index_path": str(index_path),
+        "indexed_row_ids": pending_ids,
+    }
+    if not pending_ids and not orphaned_ids and index is loaded_index:
+        return summary
+
+    # Publish a new versioned file with its sidecar, like a full build, so a reader that
+    # reloads the current index never sees the vectors without the matching metadata.
+    appended_index_path = _save_new_faiss_index(
+        index,
+        index_dir,
+        {
+            "index_factory": DEFAULT_INDEX_FACTORY,
+            "metric": DEFAULT_METRIC,
+            "embedding_dimensions": None,
+            "search_params": {},
+            **metadata,
+            "model": model,
+            "dimension": int(index.d),
+            "created_at": _utc_now_iso(),
+        },
+    )
+    _repoint_rows_faiss_index_path(db_path, index_path, appended_index_path)
+    summary["processed_count"] = update_rows_faiss_index_path(db_path, pending_ids, appended_index_path)
+    summary["index_path"] = str(appended_index_path)
+    register_faiss_index(db_path, appended_index_path, read_index_metadata(appended_index_path))
+    promote_faiss_index(db_path, appended_index_path)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return summary
+
+
+def remove_rows_from_faiss_index(db_path: Path, index_path: Path, row_ids: list[int]) -> int:
+    if not row_ids:
+        return 0
+
+    try:
+        import faiss
+        import numpy as np
+    except ImportError as exc:
+        raise ImportError(
+            "faiss and numpy are required to edit FAISS indexes. Install `faiss-cpu`."
+        ) from exc
+
+    index = faiss.read_index(str(index_path))
+    if not isinstance(index, faiss.IndexIDMap):
+        raise ValueError(
+            f"{index_path} is a positional index; run the backfill with mode='incremental' "
+            "once to key it by row id."
+        )
+    try:
+        removed_count = int(index.remove_ids(np.array(row_ids, dtype="int64")))
+    except RuntimeError as exc:
+        raise ValueError(f"{index_path} does not support removing vectors; rebuild it.") from exc
+    _write_faiss_index_atomic(index, index_path)
+    metadata = {**read_index_metadata(index_path), "ntotal": int(index.ntotal)}
+    if len(metadata) > 1:
+        write_index_metadata(index_path, metadata)
+    if fetch_registered_faiss_index(db_path, index_path) is not None:
+        register_faiss_index(db_path, index_path, metadata)
+
+    _ensure_faiss_tracking_columns(db_path)
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        conn.executemany(
+            """
+            UPDATE resume_profiles
+            SET faiss_index_path = NULL, faiss_indexed_at = NULL
+            WHERE id = ? AND faiss_index_path = ?
+            """,
+            [(row_id, str(index_path)) for row_id in row_ids],
+        )
+        conn.commit()
+    return removed_count
+
+
 def backfill_missing_faiss_indexes(
     *,
     db_path: Path,
@@ -260,33 +873,115 @@ def backfill_missing_faiss_indexes(
     model: str,
     batch_size: int,
     mode: str = "full",
+    rate_limiter: AdaptiveRateLimiter | None = None,
+    embedding_cache: EmbeddingCache | None = None,
+    max_in_flight: int = DEFAULT_EMBEDDING_MAX_IN_FLIGHT,
+    page_size: int = DEFAULT_BACKFILL_PAGE_SIZE,
+    checkpoint_dir: Path | None = None,
+    index_factory: str = DEFAULT_INDEX_FACTORY,
+    metric: str = DEFAULT_METRIC,
+    dimensions: int | None = None,
+    train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE,
+    search_params: dict[str, int] | None = None,
 ) -> dict[str, Any]:
-    selected_rows = fetch_rows_for_faiss_backfill(db_path, mode=mode)
     normalized_mode = mode.strip().lower()
-    if not selected_rows:
+    if normalized_mode == "incremental":
+        return append_to_current_faiss_index(
+            db_path=db_path,
+            index_dir=index_dir,
+            model=model,
+            batch_size=batch_size,
+            rate_limiter=rate_limiter,
+            embedding_cache=embedding_cache,
+            max_in_flight=max_in_flight,
+            page_size=page_size,
+            checkpoint_dir=checkpoint_dir,
+            index_factory=index_factory,
+            metric=metric,
+            dimensions=dimensions,
+            train_sample_size=train_sample_size,
+            search_params=search_params,
+        )
+
+    if normalized_mode not in {"full", "missing"}:
+        raise ValueError("mode must be one of 'full', 'missing' or 'incremental'.")
+
+    try:
+        import faiss  # noqa: F401
+        import numpy  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(
+            "faiss and numpy are required to build FAISS indexes. Install `faiss-cpu`."
+        ) from exc
+
+    metric = validate_metric(metric)
+    dimensions = dimensions or None
+    checkpoint = _open_checkpoint(
+        checkpoint_dir,
+        mode=normalized_mode,
+        model=model,
+        db_path=db_path,
+        index_factory=index_factory,
+        metric=metric,
+        dimensions=dimensions,
+    )
+    builder = StreamingIndexBuilder(index_factory, metric=metric, train_sample_size=train_sample_size)
+    row_ids, resumed_chunk_count = _stream_rows_into_index(
+        db_path,
+        builder,
+        where_sql="faiss_index_path IS NULL" if normalized_mode == "missing" else "",
+        params=(),
+        page_size=page_size,
+        model=model,
+        batch_size=batch_size,
+        rate_limiter=rate_limiter,
+        embedding_cache=embedding_cache,
+        max_in_flight=max_in_flight,
+        checkpoint=checkpoint,
+        dimensions=dimensions,
+    )
+    if not row_ids:
+        if checkpoint is not None:
+            checkpoint.clear()
         return {
             "mode": normalized_mode,
             "selected_count": 0,
             "pending_count": 0,
             "processed_count": 0,
+            "resumed_chunk_count": resumed_chunk_count,
             "index_path": None,
             "indexed_row_ids": [],
         }
 
-    flattened_rows = build_flattened_text_rows(selected_rows)
-    embeddings = generate_embeddings(
-        flattened_rows=flattened_rows,
-        model=model,
-        batch_size=batch_size,
+    index = builder.finish()
+    index_path = _save_new_faiss_index(
+        index,
+        index_dir,
+        {
+            "index_factory": index_factory,
+            "metric": metric,
+            "model": model,
+            # None means the model's native size; dimension is what the index accepts.
+            "embedding_dimensions": dimensions,
+            "dimension": int(index.d),
+            "search_params": supported_search_parameters(index, search_params or {}),
+            "created_at": _utc_now_iso(),
+        },
     )
-    index_path = write_shared_faiss_index(embeddings, index_dir)
-    row_ids = [int(row["id"]) for row in flattened_rows]
+    # SQLite points at the index only once it is complete; the checkpoint goes last.
     processed_count = update_rows_faiss_index_path(db_path, row_ids, index_path)
+    register_faiss_index(db_path, index_path, read_index_metadata(index_path))
+    # A missing-mode index only covers rows that had none, so it is registered but never current.
+    if normalized_mode == "full":
+        promote_faiss_index(db_path, index_path)
+    if checkpoint is not None:
+        checkpoint.clear()
     return {
         "mode": normalized_mode,
-        "selected_count": len(selected_rows),
-        "pending_count": len(selected_rows),
+        "selected_count": len(row_ids),
+        "pending_count": len(row_ids),
         "processed_count": processed_count,
+        "resumed_chunk_count": resumed_chunk_count,
         "index_path": str(index_path),
         "indexed_row_ids": row_ids,
     }
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def ensure_resume_profiles_table(db_path: Path) -> None:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resume_profiles (
+                id INTEGER PRIMARY KEY,
+                pdf_stem TEXT NOT NULL UNIQUE,
+                source_pdf TEXT NOT NULL,
+                full_name TEXT,
+                profile_json TEXT NOT NULL,
+                prompt_version_sha TEXT NOT NULL,
+                faiss_index_path TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        existing_columns = {
+            row[1] for row in conn.execute("PRAGMA table_info(resume_profiles)").fetchall()
+        }
+        if "faiss_index_path" not in existing_columns:
+            conn.execute("ALTER TABLE resume_profiles ADD COLUMN faiss_index_path TEXT")
+        conn.commit()
+
+
+def get_full_name(profile: dict[str, Any]) -> str | None:
+    personal_info = profile.get("personal_information")
+    if not isinstance(personal_info, dict):
+        return None
+    full_name = personal_info.get("full_name")
+    if isinstance(full_name, str) and full_name.strip():
+        return full_name
+    return None
+
+
+def upsert_resume_profile_rows(
+    db_path: Path,
+    rows: list[dict[str, Any]],
+    *,
+    now: str | None = None,
+) -> None:
+    # Each row has pdf_stem, source_pdf, profile and prompt_version_sha. A source that
+    # yields no name (e.g. a sparse DOM payload) keeps the name another source stored.
+    timestamp = now or _utc_now_iso()
+    with sqlite3.connect(db_path, timeout=30.0) as conn:
+        conn.executemany(
+            """
+            INSERT INTO resume_profiles (
+                pdf_stem,
+                source_pdf,
+                full_name,
+                profile_json,
+                prompt_version_sha,
+                created_at,
+                updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(pdf_stem) DO UPDATE SET
+                source_pdf = excluded.source_pdf,
+                full_name = COALESCE(excluded.full_name, resume_profiles.full_name),
+                profile_json = excluded.profile_json,
+                prompt_version_sha = excluded.prompt_version_sha,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (
+                    row["pdf_stem"],
+                    str(row["source_pdf"]),
+                    get_full_name(row["profile"]),
+                    json.dumps(row["profile"], ensure_ascii=False),
+                    row["prompt_version_sha"],
+                    timestamp,
+                    timestamp,
+                )
+                for row in rows
+            ],
+        )
+        conn.commit()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class SharedTokenBudget:
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        burst_seconds: float = 60.0,
+        waiter_ttl_seconds: float = 15.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("requests_per_minute and tokens_per_minute must be greater than 0.")
+        if not 0 < burst_seconds <= 60.0:
+            raise ValueError("burst_seconds must be in (0, 60].")
+
+        self.db_path = Path(db_path)
+        self.name = name
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.request_capacity = self.request_rate * burst_seconds
+        self.token_capacity = self.token_rate * burst_seconds
+        self.waiter_ttl_seconds = waiter_ttl_seconds
+        self._clock = clock
+        self._ensure_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so BEGIN IMMEDIATE controls the cross-process write lock.
+        return sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+
+    def _ensure_tables(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS budget_buckets (
+                    name TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS budget_waiters (
+                    waiter_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    heartbeat_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO budget_buckets (name, requests, tokens, updated_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (self.name, self.request_capacity, self.token_capacity, self._clock()),
+            )
+        finally:
+            conn.close()
+
+    def new_waiter_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def _refilled_levels(self, conn: sqlite3.Connection, now: float) -> tuple[float, float]:
+        requests, tokens, updated_at = conn.execute(
+            "SELECT requests, tokens, updated_at FROM budget_buckets WHERE name = ?",
+            (self.name,),
+        ).fetchone()
+        elapsed = max(0.0, now - updated_at)
+        requests = min(self.request_capacity, requests + elapsed * self.request_rate)
+        tokens = min(self.token_capacity, tokens + elapsed * self.token_rate)
+        return requests, tokens
+
+    def try_acquire(self, *, tokens: int, priority: int, waiter_id: str) -> float:
+        tokens = min(float(tokens), self.token_capacity)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = self._clock()
+            conn.execute(
+                "DELETE FROM budget_waiters WHERE heartbeat_at < ?",
+                (now - self.waiter_ttl_seconds,),
+            )
+            outranked = conn.execute(
+                """
+                SELECT 1 FROM budget_waiters
+                WHERE name = ? AND priority < ? AND waiter_id != ?
+                LIMIT 1
+                """,
+                (self.name, priority, waiter_id),
+            ).fetchone()
+            available_requests, available_tokens = self._refilled_levels(conn, now)
+            wait_seconds = max(
+                (1.0 - available_requests) / self.request_rate,
+                (tokens - available_tokens) / self.token_rate,
+                0.0,
+            )
+
+            if outranked is not None or wait_seconds > 0:
+                # Register as waiting so lower-priority callers yield to us.
+                conn.execute(
+                    """
+                    INSERT INTO budget_waiters (waiter_id, name, priority, heartbeat_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(waiter_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+                    """,
+                    (waiter_id, self.name, priority, now),
+                )
+                conn.execute("COMMIT")
+                return wait_seconds if wait_seconds > 0 else 0.05
+
+            conn.execute(
+                """
+                UPDATE budget_buckets
+                SET requests = ?, tokens = ?, updated_at = ?
+                WHERE name = ?
+                """,
+                (available_requests - 1.0, available_tokens - tokens, now, self.name),
+            )
+            conn.execute("DELETE FROM budget_waiters WHERE waiter_id = ?", (waiter_id,))
+            conn.execute("COMMIT")
+            return 0.0
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release_waiter(self, waiter_id: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM budget_waiters WHERE waiter_id = ?", (waiter_id,))
+        finally:
+            conn.close()
+
+    def adjust_tokens(self, delta: float) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = self._clock()
+            available_requests, available_tokens = self._refilled_levels(conn, now)
+            conn.execute(
+                """
+                UPDATE budget_buckets
+                SET requests = ?, tokens = ?, updated_at = ?
+                WHERE name = ?
+                """,
+                (
+                    available_requests,
+                    min(self.token_capacity, available_tokens + delta),
+                    now,
+                    self.name,
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(
+        self,
+        *,
+        tokens: int,
+        priority: int,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        waiter_id = self.new_waiter_id()
+        deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        try:
+            while (wait_seconds := self.try_acquire(tokens=tokens, priority=priority, waiter_id=waiter_id)) > 0:
+                if deadline is not None and time.monotonic() + wait_seconds > deadline:
+                    raise TimeoutError(f"Timed out waiting for shared budget '{self.name}'.")
+                time.sleep(min(wait_seconds, 1.0))
+        except BaseException:
+            self.release_waiter(waiter_id)
+            raise
+
+
+def open_shared_budget(
+    db_path: str | Path | None,
+    *,
+    name: str,
+    requests_per_minute: float,
+    tokens_per_minute: float,
+) -> SharedTokenBudget | None:
+    if not db_path:
+        return None
+    return SharedTokenBudget(
+        Path(db_path).expanduser().resolve(),
+        name=name,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+    )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+class SqliteLruCache:
+    # Shared base for SQLite caches keyed by cache_key with size_bytes and last_accessed_at
+    # columns: counts hits/misses and evicts least recently used rows above max_bytes.
+    table_name = ""
+
+    def __init__(self, db_path: Path, *, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0.")
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._ensure_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30.0)
+
+    def _ensure_table(self) -> None:
+        raise NotImplementedError
+
+    def _touch(self, conn: sqlite3.Connection, cache_key: str, accessed_at: str) -> None:
+        conn.execute(
+            f"UPDATE {self.table_name} SET last_accessed_at = ? WHERE cache_key = ?",
+            (accessed_at, cache_key),
+        )
+
+    def _evict_to_max_bytes(self, conn: sqlite3.Connection) -> int:
+        total_bytes = conn.execute(
+            f"SELECT COALESCE(SUM(size_bytes), 0) FROM {self.table_name}"
+        ).fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        rows = conn.execute(
+            f"""
+            SELECT cache_key, size_bytes
+            FROM {self.table_name}
+            ORDER BY last_accessed_at ASC
+            """
+        ).fetchall()
+        for cache_key, size_bytes in rows:
+            if total_bytes <= self.max_bytes:
+                break
+            conn.execute(f"DELETE FROM {self.table_name} WHERE cache_key = ?", (cache_key,))
+            total_bytes -= size_bytes
+            evicted += 1
+        return evicted
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            entry_count, total_bytes = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM {self.table_name}"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entry_count": int(entry_count),
+            "total_bytes": int(total_bytes),
+            "max_bytes": self.max_bytes,
+        }
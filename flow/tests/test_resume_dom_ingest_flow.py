@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import inspect
+import json
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from flow.pipelines.resume_dom_ingest_flow import (  # noqa: E402
+    ResumeDomIngestFlow,
+    ingest_linkedin_dom_payloads,
+)
+from flow.services.linkedin_dom_mapper import (  # noqa: E402
+    DOM_MAPPER_VERSION,
+    map_linkedin_dom_payload,
+)
+from flow.services.resume_profile_store import (  # noqa: E402
+    ensure_resume_profiles_table,
+    upsert_resume_profile_rows,
+)
+
+
+def _dom_payload(slug: str) -> dict[str, object]:
+    return {
+        "metadata": {
+            "sourceUrl": f"https://www.linkedin.com/in/{slug}/?trk=search",
+            "profileSlug": slug,
+            "extractedAt": "2026-02-23T07:17:59.000Z",
+            "extractorVersion": "0.1.0",
+        },
+        "sections": {
+            "About": [{"text": "Engineer."}],
+            "Experience": [
+                {
+                    "title": "Staff Engineer",
+                    "subtitle": "Example Corp · Full-time",
+                    "meta": "Jan 2022 - Present · 2 yrs 1 mo",
+                    "details": ["Seattle, Washington, United States · Hybrid", "Led the search platform."],
+                    "links": [],
+                },
+                {
+                    "title": "Other Inc",
+                    "subtitle": "Full-time · 4 yrs",
+                    "meta": "Remote",
+                    "details": [
+                        "Senior Engineer",
+                        "Senior Engineer",
+                        "Mar 2020 - Dec 2021 · 1 yr 10 mos",
+                        "Built billing.",
+                        "Engineer",
+                        "Full-time",
+                        "Jan 2018 - Mar 2020 · 2 yrs 3 mos",
+                    ],
+                    "links": [],
+                },
+                {
+                    "title": "Senior Engineer",
+                    "subtitle": "Full-time",
+                    "meta": "Mar 2020 - Dec 2021 · 1 yr 10 mos",
+                    "details": [],
+                    "links": [],
+                },
+            ],
+            "Education": [
+                {
+                    "title": "Example University",
+                    "subtitle": "Bachelor of Science - BS, Computer Science",
+                    "meta": "2014 - 2018",
+                    "details": [],
+                    "links": [],
+                }
+            ],
+            "Skills": [
+                {"skill": "Python", "context": []},
+                {"skill": "Python", "context": []},
+                {"skill": "Kafka", "context": ["Endorsed by 3 colleagues"]},
+            ],
+            "Languages": [
+                {"title": "English", "subtitle": "Native or bilingual proficiency", "meta": "", "details": []}
+            ],
+        },
+        "extractionWarnings": [],
+    }
+
+
+class LinkedinDomMapperTests(unittest.TestCase):
+    def test_map_linkedin_dom_payload_builds_resume_profile(self) -> None:
+        pdf_stem, profile = map_linkedin_dom_payload(_dom_payload("jane-doe"))
+
+        self.assertEqual(pdf_stem, "jane-doe")
+        self.assertEqual(
+            profile["personal_information"]["linkedin_url"],
+            "https://www.linkedin.com/in/jane-doe",
+        )
+        self.assertEqual(profile["skills"]["top_skills"], ["Python", "Kafka"])
+        self.assertEqual(profile["skills"]["languages"], ["English (Native or bilingual proficiency)"])
+        self.assertEqual(
+            [(role["company"], role["title"], role["start_date"], role["end_date"]) for role in profile["experience"]],
+            [
+                ("Example Corp", "Staff Engineer", "Jan 2022", "Present"),
+                ("Other Inc", "Senior Engineer", "Mar 2020", "Dec 2021"),
+                ("Other Inc", "Engineer", "Jan 2018", "Mar 2020"),
+            ],
+        )
+        self.assertEqual(profile["experience"][0]["location"], "Seattle, Washington, United States · Hybrid")
+        self.assertEqual(profile["experience"][0]["duration"], "2 yrs 1 mo")
+        self.assertEqual(profile["experience"][1]["description_bullets"], ["Built billing."])
+        self.assertEqual(
+            profile["education"],
+            [
+                {
+                    "institution": "Example University",
+                    "degree": "Bachelor of Science - BS",
+                    "field_of_study": "Computer Science",
+                    "start_year": "2014",
+                    "end_year": "2018",
+                }
+            ],
+        )
+
+    def test_map_linkedin_dom_payload_unwraps_message_and_rejects_failures(self) -> None:
+        pdf_stem, _ = map_linkedin_dom_payload({"ok": True, "data": _dom_payload("jane-doe")})
+        self.assertEqual(pdf_stem, "jane-doe")
+
+        with self.assertRaises(ValueError):
+            map_linkedin_dom_payload({"ok": False, "error": "Extraction error"})
+        with self.assertRaises(ValueError):
+            map_linkedin_dom_payload({"metadata": {"profileSlug": "unknown"}, "sections": {}})
+
+
+class ResumeDomIngestFlowTests(unittest.TestCase):
+    def test_ingest_upserts_json_and_jsonl_payloads_in_batches(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            input_root = root / "payloads"
+            input_root.mkdir()
+            (input_root / "jane-doe.json").write_text(json.dumps(_dom_payload("jane-doe")), encoding="utf-8")
+            (input_root / "bulk.jsonl").write_text(
+                "\n".join(
+                    [
+                        json.dumps(_dom_payload("john-roe")),
+                        "{not json",
+                        json.dumps({"ok": True, "data": _dom_payload("jane-doe")}),
+                    ]
+                )
+                + "\n",
+                encoding="utf-8",
+            )
+            db_path = root / "resume_profiles.db"
+
+            ingested_count, failures = ingest_linkedin_dom_payloads(
+                input_root=input_root, db_path=db_path, batch_size=2
+            )
+
+            with sqlite3.connect(db_path) as conn:
+                rows = conn.execute(
+                    "SELECT pdf_stem, source_pdf, prompt_version_sha, profile_json FROM resume_profiles ORDER BY pdf_stem"
+                ).fetchall()
+
+        self.assertEqual(ingested_count, 3)
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0]["source"].endswith("bulk.jsonl:2"))
+        self.assertEqual([row[0] for row in rows], ["jane-doe", "john-roe"])
+        self.assertTrue(rows[0][1].endswith("bulk.jsonl:3"))
+        self.assertEqual({row[2] for row in rows}, {DOM_MAPPER_VERSION})
+        self.assertEqual(json.loads(rows[1][3])["skills"]["top_skills"], ["Python", "Kafka"])
+
+    def test_ingest_keeps_full_name_stored_by_pdf_pipeline(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            input_root = root / "payloads"
+            input_root.mkdir()
+            (input_root / "jane-doe.json").write_text(json.dumps(_dom_payload("jane-doe")), encoding="utf-8")
+            db_path = root / "resume_profiles.db"
+            ensure_resume_profiles_table(db_path)
+            upsert_resume_profile_rows(
+                db_path,
+                [
+                    {
+                        "pdf_stem": "jane-doe",
+                        "source_pdf": "/tmp/jane-doe.pdf",
+                        "profile": {"personal_information": {"full_name": "Jane Doe"}},
+                        "prompt_version_sha": "sha-v1",
+                    }
+                ],
+            )
+
+            ingest_linkedin_dom_payloads(input_root=input_root, db_path=db_path)
+
+            with sqlite3.connect(db_path) as conn:
+                full_name, prompt_sha = conn.execute(
+                    "SELECT full_name, prompt_version_sha FROM resume_profiles WHERE pdf_stem = 'jane-doe'"
+                ).fetchone()
+
+        self.assertEqual(full_name, "Jane Doe")
+        self.assertEqual(prompt_sha, DOM_MAPPER_VERSION)
+
+    def test_flow_wires_ingest_service(self) -> None:
+        class_source = inspect.getsource(ResumeDomIngestFlow)
+        self.assertIn("ingest_linkedin_dom_payloads", class_source)
+
+
+if __name__ == "__main__":
+    unittest.main()
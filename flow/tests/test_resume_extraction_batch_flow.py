@@ -1,29 +1,62 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
 import inspect
 import json
 import sqlite3
 import sys
 import tempfile
+import threading
 import unittest
+from collections.abc import Iterator
 from pathlib import Path
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
+
+import openai
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
 from flow.pipelines.resume_extraction_batch_flow import (  # noqa: E402
     ResumeExtractionBatchFlow,
     _discover_top_level_pdfs,
-    _ensure_resume_profiles_table,
     _make_output_filename,
     _persist_resume_profile,
+    _shard_pdf_paths,
+    _summarize_cache_usage,
     _summarize_results,
     _upsert_resume_profile_row,
 )
 from flow.schemas.resume_profile import ResumeProfile  # noqa: E402
+from flow.services.extraction_cache import ResumeExtractionCache  # noqa: E402
+from flow.services.extraction_cascade import (  # noqa: E402
+    ModelCascade,
+    merge_cascade_stats,
+    profile_sanity_failures,
+)
+from flow.services.linkedin_pdf_parser import (  # noqa: E402
+    extract_resume_profile_locally,
+    extract_resume_profiles_locally,
+    parse_linkedin_profile_text,
+)
+from flow.services.pdf_file_store import PdfFileStore  # noqa: E402
+from flow.services.pdf_text_layer import (  # noqa: E402
+    extract_pdf_text_layer,
+    is_text_layer_usable,
+)
+from flow.services.resume_profile_store import ensure_resume_profiles_table  # noqa: E402
+from flow.services.rate_limiter import AdaptiveRateLimiter, TokenBucket, get_shared_rate_limiter  # noqa: E402
+from flow.services.shared_budget import PRIORITY_BATCH, PRIORITY_INTERACTIVE, open_shared_budget  # noqa: E402
+from flow.services.resume_batch_extractor import (  # noqa: E402
+    iter_cascaded_batch_outcomes,
+    iter_resume_extraction_batch_outcomes,
+    write_batch_request_files,
+)
 from flow.services.resume_extractor import (  # noqa: E402
     extract_resume_profile_from_pdf,
+    extract_resume_profiles_async,
     get_resume_parser_prompt_sha,
 )
 
@@ -62,6 +95,66 @@ _VALID_PROFILE = {
 }
 
 
+def _make_text_pdf(placements: list[tuple[float, float, str]]) -> bytes:
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    stream = "\n".join(
+        f"BT /F1 10 Tf 1 0 0 1 {x} {y} Tm ({escape(text)}) Tj ET" for x, y, text in placements
+    ).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    return bytes(pdf)
+
+
+def _linkedin_placements() -> list[tuple[float, float, str]]:
+    left_column = [
+        "Contact",
+        "www.linkedin.com/in/jane-doe (LinkedIn)",
+        "Top Skills",
+        "Python",
+        "Distributed Systems",
+        "Languages",
+        "English",
+    ]
+    main_column = [
+        "Jane Doe",
+        "Senior Software Engineer",
+        "Seattle, Washington, United States",
+        "Experience",
+        "Example Corp",
+        "Senior Software Engineer",
+        "November 2022 - Present (1 year 3 months)",
+        "Seattle, Washington, United States",
+        "Built and shipped a critical platform migration across services.",
+        "Education",
+        "Example University",
+        "B.S., Computer Science · (2014 - 2018)",
+    ]
+    return [(30, 740 - 14 * idx, text) for idx, text in enumerate(left_column)] + [
+        (220, 740 - 14 * idx, text) for idx, text in enumerate(main_column)
+    ]
+
+
 class ResumeExtractionBatchFlowHelpersTests(unittest.TestCase):
     def test_discovers_only_top_level_pdfs(self) -> None:
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -89,6 +182,12 @@ class ResumeExtractionBatchFlowHelpersTests(unittest.TestCase):
         self.assertEqual(failure_count, 1)
         self.assertEqual([entry["source_pdf"] for entry in failed_results], ["/tmp/b.pdf"])
 
+    def test_shard_pdf_paths_splits_into_fixed_size_shards(self) -> None:
+        shards = _shard_pdf_paths(["a.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf"], 2)
+        self.assertEqual(shards, [["a.pdf", "b.pdf"], ["c.pdf", "d.pdf"], ["e.pdf"]])
+        with self.assertRaises(ValueError):
+            _shard_pdf_paths(["a.pdf"], 0)
+
     def test_output_filename_uses_pdf_stem(self) -> None:
         self.assertEqual(_make_output_filename(Path("/tmp/jane-doe.pdf")), "jane-doe_resume.json")
 
@@ -106,7 +205,7 @@ class ResumeExtractionBatchFlowHelpersTests(unittest.TestCase):
     def test_ensure_resume_profiles_table_creates_table(self) -> None:
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = Path(temp_dir) / "resume_profiles.db"
-            _ensure_resume_profiles_table(db_path)
+            ensure_resume_profiles_table(db_path)
             with sqlite3.connect(db_path) as conn:
                 row = conn.execute(
                     "SELECT name FROM sqlite_master WHERE type='table' AND name='resume_profiles'"
@@ -138,7 +237,7 @@ class ResumeExtractionBatchFlowHelpersTests(unittest.TestCase):
                 )
                 conn.commit()
 
-            _ensure_resume_profiles_table(db_path)
+            ensure_resume_profiles_table(db_path)
             with sqlite3.connect(db_path) as conn:
                 columns = {
                     column_info[1]
@@ -149,7 +248,7 @@ class ResumeExtractionBatchFlowHelpersTests(unittest.TestCase):
     def test_upsert_resume_profile_row_updates_existing_pdf_stem(self) -> None:
         with tempfile.TemporaryDirectory() as temp_dir:
             db_path = Path(temp_dir) / "resume_profiles.db"
-            _ensure_resume_profiles_table(db_path)
+            ensure_resume_profiles_table(db_path)
             source_pdf = Path("/tmp/jane-doe.pdf")
             first_profile = json.loads(json.dumps(_VALID_PROFILE))
             second_profile = json.loads(json.dumps(_VALID_PROFILE))
@@ -236,6 +335,82 @@ class ResumeExtractorServiceTests(unittest.TestCase):
                 with self.assertRaises(ValueError):
                     extract_resume_profile_from_pdf(pdf_path, model="gpt-5.1")
 
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.AsyncOpenAI")
+    def test_extract_resume_profiles_async_bounds_in_flight_requests(
+        self, mock_async_openai: object, _: object
+    ) -> None:
+        in_flight = 0
+        peak_in_flight = 0
+
+        async def fake_create(**_: object) -> SimpleNamespace:
+            nonlocal in_flight, peak_in_flight
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return SimpleNamespace(output_text=json.dumps(_VALID_PROFILE))
+
+        client = mock_async_openai.return_value.__aenter__.return_value
+        client.responses.create = AsyncMock(side_effect=fake_create)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_paths = []
+            for idx in range(6):
+                pdf_path = Path(temp_dir) / f"resume-{idx}.pdf"
+                pdf_path.write_bytes(b"%PDF-1.4 fake")
+                pdf_paths.append(pdf_path)
+            missing_path = Path(temp_dir) / "missing.pdf"
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                outcomes = asyncio.run(
+                    extract_resume_profiles_async(
+                        [*pdf_paths, missing_path],
+                        model="gpt-5.1",
+                        max_in_flight=2,
+                    )
+                )
+
+        self.assertEqual(len(outcomes), 7)
+        self.assertTrue(all(outcome["success"] for outcome in outcomes[:6]))
+        self.assertFalse(outcomes[6]["success"])
+        self.assertIn("FileNotFoundError", outcomes[6]["error_message"])
+        self.assertEqual(client.responses.create.call_count, 6)
+        self.assertEqual(peak_in_flight, 2)
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.AsyncOpenAI")
+    def test_extract_resume_profiles_async_reads_pdfs_and_cache_off_the_event_loop(
+        self, mock_async_openai: object, _: object
+    ) -> None:
+        client = mock_async_openai.return_value.__aenter__.return_value
+        client.responses.create = AsyncMock(
+            return_value=SimpleNamespace(output_text=json.dumps(_VALID_PROFILE))
+        )
+        io_threads: list[threading.Thread] = []
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = Path(temp_dir) / "resume.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+            cache = ResumeExtractionCache(Path(temp_dir) / "cache.db")
+            cache_get = cache.get
+            cache.get = lambda **kwargs: io_threads.append(threading.current_thread()) or cache_get(**kwargs)
+
+            async def run() -> tuple[threading.Thread, list[dict[str, object]]]:
+                outcomes = await extract_resume_profiles_async([pdf_path], cache=cache, prompt_sha="p")
+                return threading.current_thread(), outcomes
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}), patch(
+                "flow.services.resume_extractor.read_pdf_bytes",
+                side_effect=lambda path: io_threads.append(threading.current_thread())
+                or (Path(path), Path(path).read_bytes()),
+            ):
+                loop_thread, outcomes = asyncio.run(run())
+
+        self.assertTrue(outcomes[0]["success"])
+        self.assertEqual(len(io_threads), 2)
+        self.assertNotIn(loop_thread, io_threads)
+
     @patch("flow.services.resume_extractor.subprocess.run")
     @patch("flow.services.resume_extractor._find_git_repo_root")
     @patch("flow.services.resume_extractor.files")
@@ -257,12 +432,745 @@ class ResumeExtractorServiceTests(unittest.TestCase):
         )
 
 
+class ResumeExtractionCacheTests(unittest.TestCase):
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_cache_hit_skips_openai_call(self, mock_openai: object, _: object) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = Path(temp_dir) / "resume.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+            cache = ResumeExtractionCache(Path(temp_dir) / "cache.db")
+
+            client = mock_openai.return_value
+            client.responses.create.return_value = SimpleNamespace(
+                output_text=json.dumps(_VALID_PROFILE)
+            )
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                first = extract_resume_profile_from_pdf(
+                    pdf_path, model="gpt-5.1", cache=cache, prompt_sha="sha-v1"
+                )
+                second = extract_resume_profile_from_pdf(
+                    pdf_path, model="gpt-5.1", cache=cache, prompt_sha="sha-v1"
+                )
+                extract_resume_profile_from_pdf(
+                    pdf_path, model="gpt-5.1", cache=cache, prompt_sha="sha-v2"
+                )
+
+            self.assertEqual(first, second)
+            self.assertEqual(client.responses.create.call_count, 2)
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(cache.misses, 2)
+
+    def test_cache_evicts_least_recently_used_entries_over_size_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            entry_size = len(json.dumps(_VALID_PROFILE, ensure_ascii=False).encode("utf-8"))
+            cache = ResumeExtractionCache(
+                Path(temp_dir) / "cache.db",
+                max_bytes=entry_size * 2,
+            )
+            with patch(
+                "flow.services.extraction_cache._utc_now_iso",
+                side_effect=[
+                    "2026-02-22T00:00:00+00:00",
+                    "2026-02-22T00:01:00+00:00",
+                    "2026-02-22T00:02:00+00:00",
+                    "2026-02-22T00:03:00+00:00",
+                ],
+            ):
+                cache.put(pdf_sha256="a", prompt_sha="p", model="m", profile=_VALID_PROFILE)
+                cache.put(pdf_sha256="b", prompt_sha="p", model="m", profile=_VALID_PROFILE)
+                self.assertIsNotNone(cache.get(pdf_sha256="a", prompt_sha="p", model="m"))
+                cache.put(pdf_sha256="c", prompt_sha="p", model="m", profile=_VALID_PROFILE)
+
+            self.assertIsNotNone(cache.get(pdf_sha256="a", prompt_sha="p", model="m"))
+            self.assertIsNone(cache.get(pdf_sha256="b", prompt_sha="p", model="m"))
+            self.assertEqual(cache.stats()["entry_count"], 2)
+
+    def test_summarize_cache_usage_counts_hits_and_misses(self) -> None:
+        results = [{"cache_hit": True}, {"cache_hit": False}, {"cache_hit": None}]
+        self.assertEqual(_summarize_cache_usage(results), {"hits": 1, "misses": 1})
+
+
+def _rate_limit_error(retry_after: str = "0") -> openai.RateLimitError:
+    response = SimpleNamespace(
+        status_code=429,
+        headers={"retry-after": retry_after},
+        request=SimpleNamespace(method="POST", url="https://api.openai.com/v1/responses"),
+    )
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class AdaptiveRateLimiterTests(unittest.TestCase):
+    def test_token_bucket_reports_wait_until_refilled(self) -> None:
+        now = [0.0]
+        bucket = TokenBucket(60, clock=lambda: now[0])
+        bucket.consume(60)
+        self.assertAlmostEqual(bucket.seconds_until_available(3), 3.0)
+        now[0] = 3.0
+        self.assertEqual(bucket.seconds_until_available(3), 0.0)
+
+    def test_retries_rate_limit_errors_and_halves_concurrency(self) -> None:
+        limiter = AdaptiveRateLimiter(
+            initial_concurrency=8,
+            max_concurrency=8,
+            base_backoff_seconds=0.0,
+        )
+        attempts = {"count": 0}
+
+        def flaky_call() -> str:
+            attempts["count"] += 1
+            if attempts["count"] == 1:
+                raise _rate_limit_error()
+            return "ok"
+
+        self.assertEqual(limiter.call(flaky_call), "ok")
+        self.assertEqual(attempts["count"], 2)
+        self.assertEqual(limiter.rate_limited_count, 1)
+        self.assertEqual(limiter.retry_count, 1)
+        self.assertEqual(limiter.concurrency_limit, 4)
+
+    def test_gives_up_after_max_retries(self) -> None:
+        limiter = AdaptiveRateLimiter(max_retries=2, base_backoff_seconds=0.0)
+
+        def always_limited() -> str:
+            raise _rate_limit_error()
+
+        with self.assertRaises(openai.RateLimitError):
+            limiter.call(always_limited)
+        self.assertEqual(limiter.retry_count, 2)
+
+    def test_does_not_retry_non_retryable_errors(self) -> None:
+        limiter = AdaptiveRateLimiter(base_backoff_seconds=0.0)
+        attempts = {"count": 0}
+
+        def broken_call() -> str:
+            attempts["count"] += 1
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            limiter.call(broken_call)
+        self.assertEqual(attempts["count"], 1)
+
+    def test_shared_budget_is_consulted_outside_the_limiter_lock(self) -> None:
+        limiter = AdaptiveRateLimiter(initial_concurrency=1, max_concurrency=1)
+        seen: list[tuple[bool, int]] = []
+        grants = iter([0.5, 0.0, 0.0])
+
+        def try_acquire(**_kwargs) -> float:
+            seen.append((limiter._lock.locked(), threading.get_ident()))
+            return next(grants)
+
+        limiter.shared_budget = SimpleNamespace(
+            try_acquire=try_acquire,
+            new_waiter_id=lambda: "waiter",
+            release_waiter=lambda _waiter_id: None,
+            adjust_tokens=lambda _delta: None,
+        )
+        # A refused shared grant gives the local slot back, so the single slot is free again.
+        self.assertEqual(limiter._try_acquire(10, "waiter"), 0.5)
+        self.assertEqual(limiter._in_flight, 0)
+        self.assertEqual(limiter._try_acquire(10, "waiter"), 0.0)
+        self.assertEqual(limiter._in_flight, 1)
+        limiter._in_flight = 0
+
+        async def call_async() -> str:
+            async def fn() -> str:
+                return "ok"
+
+            return await limiter.call_async(fn)
+
+        self.assertEqual(asyncio.run(call_async()), "ok")
+        self.assertEqual([locked for locked, _ in seen], [False, False, False])
+        # The async path runs the SQLite-backed call off the event loop thread.
+        self.assertNotEqual(seen[-1][1], threading.get_ident())
+
+    def test_get_shared_rate_limiter_keys_on_settings(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            budget_path = Path(temp_dir) / "budget.db"
+
+            def limiter_for(priority: int) -> AdaptiveRateLimiter:
+                return get_shared_rate_limiter(
+                    "test-shared-limiter-model",
+                    requests_per_minute=60,
+                    shared_budget=open_shared_budget(
+                        budget_path, name="m", requests_per_minute=60, tokens_per_minute=600
+                    ),
+                    priority=priority,
+                )
+
+            batch = limiter_for(PRIORITY_BATCH)
+            self.assertIs(limiter_for(PRIORITY_BATCH), batch)
+            interactive = limiter_for(PRIORITY_INTERACTIVE)
+
+        self.assertIsNot(interactive, batch)
+        self.assertEqual(batch.priority, PRIORITY_BATCH)
+        self.assertEqual(interactive.priority, PRIORITY_INTERACTIVE)
+
+    def test_successes_increase_concurrency_additively(self) -> None:
+        limiter = AdaptiveRateLimiter(initial_concurrency=2, max_concurrency=3)
+        for _ in range(4):
+            limiter.call(lambda: "ok")
+        self.assertEqual(limiter.concurrency_limit, 3)
+
+
+class PdfFileStoreTests(unittest.TestCase):
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_uploads_each_unique_pdf_once_and_references_file_id(
+        self, mock_openai: object, _: object
+    ) -> None:
+        client = mock_openai.return_value
+        client.files.create.return_value = SimpleNamespace(id="file-abc")
+        client.responses.create.return_value = SimpleNamespace(
+            output_text=json.dumps(_VALID_PROFILE)
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            store = PdfFileStore(root / "files.db")
+            first_pdf = root / "jane-doe.pdf"
+            copy_pdf = root / "jane-doe-copy.pdf"
+            first_pdf.write_bytes(b"%PDF-1.4 same bytes")
+            copy_pdf.write_bytes(b"%PDF-1.4 same bytes")
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                extract_resume_profile_from_pdf(first_pdf, file_store=store)
+                extract_resume_profile_from_pdf(copy_pdf, file_store=store)
+
+        client.files.create.assert_called_once()
+        self.assertEqual(store.upload_count, 1)
+        self.assertEqual(store.reuse_count, 1)
+        user_content = client.responses.create.call_args.kwargs["input"][1]["content"]
+        self.assertEqual(user_content[1], {"type": "input_file", "file_id": "file-abc"})
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_reuploads_when_recorded_file_id_is_gone(self, mock_openai: object, _: object) -> None:
+        client = mock_openai.return_value
+        client.files.create.return_value = SimpleNamespace(id="file-new")
+        missing = openai.NotFoundError(
+            "No such File object: file-old",
+            response=SimpleNamespace(status_code=404, headers={}, request=None),
+            body=None,
+        )
+        client.responses.create.side_effect = [
+            missing,
+            SimpleNamespace(output_text=json.dumps(_VALID_PROFILE)),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            store = PdfFileStore(root / "files.db")
+            pdf_path = root / "jane-doe.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+            store.record(
+                content_sha256=hashlib.sha256(b"%PDF-1.4 fake").hexdigest(),
+                file_id="file-old",
+                filename="jane-doe.pdf",
+                size_bytes=13,
+            )
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                parsed = extract_resume_profile_from_pdf(pdf_path, file_store=store)
+
+            self.assertEqual(
+                store.get_file_id(hashlib.sha256(b"%PDF-1.4 fake").hexdigest()), "file-new"
+            )
+        self.assertEqual(parsed["personal_information"]["full_name"], "Jane Doe")
+        self.assertEqual(client.responses.create.call_count, 2)
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_keeps_file_id_when_not_found_error_names_another_resource(
+        self, mock_openai: object, _: object
+    ) -> None:
+        client = mock_openai.return_value
+        client.responses.create.side_effect = openai.NotFoundError(
+            "The model `gpt-typo` does not exist",
+            response=SimpleNamespace(status_code=404, headers={}, request=None),
+            body=None,
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            store = PdfFileStore(root / "files.db")
+            pdf_path = root / "jane-doe.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+            content_sha256 = hashlib.sha256(b"%PDF-1.4 fake").hexdigest()
+            store.record(
+                content_sha256=content_sha256, file_id="file-old", filename="jane-doe.pdf", size_bytes=13
+            )
+
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}), self.assertRaises(
+                openai.NotFoundError
+            ):
+                extract_resume_profile_from_pdf(pdf_path, file_store=store)
+
+            self.assertEqual(store.get_file_id(content_sha256), "file-old")
+        client.files.create.assert_not_called()
+        self.assertEqual(client.responses.create.call_count, 1)
+
+
+class PdfTextLayerTests(unittest.TestCase):
+    def test_extract_pdf_text_layer_reads_left_column_before_main_column(self) -> None:
+        text = extract_pdf_text_layer(_make_text_pdf(_linkedin_placements()))
+        lines = text.splitlines()
+        self.assertEqual(lines[0], "Contact")
+        self.assertLess(lines.index("English"), lines.index("Jane Doe"))
+        self.assertLess(lines.index("Experience"), lines.index("Education"))
+        self.assertTrue(is_text_layer_usable(text))
+
+    def test_is_text_layer_usable_rejects_empty_and_garbled_text(self) -> None:
+        self.assertFalse(is_text_layer_usable(""))
+        self.assertFalse(is_text_layer_usable("(cid:12)(cid:44) " * 40))
+        self.assertFalse(is_text_layer_usable("\u25a0\u25a1\u25aa" * 100))
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_prefer_text_layer_sends_input_text_and_skips_upload(
+        self, mock_openai: object, _: object
+    ) -> None:
+        client = mock_openai.return_value
+        client.responses.create.return_value = SimpleNamespace(
+            output_text=json.dumps(_VALID_PROFILE)
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            pdf_path = root / "jane-doe.pdf"
+            pdf_path.write_bytes(_make_text_pdf(_linkedin_placements()))
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                extract_resume_profile_from_pdf(
+                    pdf_path,
+                    file_store=PdfFileStore(root / "files.db"),
+                    prefer_text_layer=True,
+                )
+
+        client.files.create.assert_not_called()
+        document = client.responses.create.call_args.kwargs["input"][1]["content"][1]
+        self.assertEqual(document["type"], "input_text")
+        self.assertIn("Top Skills", document["text"])
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_prefer_text_layer_falls_back_to_file_without_text_layer(
+        self, mock_openai: object, _: object
+    ) -> None:
+        client = mock_openai.return_value
+        client.responses.create.return_value = SimpleNamespace(
+            output_text=json.dumps(_VALID_PROFILE)
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = Path(temp_dir) / "scanned.pdf"
+            pdf_path.write_bytes(_make_text_pdf([]))
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                extract_resume_profile_from_pdf(pdf_path, prefer_text_layer=True)
+
+        document = client.responses.create.call_args.kwargs["input"][1]["content"][1]
+        self.assertEqual(document["type"], "input_file")
+        self.assertIn("file_data", document)
+
+
+_GROUPED_ROLES_TEXT = """Contact
+www.linkedin.com/in/jane-doe-
+12345 (LinkedIn)
+Top Skills
+Python
+Languages
+English (Native or Bilingual)
+
+Jane Doe
+Staff Engineer at Example Corp | Distributed
+Systems
+Seattle, Washington, United States
+Experience
+Example Corp
+3 years 2 months
+Senior Software Engineer
+November 2022 - Present (1 year 3 months)
+Seattle, Washington, United States
+- Led migration of billing to a new
+platform.
+- Cut latency 40%.
+Software Engineer
+January 2021 - November 2022 (1 year 11 months)
+Built pipelines for search.
+Page 1 of 2
+
+Other Inc
+Intern
+June 2019 - August 2019 (3 months)
+Remote
+Education
+Example University
+Bachelor of Science - BS, Computer Science · (2014 - 2018)
+Page 2 of 2"""
+
+
+class LinkedinPdfParserTests(unittest.TestCase):
+    def test_extract_resume_profile_locally_reports_unreadable_pdf_but_raises_without_pypdf(self) -> None:
+        profile, failures = extract_resume_profile_locally(b"not a pdf")
+        self.assertIsNone(profile)
+        self.assertRegex(failures[0], "^text layer unreadable: ")
+        with patch.dict(sys.modules, {"pypdf": None}), self.assertRaisesRegex(ImportError, "pypdf"):
+            extract_resume_profile_locally(b"not a pdf")
+
+    def test_extract_resume_profile_locally_parses_linkedin_layout(self) -> None:
+        profile, failures = extract_resume_profile_locally(_make_text_pdf(_linkedin_placements()))
+
+        self.assertEqual(failures, [])
+        ResumeProfile.model_validate(profile)
+        self.assertEqual(
+            profile["personal_information"],
+            {
+                "full_name": "Jane Doe",
+                "headline": "Senior Software Engineer",
+                "location": "Seattle, Washington, United States",
+                "linkedin_url": "www.linkedin.com/in/jane-doe",
+            },
+        )
+        self.assertEqual(profile["skills"]["top_skills"], ["Python", "Distributed Systems"])
+        self.assertEqual(profile["skills"]["languages"], ["English"])
+        self.assertEqual(profile["experience"][0]["company"], "Example Corp")
+        self.assertEqual(profile["experience"][0]["start_date"], "November 2022")
+        self.assertEqual(profile["experience"][0]["duration"], "1 year 3 months")
+        self.assertEqual(
+            profile["education"][0],
+            {
+                "institution": "Example University",
+                "degree": "B.S.",
+                "field_of_study": "Computer Science",
+                "start_year": "2014",
+                "end_year": "2018",
+            },
+        )
+
+    def test_parse_handles_grouped_roles_wrapped_lines_and_page_breaks(self) -> None:
+        profile, failures = parse_linkedin_profile_text(_GROUPED_ROLES_TEXT)
+
+        self.assertEqual(failures, [])
+        self.assertEqual(profile["personal_information"]["linkedin_url"], "www.linkedin.com/in/jane-doe-12345")
+        self.assertEqual(
+            profile["personal_information"]["headline"],
+            "Staff Engineer at Example Corp | Distributed Systems",
+        )
+        self.assertEqual(
+            [(entry["company"], entry["title"], entry["location"]) for entry in profile["experience"]],
+            [
+                ("Example Corp", "Senior Software Engineer", "Seattle, Washington, United States"),
+                ("Example Corp", "Software Engineer", None),
+                ("Other Inc", "Intern", "Remote"),
+            ],
+        )
+        self.assertEqual(
+            profile["experience"][0]["description_bullets"],
+            ["Led migration of billing to a new platform.", "Cut latency 40%."],
+        )
+        self.assertEqual(profile["experience"][1]["description_bullets"], ["Built pipelines for search."])
+
+    def test_parse_fails_confidence_checks_for_other_layouts(self) -> None:
+        profile, failures = parse_linkedin_profile_text("Jane Doe\nEngineer\n\nExperience\nStuff")
+        self.assertIsNone(profile)
+        self.assertTrue(failures)
+
+        without_dates = _GROUPED_ROLES_TEXT.replace("November 2022 - Present (1 year 3 months)", "Recently")
+        without_dates = without_dates.replace("January 2021 - November 2022 (1 year 11 months)", "Before")
+        without_dates = without_dates.replace("June 2019 - August 2019 (3 months)", "Long ago")
+        profile, failures = parse_linkedin_profile_text(without_dates)
+        self.assertIsNone(profile)
+        self.assertIn("experience section has no date ranges", failures)
+
+    def test_extract_resume_profiles_locally_routes_failures_to_fallback(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            linkedin_pdf = root / "jane-doe.pdf"
+            linkedin_pdf.write_bytes(_make_text_pdf(_linkedin_placements()))
+            scanned_pdf = root / "scanned.pdf"
+            scanned_pdf.write_bytes(_make_text_pdf([]))
+
+            outcomes, fallback_paths = extract_resume_profiles_locally([linkedin_pdf, scanned_pdf])
+
+        self.assertEqual(fallback_paths, [scanned_pdf])
+        self.assertEqual(len(outcomes), 1)
+        self.assertTrue(outcomes[0]["success"])
+        self.assertEqual(outcomes[0]["extractor"], "local")
+        self.assertEqual(outcomes[0]["profile"]["personal_information"]["full_name"], "Jane Doe")
+
+
+class _FakeBatchEndpoints:
+    # Local stand-in for the OpenAI files + batches endpoints.
+    def __init__(self, *, failing_custom_ids: set[str] | None = None) -> None:
+        self.failing_custom_ids = failing_custom_ids or set()
+        self.file_contents: dict[str, str] = {}
+        self.batches: dict[str, SimpleNamespace] = {}
+        self.retrieve_calls = 0
+        self.submitted_requests: list[dict[str, object]] = []
+        self.files = SimpleNamespace(
+            create=self._create_file,
+            with_streaming_response=SimpleNamespace(content=self._stream_file),
+        )
+        self.batches_api = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, *, file: object, purpose: str) -> SimpleNamespace:
+        file_id = f"file-{len(self.file_contents)}"
+        self.file_contents[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _create_batch(self, *, input_file_id: str, endpoint: str, **_: object) -> SimpleNamespace:
+        output_lines = []
+        error_lines = []
+        for line in self.file_contents[input_file_id].splitlines():
+            request = json.loads(line)
+            self.submitted_requests.append(request)
+            custom_id = request["custom_id"]
+            if custom_id in self.failing_custom_ids:
+                error_lines.append(
+                    {
+                        "custom_id": custom_id,
+                        "response": {"status_code": 500, "body": {"error": {"message": "boom"}}},
+                        "error": None,
+                    }
+                )
+                continue
+            output_lines.append(
+                {
+                    "custom_id": custom_id,
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "output": [
+                                {
+                                    "type": "message",
+                                    "content": [
+                                        {"type": "output_text", "text": json.dumps(_VALID_PROFILE)}
+                                    ],
+                                }
+                            ]
+                        },
+                    },
+                    "error": None,
+                }
+            )
+        batch_id = f"batch-{len(self.batches)}"
+        output_file_id = f"file-out-{batch_id}"
+        error_file_id = f"file-err-{batch_id}" if error_lines else None
+        self.file_contents[output_file_id] = "\n".join(json.dumps(line) for line in output_lines)
+        if error_file_id:
+            self.file_contents[error_file_id] = "\n".join(json.dumps(line) for line in error_lines)
+        self.batches[batch_id] = SimpleNamespace(
+            id=batch_id,
+            endpoint=endpoint,
+            status="in_progress",
+            output_file_id=None,
+            error_file_id=None,
+            _final_files=(output_file_id, error_file_id),
+        )
+        return self.batches[batch_id]
+
+    def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        self.retrieve_calls += 1
+        batch = self.batches[batch_id]
+        if self.retrieve_calls > 1:
+            batch.status = "completed"
+            batch.output_file_id, batch.error_file_id = batch._final_files
+        return batch
+
+    @contextlib.contextmanager
+    def _stream_file(self, file_id: str) -> Iterator[SimpleNamespace]:
+        lines = self.file_contents[file_id].splitlines()
+        yield SimpleNamespace(iter_lines=lambda: iter(lines))
+
+
+class ResumeBatchExtractorTests(unittest.TestCase):
+    def _client(self, endpoints: _FakeBatchEndpoints) -> SimpleNamespace:
+        return SimpleNamespace(files=endpoints.files, batches=endpoints.batches_api)
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    def test_batch_outcomes_validate_results_and_report_failures(self, _: object) -> None:
+        endpoints = _FakeBatchEndpoints(failing_custom_ids={"resume-000001"})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            pdf_paths = []
+            for stem in ["alpha", "beta", "gamma"]:
+                pdf_path = root / f"{stem}.pdf"
+                pdf_path.write_bytes(f"%PDF-1.4 {stem}".encode("utf-8"))
+                pdf_paths.append(pdf_path)
+            cache = ResumeExtractionCache(root / "cache.db")
+            sleeps: list[float] = []
+
+            outcomes = list(
+                iter_resume_extraction_batch_outcomes(
+                    pdf_paths,
+                    model="gpt-5.1",
+                    work_dir=root / "batch_requests",
+                    client=self._client(endpoints),
+                    cache=cache,
+                    prompt_sha="sha-v1",
+                    poll_interval_seconds=5,
+                    sleep=sleeps.append,
+                )
+            )
+            rerun = list(
+                iter_resume_extraction_batch_outcomes(
+                    pdf_paths[:1],
+                    model="gpt-5.1",
+                    work_dir=root / "batch_requests",
+                    client=self._client(endpoints),
+                    cache=cache,
+                    prompt_sha="sha-v1",
+                )
+            )
+
+        by_stem = {Path(outcome["source_pdf"]).stem: outcome for outcome in outcomes}
+        self.assertTrue(by_stem["alpha"]["success"])
+        self.assertTrue(by_stem["gamma"]["success"])
+        self.assertFalse(by_stem["beta"]["success"])
+        self.assertIn("boom", by_stem["beta"]["error_message"])
+        ResumeProfile.model_validate(by_stem["alpha"]["profile"])
+        self.assertEqual(sleeps, [5])
+        self.assertEqual(len(endpoints.batches), 1)
+        self.assertEqual(endpoints.submitted_requests[0]["url"], "/v1/responses")
+        self.assertEqual(endpoints.submitted_requests[0]["body"]["model"], "gpt-5.1")
+        self.assertEqual(rerun[0]["cache_hit"], True)
+
+    def test_write_batch_request_files_splits_on_request_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            request_paths = write_batch_request_files(
+                [(f"id-{idx}", json.dumps({"custom_id": f"id-{idx}"})) for idx in range(5)],
+                work_dir=Path(temp_dir),
+                max_requests=2,
+            )
+            line_counts = [len(path.read_text(encoding="utf-8").splitlines()) for path in request_paths]
+        self.assertEqual(line_counts, [2, 2, 1])
+
+
+class ModelCascadeTests(unittest.TestCase):
+    def test_profile_sanity_failures_require_name_and_experience(self) -> None:
+        self.assertEqual(profile_sanity_failures(_VALID_PROFILE), [])
+        thin_profile = {
+            **_VALID_PROFILE,
+            "personal_information": {**_VALID_PROFILE["personal_information"], "full_name": " "},
+            "experience": [],
+        }
+        self.assertEqual(
+            profile_sanity_failures(thin_profile),
+            ["full_name is missing", "experience is empty"],
+        )
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.OpenAI")
+    def test_cascade_escalates_only_when_cheap_tier_fails_checks(
+        self, mock_openai: object, _: object
+    ) -> None:
+        thin_profile = {**_VALID_PROFILE, "experience": []}
+
+        def fake_create(*, model: str, **__: object) -> SimpleNamespace:
+            profile = thin_profile if model == "cheap-model" else _VALID_PROFILE
+            return SimpleNamespace(output_text=json.dumps(profile))
+
+        client = mock_openai.return_value
+        client.responses.create.side_effect = fake_create
+        limiter = AdaptiveRateLimiter(max_retries=0)
+        cascade = ModelCascade(
+            ["cheap-model", "strong-model"],
+            rate_limiters={"cheap-model": limiter, "strong-model": limiter},
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = Path(temp_dir) / "resume.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+            cache = ResumeExtractionCache(Path(temp_dir) / "cache.db")
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                profile = extract_resume_profile_from_pdf(
+                    pdf_path, cache=cache, prompt_sha="sha-v1", cascade=cascade
+                )
+                cached = extract_resume_profile_from_pdf(
+                    pdf_path, cache=cache, prompt_sha="sha-v1", cascade=cascade
+                )
+
+        self.assertEqual(profile["experience"], _VALID_PROFILE["experience"])
+        self.assertEqual(cached, profile)
+        self.assertEqual(
+            [call.kwargs["model"] for call in client.responses.create.call_args_list],
+            ["cheap-model", "strong-model"],
+        )
+        summary = cascade.summary()
+        self.assertEqual((summary["cheap-model"]["attempts"], summary["cheap-model"]["hit_rate"]), (1, 0.0))
+        self.assertEqual((summary["strong-model"]["attempts"], summary["strong-model"]["hit_rate"]), (1, 1.0))
+        self.assertIsNotNone(summary["strong-model"]["mean_latency_seconds"])
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    @patch("flow.services.resume_extractor.AsyncOpenAI")
+    def test_async_cascade_records_accepting_tier_per_outcome(
+        self, mock_async_openai: object, _: object
+    ) -> None:
+        async def fake_create(*, model: str, input: list[dict[str, object]]) -> SimpleNamespace:
+            filename = input[1]["content"][1]["filename"]
+            if model == "cheap-model" and filename == "hard.pdf":
+                return SimpleNamespace(output_text="not-json")
+            return SimpleNamespace(output_text=json.dumps(_VALID_PROFILE))
+
+        client = mock_async_openai.return_value.__aenter__.return_value
+        client.responses.create = AsyncMock(side_effect=fake_create)
+        cascade = ModelCascade(["cheap-model", "strong-model"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_paths = []
+            for stem in ("easy", "hard"):
+                pdf_path = Path(temp_dir) / f"{stem}.pdf"
+                pdf_path.write_bytes(f"%PDF-1.4 {stem}".encode())
+                pdf_paths.append(pdf_path)
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+                outcomes = asyncio.run(extract_resume_profiles_async(pdf_paths, cascade=cascade))
+
+        self.assertEqual([outcome["model"] for outcome in outcomes], ["cheap-model", "strong-model"])
+        self.assertTrue(all(outcome["success"] for outcome in outcomes))
+        self.assertEqual(cascade.tier_stats["cheap-model"]["attempts"], 2)
+        self.assertEqual(cascade.tier_stats["cheap-model"]["accepted"], 1)
+        self.assertEqual(cascade.tier_stats["strong-model"]["accepted"], 1)
+        merged = merge_cascade_stats([cascade.tier_stats, cascade.tier_stats])
+        self.assertEqual(merged["cheap-model"]["attempts"], 4)
+
+    @patch("flow.services.resume_extractor._load_resume_prompt", return_value="fixed prompt")
+    def test_cascaded_batch_resubmits_only_rejected_pdfs(self, _: object) -> None:
+        endpoints = _FakeBatchEndpoints(failing_custom_ids={"resume-000001"})
+        cascade = ModelCascade(["cheap-model", "strong-model"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            pdf_paths = []
+            for stem in ("alpha", "beta"):
+                pdf_path = root / f"{stem}.pdf"
+                pdf_path.write_bytes(f"%PDF-1.4 {stem}".encode())
+                pdf_paths.append(pdf_path)
+
+            outcomes = list(
+                iter_cascaded_batch_outcomes(
+                    pdf_paths,
+                    cascade=cascade,
+                    work_dir=root / "batch",
+                    client=SimpleNamespace(files=endpoints.files, batches=endpoints.batches_api),
+                    sleep=lambda _: None,
+                )
+            )
+
+        by_stem = {Path(outcome["source_pdf"]).stem: outcome for outcome in outcomes}
+        self.assertEqual(by_stem["alpha"]["model"], "cheap-model")
+        self.assertEqual(by_stem["beta"]["model"], "strong-model")
+        self.assertTrue(by_stem["beta"]["success"])
+        self.assertEqual(
+            [request["body"]["model"] for request in endpoints.submitted_requests],
+            ["cheap-model", "cheap-model", "strong-model"],
+        )
+        self.assertEqual(cascade.tier_stats["cheap-model"]["accepted"], 1)
+        self.assertEqual(cascade.tier_stats["cheap-model"]["timed_attempts"], 0)
+
+
 class FlowWiringTests(unittest.TestCase):
     def test_batch_flow_calls_resume_extractor_service(self) -> None:
         class_source = inspect.getsource(ResumeExtractionBatchFlow)
-        self.assertIn("extract_resume_profile_from_pdf", class_source)
+        self.assertIn("extract_resume_profiles_async", class_source)
+        self.assertIn('foreach="pdf_shards"', class_source)
         self.assertIn("_persist_resume_profile", class_source)
         self.assertIn("_upsert_resume_profile_row", class_source)
+        self.assertIn("extract_resume_profiles_locally", class_source)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import inspect
 import json
 import sqlite3
@@ -7,17 +8,39 @@ import sys
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
 from flow.pipelines.resume_faiss_backfill_flow import ResumeFaissBackfillFlow  # noqa: E402
+from flow.services.embedding_cache import EmbeddingCache  # noqa: E402
+from flow.services.faiss_index_registry import (  # noqa: E402
+    compute_file_sha256,
+    fetch_current_registered_index,
+    fetch_registered_faiss_index,
+    promote_faiss_index,
+)
+from flow.services.faiss_index_builder import (  # noqa: E402
+    StreamingIndexBuilder,
+    apply_search_parameters,
+    read_index_metadata,
+)
+from flow.services.rate_limiter import AdaptiveRateLimiter  # noqa: E402
 from flow.services.resume_indexer import (  # noqa: E402
+    EMBEDDING_MAX_INPUT_TOKENS,
     backfill_missing_faiss_indexes,
+    fetch_current_faiss_index_path,
     fetch_rows_for_faiss_backfill,
     fetch_rows_missing_faiss_index,
     flatten_resume_profile,
+    generate_embeddings,
+    iter_profile_row_pages,
+    pack_embedding_batches,
+    remove_rows_from_faiss_index,
+    truncate_embedding_text,
     update_rows_faiss_index_path,
+    write_shared_faiss_index,
 )
 
 
@@ -41,6 +64,62 @@ def _create_resume_profiles_table(db_path: Path) -> None:
         conn.commit()
 
 
+def _insert_profile_row(db_path: Path, row_id: int, pdf_stem: str) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO resume_profiles
+            (id, pdf_stem, source_pdf, full_name, profile_json, prompt_version_sha, faiss_index_path, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)
+            """,
+            (
+                row_id,
+                pdf_stem,
+                f"/tmp/{pdf_stem}.pdf",
+                pdf_stem,
+                json.dumps(_sample_profile(pdf_stem)),
+                "sha-1",
+                "2026-02-22T00:00:00+00:00",
+                "2026-02-22T00:00:00+00:00",
+            ),
+        )
+        conn.commit()
+
+
+def _embed_by_row_id(*, flattened_rows, scale: float = 1.0, **_kwargs) -> list[list[float]]:
+    return [[float(row["id"]) * scale, 0.0, 0.0] for row in flattened_rows]
+
+
+class _FakeAsyncEmbeddingsClient:
+    def __init__(self, *, delay_for=lambda batch: 0.0) -> None:
+        self.requests: list[list[str]] = []
+        self.requested_dimensions: list[int | None] = []
+        self.in_flight = 0
+        self.max_concurrent = 0
+        self.delay_for = delay_for
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return None
+
+    async def _create(self, *, model, input, dimensions=None):
+        self.requests.append(list(input))
+        self.requested_dimensions.append(dimensions)
+        self.in_flight += 1
+        self.max_concurrent = max(self.max_concurrent, self.in_flight)
+        await asyncio.sleep(self.delay_for(input) + 0.01)
+        self.in_flight -= 1
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=position, embedding=[float(len(text)), 0.5])
+                for position, text in reversed(list(enumerate(input)))
+            ]
+        )
+
+
 def _sample_profile(full_name: str) -> dict[str, object]:
     return {
         "personal_information": {
@@ -256,8 +335,10 @@ class ResumeIndexerServiceTests(unittest.TestCase):
         "flow.services.resume_indexer.generate_embeddings",
         return_value=[[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
     )
+    @patch("flow.services.resume_indexer.promote_faiss_index", new=MagicMock())
+    @patch("flow.services.resume_indexer.register_faiss_index", new=MagicMock())
     @patch(
-        "flow.services.resume_indexer.write_shared_faiss_index",
+        "flow.services.resume_indexer._save_new_faiss_index",
         return_value=Path("/tmp/resume_profiles_20260222T000000Z.faiss"),
     )
     def test_backfill_missing_faiss_indexes_full_mode_overwrites_all_rows_with_shared_index_path(
@@ -332,8 +413,10 @@ class ResumeIndexerServiceTests(unittest.TestCase):
             self.assertEqual(rows[1][1], "/tmp/resume_profiles_20260222T000000Z.faiss")
 
     @patch("flow.services.resume_indexer.generate_embeddings", return_value=[[0.1, 0.2, 0.3]])
+    @patch("flow.services.resume_indexer.promote_faiss_index", new=MagicMock())
+    @patch("flow.services.resume_indexer.register_faiss_index", new=MagicMock())
     @patch(
-        "flow.services.resume_indexer.write_shared_faiss_index",
+        "flow.services.resume_indexer._save_new_faiss_index",
         return_value=Path("/tmp/resume_profiles_20260222T000000Z.faiss"),
     )
     def test_backfill_missing_faiss_indexes_missing_mode_only_updates_null_rows(
@@ -402,6 +485,586 @@ class ResumeIndexerServiceTests(unittest.TestCase):
             self.assertEqual(rows[0][1], "/tmp/resume_profiles_20260222T000000Z.faiss")
             self.assertEqual(rows[1][1], "/tmp/existing.faiss")
 
+    def test_incremental_mode_appends_only_new_rows_to_current_index(self) -> None:
+        import faiss
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            _insert_profile_row(db_path, 1, "first")
+            _insert_profile_row(db_path, 2, "second")
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+            ):
+                first = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+            _insert_profile_row(db_path, 3, "third")
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+            ) as embeddings_mock:
+                second = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+
+            embedded_ids = [row["id"] for row in embeddings_mock.call_args.kwargs["flattened_rows"]]
+            index = faiss.read_index(second["index_path"])
+            metadata = read_index_metadata(Path(second["index_path"]))
+            with sqlite3.connect(db_path) as conn:
+                paths = {row[0] for row in conn.execute("SELECT faiss_index_path FROM resume_profiles")}
+            index_files = list(index_dir.glob("*.faiss"))
+
+        self.assertEqual(first["indexed_row_ids"], [1, 2])
+        self.assertEqual(embedded_ids, [3])
+        self.assertEqual(second["mode"], "incremental")
+        # The appended index is published as a new versioned file; the old one stays for rollback.
+        self.assertNotEqual(second["index_path"], first["index_path"])
+        self.assertEqual(second["indexed_row_ids"], [3])
+        self.assertEqual(paths, {second["index_path"]})
+        self.assertEqual(index.ntotal, 3)
+        self.assertEqual(metadata["ntotal"], 3)
+        self.assertEqual(index.reconstruct(3)[0], 3.0)
+        self.assertEqual(len(index_files), 2)
+
+    def test_incremental_mode_reembeds_changed_rows_in_place(self) -> None:
+        import faiss
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            for row_id, pdf_stem in ((1, "first"), (2, "second"), (3, "third")):
+                _insert_profile_row(db_path, row_id, pdf_stem)
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+            ):
+                backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE resume_profiles SET updated_at = '2999-01-01T00:00:00+00:00' WHERE id = 1")
+                conn.commit()
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings",
+                side_effect=lambda **kwargs: _embed_by_row_id(scale=10.0, **kwargs),
+            ) as embeddings_mock:
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+            index = faiss.read_index(summary["index_path"])
+
+        embedded_ids = [row["id"] for row in embeddings_mock.call_args.kwargs["flattened_rows"]]
+        self.assertEqual(embedded_ids, [1])
+        self.assertEqual(index.ntotal, 3)
+        self.assertEqual([index.reconstruct(row_id)[0] for row_id in (1, 2, 3)], [10.0, 2.0, 3.0])
+
+
+    def test_incremental_mode_appends_to_indexes_without_remove_ids(self) -> None:
+        import faiss
+
+        for index_factory in ("HNSW8", "IVF2,Flat,RFlat"):
+            with self.subTest(index_factory=index_factory), tempfile.TemporaryDirectory() as temp_dir:
+                db_path = Path(temp_dir) / "resume_profiles.db"
+                backfill_kwargs = {
+                    "db_path": db_path,
+                    "index_dir": Path(temp_dir) / "indexes",
+                    "model": "text-embedding-3-large",
+                    "batch_size": 16,
+                    "mode": "incremental",
+                    "index_factory": index_factory,
+                    "train_sample_size": 4,
+                }
+                _create_resume_profiles_table(db_path)
+                for row_id in range(1, 5):
+                    _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+                with patch(
+                    "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+                ):
+                    backfill_missing_faiss_indexes(**backfill_kwargs)
+                    _insert_profile_row(db_path, 5, "profile-5")
+                    summary = backfill_missing_faiss_indexes(**backfill_kwargs)
+                index = faiss.read_index(summary["index_path"])
+
+                self.assertEqual(summary["indexed_row_ids"], [5])
+                self.assertEqual(sorted(faiss.vector_to_array(index.id_map).tolist()), [1, 2, 3, 4, 5])
+
+                # Re-embedding a changed row would need remove_ids; fail before any embedding call.
+                with sqlite3.connect(db_path) as conn:
+                    conn.execute("UPDATE resume_profiles SET updated_at = '2999-01-01T00:00:00+00:00' WHERE id = 1")
+                    conn.commit()
+                with patch("flow.services.resume_indexer.generate_embeddings") as embeddings_mock, self.assertRaisesRegex(
+                    ValueError, "Incremental mode is unsupported"
+                ):
+                    backfill_missing_faiss_indexes(**backfill_kwargs)
+                embeddings_mock.assert_not_called()
+
+    def test_incremental_mode_rekeys_positional_index_and_drops_deleted_rows(self) -> None:
+        import faiss
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            for row_id, pdf_stem in ((1, "first"), (2, "second"), (3, "third")):
+                _insert_profile_row(db_path, row_id, pdf_stem)
+            legacy_path = write_shared_faiss_index([[1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [3.0, 0.0, 0.0]], index_dir)
+            update_rows_faiss_index_path(db_path, [1, 2, 3], legacy_path)
+
+            with patch("flow.services.resume_indexer.generate_embeddings") as embeddings_mock:
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+                with sqlite3.connect(db_path) as conn:
+                    conn.execute("DELETE FROM resume_profiles WHERE id = 2")
+                    conn.commit()
+                pruned = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="incremental",
+                )
+            index = faiss.read_index(pruned["index_path"])
+
+        embeddings_mock.assert_not_called()
+        self.assertEqual(summary["indexed_row_ids"], [])
+        self.assertEqual(pruned["removed_count"], 1)
+        self.assertIsInstance(index, faiss.IndexIDMap)
+        self.assertEqual(sorted(faiss.vector_to_array(index.id_map).tolist()), [1, 3])
+        self.assertEqual(index.reconstruct(3)[0], 3.0)
+
+    def test_remove_rows_from_faiss_index_drops_vectors_and_clears_path(self) -> None:
+        import faiss
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            _insert_profile_row(db_path, 5, "five")
+            _insert_profile_row(db_path, 9, "nine")
+            index_path = write_shared_faiss_index(
+                [[5.0, 0.0], [9.0, 0.0]], Path(temp_dir), row_ids=[5, 9]
+            )
+            update_rows_faiss_index_path(db_path, [5, 9], index_path)
+
+            removed_count = remove_rows_from_faiss_index(db_path, index_path, [9])
+            index = faiss.read_index(str(index_path))
+            with sqlite3.connect(db_path) as conn:
+                paths = dict(conn.execute("SELECT id, faiss_index_path FROM resume_profiles").fetchall())
+
+        self.assertEqual(removed_count, 1)
+        self.assertEqual(faiss.vector_to_array(index.id_map).tolist(), [5])
+        self.assertEqual(paths, {5: str(index_path), 9: None})
+
+    def test_generate_embeddings_sends_only_cache_misses_to_api(self) -> None:
+        client = _FakeAsyncEmbeddingsClient()
+        rows = [{"flattened_text": text} for text in ("aa", "bbbb", "aa")]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = EmbeddingCache(Path(temp_dir) / "embedding_cache.db")
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}), patch(
+                "flow.services.resume_indexer.AsyncOpenAI", return_value=client
+            ):
+                first = generate_embeddings(
+                    flattened_rows=rows[:2], model="text-embedding-3-large", batch_size=8, cache=cache
+                )
+            with patch.dict("os.environ", {}, clear=True):
+                second = generate_embeddings(
+                    flattened_rows=rows, model="text-embedding-3-large", batch_size=8, cache=cache
+                )
+            other_model_hits = cache.get_many(["unused"], model="text-embedding-3-small")
+            stats = cache.stats()
+
+        self.assertEqual(len(client.requests), 1)
+        self.assertEqual(first, [[2.0, 0.5], [4.0, 0.5]])
+        self.assertEqual(second, [[2.0, 0.5], [4.0, 0.5], [2.0, 0.5]])
+        self.assertEqual(other_model_hits, {})
+        self.assertEqual(stats["entry_count"], 2)
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 3))
+
+    def test_generate_embeddings_requests_and_caches_reduced_dimensions(self) -> None:
+        client = _FakeAsyncEmbeddingsClient()
+        rows = [{"flattened_text": "aa"}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = EmbeddingCache(Path(temp_dir) / "embedding_cache.db")
+            with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}), patch(
+                "flow.services.resume_indexer.AsyncOpenAI", return_value=client
+            ):
+                generate_embeddings(
+                    flattened_rows=rows, model="text-embedding-3-large", batch_size=8, cache=cache, dimensions=256
+                )
+                generate_embeddings(flattened_rows=rows, model="text-embedding-3-large", batch_size=8, cache=cache)
+                generate_embeddings(
+                    flattened_rows=rows, model="text-embedding-3-large", batch_size=8, cache=cache, dimensions=256
+                )
+
+        self.assertEqual(client.requested_dimensions, [256, None])
+
+    def test_incremental_mode_refuses_different_embedding_dimensions(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            _insert_profile_row(db_path, 1, "profile-1")
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+            ) as embeddings_mock:
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="full",
+                    dimensions=256,
+                )
+                metadata = read_index_metadata(Path(summary["index_path"]))
+                with self.assertRaises(ValueError):
+                    backfill_missing_faiss_indexes(
+                        db_path=db_path,
+                        index_dir=index_dir,
+                        model="text-embedding-3-large",
+                        batch_size=16,
+                        mode="incremental",
+                    )
+
+        self.assertEqual(embeddings_mock.call_args.kwargs["dimensions"], 256)
+        self.assertEqual(metadata["embedding_dimensions"], 256)
+
+    def test_pack_embedding_batches_respects_input_and_token_limits(self) -> None:
+        texts = ["a" * 40, "b" * 40, "c" * 400, "d" * 4, "e" * 4, "f" * 4]
+
+        batches = pack_embedding_batches(texts, max_batch_inputs=2, max_batch_tokens=100)
+
+        self.assertEqual(batches, [[0, 1], [2], [3, 4], [5]])
+
+    def test_truncate_embedding_text_cuts_on_line_break(self) -> None:
+        text = "Full Name: Jane\n" + "\n".join(f"- role {index}" for index in range(50))
+
+        truncated = truncate_embedding_text(text, max_tokens=20)
+
+        self.assertLessEqual(len(truncated), 60)
+        self.assertTrue(text.startswith(truncated))
+        self.assertTrue(text[len(truncated)] == "\n")
+        self.assertEqual(truncate_embedding_text("short", max_tokens=20), "short")
+
+    def test_generate_embeddings_runs_batches_concurrently_in_input_order(self) -> None:
+        client = _FakeAsyncEmbeddingsClient(delay_for=lambda batch: 0.05 if "a" in batch[0] else 0.0)
+        rows = [{"flattened_text": text} for text in ("a", "bb", "ccc", "dddd", "x" * 200_000)]
+        with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}), patch(
+            "flow.services.resume_indexer.AsyncOpenAI", return_value=client
+        ):
+            embeddings = generate_embeddings(
+                flattened_rows=rows,
+                model="text-embedding-3-large",
+                batch_size=2,
+                rate_limiter=AdaptiveRateLimiter(requests_per_minute=6000, tokens_per_minute=10_000_000),
+                max_in_flight=3,
+            )
+
+        self.assertEqual([vector[0] for vector in embeddings[:4]], [1.0, 2.0, 3.0, 4.0])
+        self.assertLessEqual(embeddings[4][0], EMBEDDING_MAX_INPUT_TOKENS * 3)
+        self.assertEqual(len(client.requests), 3)
+        self.assertEqual(client.max_concurrent, 3)
+
+
+    def test_full_mode_streams_rows_in_pages(self) -> None:
+        import faiss
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            for row_id in range(1, 8):
+                _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id
+            ) as embeddings_mock:
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=Path(temp_dir) / "indexes",
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="full",
+                    page_size=3,
+                )
+            index = faiss.read_index(summary["index_path"])
+            all_pages = [
+                [row["id"] for row in page] for page in iter_profile_row_pages(db_path, page_size=5)
+            ]
+
+        page_ids = [
+            [row["id"] for row in call.kwargs["flattened_rows"]] for call in embeddings_mock.call_args_list
+        ]
+        self.assertEqual(page_ids, [[1, 2, 3], [4, 5, 6], [7]])
+        self.assertEqual(summary["indexed_row_ids"], list(range(1, 8)))
+        self.assertEqual(index.ntotal, 7)
+        self.assertEqual(index.reconstruct(7)[0], 7.0)
+        self.assertEqual(all_pages, [[1, 2, 3, 4, 5], [6, 7]])
+
+    def test_full_mode_resumes_from_checkpoint_after_crash(self) -> None:
+        import faiss
+
+        def crash_on_third_row(*, flattened_rows, **kwargs):
+            if any(row["id"] == 3 for row in flattened_rows):
+                raise RuntimeError("embedding API unavailable")
+            return _embed_by_row_id(flattened_rows=flattened_rows, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            checkpoint_dir = index_dir / ".backfill_checkpoint"
+            _create_resume_profiles_table(db_path)
+            for row_id in range(1, 6):
+                _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+            backfill_kwargs = {
+                "db_path": db_path,
+                "index_dir": index_dir,
+                "model": "text-embedding-3-large",
+                "batch_size": 16,
+                "mode": "full",
+                "page_size": 1,
+                "checkpoint_dir": checkpoint_dir,
+            }
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=crash_on_third_row
+            ), self.assertRaises(RuntimeError):
+                backfill_missing_faiss_indexes(**backfill_kwargs)
+            with sqlite3.connect(db_path) as conn:
+                self.assertEqual(
+                    conn.execute("SELECT COUNT(*) FROM resume_profiles WHERE faiss_index_path IS NOT NULL").fetchone()[0],
+                    0,
+                )
+                conn.execute("UPDATE resume_profiles SET updated_at = '2999-01-01T00:00:00+00:00' WHERE id = 1")
+                conn.execute("DELETE FROM resume_profiles WHERE id = 2")
+                conn.commit()
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings",
+                side_effect=lambda **kwargs: _embed_by_row_id(scale=10.0, **kwargs),
+            ) as embeddings_mock:
+                summary = backfill_missing_faiss_indexes(**backfill_kwargs)
+            index = faiss.read_index(summary["index_path"])
+            checkpoint_left = checkpoint_dir.exists()
+
+        embedded_ids = [row["id"] for call in embeddings_mock.call_args_list for row in call.kwargs["flattened_rows"]]
+        self.assertEqual(embedded_ids, [1, 3, 4, 5])
+        self.assertEqual(summary["resumed_chunk_count"], 2)
+        self.assertEqual(sorted(summary["indexed_row_ids"]), [1, 3, 4, 5])
+        self.assertEqual(sorted(faiss.vector_to_array(index.id_map).tolist()), [1, 3, 4, 5])
+        self.assertEqual(index.reconstruct(1)[0], 10.0)
+        self.assertFalse(checkpoint_left)
+
+    def test_full_mode_resumes_hnsw_index_from_checkpoint(self) -> None:
+        import faiss
+
+        def crash_on_third_row(*, flattened_rows, **kwargs):
+            if any(row["id"] == 3 for row in flattened_rows):
+                raise RuntimeError("embedding API unavailable")
+            return _embed_by_row_id(flattened_rows=flattened_rows, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            checkpoint_dir = Path(temp_dir) / "indexes" / ".backfill_checkpoint"
+            _create_resume_profiles_table(db_path)
+            for row_id in range(1, 6):
+                _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+            backfill_kwargs = {
+                "db_path": db_path,
+                "index_dir": Path(temp_dir) / "indexes",
+                "model": "text-embedding-3-large",
+                "batch_size": 16,
+                "mode": "full",
+                "page_size": 1,
+                "checkpoint_dir": checkpoint_dir,
+                "index_factory": "HNSW8",
+            }
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings", side_effect=crash_on_third_row
+            ), self.assertRaises(RuntimeError):
+                backfill_missing_faiss_indexes(**backfill_kwargs)
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE resume_profiles SET updated_at = '2999-01-01T00:00:00+00:00' WHERE id = 1")
+                conn.execute("DELETE FROM resume_profiles WHERE id = 2")
+                conn.commit()
+
+            with patch(
+                "flow.services.resume_indexer.generate_embeddings",
+                side_effect=lambda **kwargs: _embed_by_row_id(scale=10.0, **kwargs),
+            ):
+                summary = backfill_missing_faiss_indexes(**backfill_kwargs)
+            index = faiss.read_index(summary["index_path"])
+            checkpoint_left = checkpoint_dir.exists()
+
+        self.assertEqual(summary["resumed_chunk_count"], 2)
+        self.assertEqual(sorted(faiss.vector_to_array(index.id_map).tolist()), [1, 3, 4, 5])
+        self.assertEqual(index.reconstruct(1)[0], 10.0)
+        self.assertFalse(checkpoint_left)
+
+    def test_full_mode_builds_trained_factory_index_with_search_params(self) -> None:
+        import faiss
+        import numpy as np
+
+        def embed_spread(*, flattened_rows, **_kwargs):
+            return [[float(row["id"]), float(row["id"] % 3), float(row["id"] % 5)] for row in flattened_rows]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            for row_id in range(1, 13):
+                _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+
+            with patch("flow.services.resume_indexer.generate_embeddings", side_effect=embed_spread):
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=Path(temp_dir) / "indexes",
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="full",
+                    page_size=3,
+                    index_factory="IVF2,Flat",
+                    train_sample_size=5,
+                    search_params={"nprobe": 2, "efSearch": 64, "k_factor_rf": 4},
+                )
+            index = faiss.read_index(summary["index_path"])
+            metadata = read_index_metadata(Path(summary["index_path"]))
+
+        self.assertEqual(index.ntotal, 12)
+        self.assertTrue(index.is_trained)
+        self.assertEqual(metadata["index_factory"], "IVF2,Flat")
+        self.assertEqual(metadata["model"], "text-embedding-3-large")
+        self.assertEqual(metadata["ntotal"], 12)
+        self.assertEqual(metadata["search_params"], {"nprobe": 2})
+        apply_search_parameters(index, metadata["search_params"])
+        _, ids = index.search(np.array([[7.0, 1.0, 2.0]], dtype="float32"), 1)
+        self.assertEqual(ids[0][0], 7)
+        with self.assertRaises(ValueError):
+            apply_search_parameters(index, {"efSearch": 32})
+
+    def test_cosine_metric_normalizes_vectors_into_inner_product_index(self) -> None:
+        import faiss
+        import numpy as np
+
+        def embed_scaled(*, flattened_rows, **_kwargs):
+            # Same direction at different magnitudes: L2 would separate them, cosine must not.
+            return [[float(row["id"]), 0.0] if row["id"] % 2 else [0.0, float(row["id"])] for row in flattened_rows]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            for row_id in range(1, 5):
+                _insert_profile_row(db_path, row_id, f"profile-{row_id}")
+
+            with patch("flow.services.resume_indexer.generate_embeddings", side_effect=embed_scaled):
+                summary = backfill_missing_faiss_indexes(
+                    db_path=db_path,
+                    index_dir=index_dir,
+                    model="text-embedding-3-large",
+                    batch_size=16,
+                    mode="full",
+                    metric="cosine",
+                )
+                index = faiss.read_index(summary["index_path"])
+                metadata = read_index_metadata(Path(summary["index_path"]))
+
+                _insert_profile_row(db_path, 5, "profile-5")
+                with self.assertRaises(ValueError):
+                    backfill_missing_faiss_indexes(
+                        db_path=db_path,
+                        index_dir=index_dir,
+                        model="text-embedding-3-large",
+                        batch_size=16,
+                        mode="incremental",
+                        metric="l2",
+                    )
+
+        self.assertEqual(metadata["metric"], "cosine")
+        self.assertEqual(index.metric_type, faiss.METRIC_INNER_PRODUCT)
+        self.assertTrue(np.allclose(np.linalg.norm(index.reconstruct(3)), 1.0))
+        scores, ids = index.search(np.array([[1.0, 0.0]], dtype="float32"), 2)
+        self.assertEqual(sorted(ids[0].tolist()), [1, 3])
+        self.assertTrue(np.allclose(scores[0], [1.0, 1.0]))
+
+    def test_registry_promotes_each_full_build_and_refreshes_incremental_updates(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_dir = Path(temp_dir) / "indexes"
+            _create_resume_profiles_table(db_path)
+            _insert_profile_row(db_path, 1, "profile-1")
+            self.assertIsNone(fetch_current_registered_index(db_path))
+
+            run = dict(db_path=db_path, index_dir=index_dir, model="text-embedding-3-large", batch_size=16)
+            with patch("flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id):
+                first = backfill_missing_faiss_indexes(**run, mode="full")
+                second = backfill_missing_faiss_indexes(**run, mode="full")
+            self.assertEqual(fetch_registered_faiss_index(db_path, Path(first["index_path"]))["status"], "retired")
+            current = fetch_current_registered_index(db_path)
+            self.assertEqual(current["path"], second["index_path"])
+            self.assertEqual(
+                (current["model"], current["metric"], current["dimension"], current["ntotal"]),
+                ("text-embedding-3-large", "l2", 3, 1),
+            )
+            self.assertEqual(current["checksum"], compute_file_sha256(Path(second["index_path"])))
+
+            _insert_profile_row(db_path, 2, "profile-2")
+            with patch("flow.services.resume_indexer.generate_embeddings", side_effect=_embed_by_row_id):
+                appended = backfill_missing_faiss_indexes(**run, mode="incremental")
+                _insert_profile_row(db_path, 3, "profile-3")
+                missing = backfill_missing_faiss_indexes(**run, mode="missing")
+            refreshed = fetch_current_registered_index(db_path)
+            self.assertEqual(refreshed["path"], appended["index_path"])
+            self.assertEqual(refreshed["ntotal"], 2)
+            self.assertEqual(refreshed["checksum"], compute_file_sha256(Path(appended["index_path"])))
+            self.assertEqual(fetch_registered_faiss_index(db_path, Path(second["index_path"]))["status"], "retired")
+            self.assertEqual(fetch_registered_faiss_index(db_path, Path(missing["index_path"]))["status"], "ready")
+            self.assertEqual(fetch_current_faiss_index_path(db_path), Path(appended["index_path"]))
+
+            promote_faiss_index(db_path, Path(first["index_path"]))
+            self.assertEqual(fetch_current_registered_index(db_path)["path"], first["index_path"])
+            with self.assertRaises(ValueError):
+                promote_faiss_index(db_path, Path(temp_dir) / "unregistered.faiss")
+            self.assertEqual(fetch_current_registered_index(db_path)["path"], first["index_path"])
+
+    def test_streaming_index_builder_trains_small_corpus_on_finish(self) -> None:
+        import numpy as np
+
+        builder = StreamingIndexBuilder("SQ8", train_sample_size=1000)
+        builder.add(np.array([1, 2], dtype="int64"), np.array([[0.0, 1.0], [1.0, 0.0]], dtype="float32"))
+        builder.add(np.array([3], dtype="int64"), np.array([[1.0, 1.0]], dtype="float32"))
+        self.assertEqual(builder.index.ntotal, 0)
+        index = builder.finish()
+        self.assertTrue(index.is_trained)
+        self.assertEqual(index.ntotal, 3)
+
+        hnsw_builder = StreamingIndexBuilder("HNSW8")
+        hnsw_builder.add(np.array([1], dtype="int64"), np.array([[0.0, 1.0]], dtype="float32"))
+        with self.assertRaises(ValueError):
+            hnsw_builder.remove(np.array([1], dtype="int64"))
+
 
 class FlowWiringTests(unittest.TestCase):
     def test_resume_faiss_backfill_flow_calls_indexer_service(self) -> None:
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from flow.pipelines.resume_knn_batch_search_flow import (  # noqa: E402
+    ResumeKnnBatchSearchFlow,
+    _load_text_queries,
+    _parse_stems,
+)
+from flow.services.faiss_index_builder import write_index_metadata  # noqa: E402
+
+
+def _create_indexed_profiles(db_path: Path, index_path: Path, vectors_by_id: dict[int, list[float]]) -> None:
+    import faiss
+    import numpy as np
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE resume_profiles (
+                id INTEGER PRIMARY KEY,
+                pdf_stem TEXT NOT NULL UNIQUE,
+                source_pdf TEXT NOT NULL,
+                full_name TEXT,
+                profile_json TEXT NOT NULL,
+                prompt_version_sha TEXT NOT NULL,
+                faiss_index_path TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.executemany(
+            """
+            INSERT INTO resume_profiles
+            (id, pdf_stem, source_pdf, full_name, profile_json, prompt_version_sha, faiss_index_path, created_at, updated_at)
+            VALUES (?, ?, ?, ?, '{}', 'sha', ?, '2026-02-22T00:00:00+00:00', '2026-02-22T00:00:00+00:00')
+            """,
+            [(row_id, f"stem-{row_id}", f"/tmp/{row_id}.pdf", f"Name {row_id}", str(index_path)) for row_id in vectors_by_id],
+        )
+        conn.commit()
+
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(2))
+    index.add_with_ids(
+        np.array(list(vectors_by_id.values()), dtype="float32"),
+        np.array(list(vectors_by_id), dtype="int64"),
+    )
+    faiss.write_index(index, str(index_path))
+    write_index_metadata(
+        index_path,
+        {"model": "text-embedding-3-large", "metric": "l2", "dimension": 2, "ntotal": index.ntotal},
+    )
+
+
+class KnnBatchQueryInputTests(unittest.TestCase):
+    def test_parse_stems_accepts_list_or_file_and_dedupes(self) -> None:
+        self.assertEqual(_parse_stems(" a, b,,a "), ["a", "b"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stems_path = Path(temp_dir) / "stems.txt"
+            stems_path.write_text("x\n\ny\nx\n", encoding="utf-8")
+            self.assertEqual(_parse_stems(f"@{stems_path}"), ["x", "y"])
+
+    def test_load_text_queries_requires_text_and_defaults_ids(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queries_path = Path(temp_dir) / "queries.jsonl"
+            queries_path.write_text(
+                json.dumps({"id": "jd-1", "text": "Go engineer"}) + "\n\n" + json.dumps({"text": "SRE"}) + "\n",
+                encoding="utf-8",
+            )
+            queries = _load_text_queries(queries_path)
+            self.assertEqual([query["query_id"] for query in queries], ["jd-1", "line-3"])
+            self.assertEqual({query["source"] for query in queries}, {"text"})
+
+            queries_path.write_text(json.dumps({"id": "bad"}) + "\n", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                _load_text_queries(queries_path)
+
+
+class KnnBatchSearchStepTests(unittest.TestCase):
+    def test_one_matrix_search_serves_stems_and_embedded_queries(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            index_path = Path(temp_dir) / "shared.faiss"
+            _create_indexed_profiles(
+                db_path,
+                index_path,
+                {1: [0.0, 0.0], 2: [1.0, 0.0], 3: [5.0, 5.0]},
+            )
+            for output_name in ("results.jsonl", "results.csv"):
+                state = SimpleNamespace(
+                    resolved_db_path=db_path,
+                    resolved_index_path=index_path,
+                    index_metric="l2",
+                    search_params={},
+                    top_n=2,
+                    threads=1,
+                    output=str(Path(temp_dir) / output_name),
+                    embedding_model="text-embedding-3-large",
+                    queries=[
+                        {"query_id": "stem-1", "source": "stem", "pdf_stem": "stem-1"},
+                        {"query_id": "jd", "source": "text", "text": "x", "embedding": [5.0, 4.9]},
+                        {"query_id": "gone", "source": "stem", "pdf_stem": "missing"},
+                        {"query_id": "broken", "source": "pdf", "error": "extraction failed"},
+                    ],
+                    end=object(),
+                )
+                state._embedding_cache = lambda: None
+                state.next = lambda step: setattr(state, "_next_step", step)
+                state.resolve_and_write = object()
+
+                ResumeKnnBatchSearchFlow.search(state)
+                self.assertEqual(state.searchable, [0, 1])
+                ResumeKnnBatchSearchFlow.resolve_and_write(state)
+
+                stem_result, text_result, missing_result, failed_result = state.results
+                # The stem's own row is dropped and the rest re-ranked.
+                self.assertEqual([neighbor["id"] for neighbor in stem_result["neighbors"]], [2, 3])
+                self.assertEqual(stem_result["neighbors"][0]["rank"], 1)
+                self.assertEqual([neighbor["id"] for neighbor in text_result["neighbors"]], [3, 2])
+                self.assertIn("missing", missing_result["error"])
+                self.assertEqual(failed_result["error"], "extraction failed")
+                self.assertEqual(state._next_step, state.end)
+
+                if output_name.endswith(".jsonl"):
+                    lines = state.output_path.read_text(encoding="utf-8").splitlines()
+                    self.assertEqual([json.loads(line)["query_id"] for line in lines], ["stem-1", "jd", "gone", "broken"])
+                else:
+                    with state.output_path.open(encoding="utf-8", newline="") as file_obj:
+                        rows = list(csv.DictReader(file_obj))
+                    self.assertEqual(len(rows), 6)
+                    self.assertEqual(rows[0]["pdf_stem"], "stem-2")
+                    self.assertEqual(rows[-1]["error"], "extraction failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,44 @@
 from __future__ import annotations
 
+import contextlib
 import inspect
+import io
+import json
+import os
 import sqlite3
 import sys
 import tempfile
+import threading
+import time
 import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from types import SimpleNamespace
+from unittest.mock import patch
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from flow.pipelines.resume_knn_search_flow import (  # noqa: E402
-    ResumeKnnSearchFlow,
-    _fetch_index_rows,
+from flow.pipelines.resume_knn_search_flow import ResumeKnnSearchFlow  # noqa: E402
+from flow.services.faiss_index_builder import write_index_metadata  # noqa: E402
+from flow.services.faiss_index_registry import promote_faiss_index, register_faiss_index  # noqa: E402
+from flow.services.embedding_cache import EmbeddingCache, compute_text_sha256  # noqa: E402
+from flow.services.extraction_cache import ResumeExtractionCache  # noqa: E402
+from flow.services.knn_search import (  # noqa: E402
+    LoadedFaissIndex,
+    fetch_index_rows,
+    fetch_profile_row,
+    fetch_rows_by_id,
+    merge_search_parameters,
+    stored_query_vector,
+)
+from flow.services.knn_search_service import KnnSearchHTTPServer, ResidentKnnSearcher  # noqa: E402
+from flow.services.query_embedding_cache import QueryEmbeddingCache  # noqa: E402
+from flow.services.shared_budget import (  # noqa: E402
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    SharedTokenBudget,
 )
 
 
@@ -36,6 +62,24 @@ def _create_resume_profiles_table(db_path: Path) -> None:
         conn.commit()
 
 
+def _publish_id_map_index(db_path: Path, index_path: Path, vectors_by_id: dict[int, list[float]]) -> None:
+    import faiss
+    import numpy as np
+
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(len(next(iter(vectors_by_id.values())))))
+    index.add_with_ids(
+        np.array(list(vectors_by_id.values()), dtype="float32"),
+        np.array(list(vectors_by_id), dtype="int64"),
+    )
+    temp_path = index_path.with_name(f".{index_path.name}.tmp")
+    faiss.write_index(index, str(temp_path))
+    os.replace(temp_path, index_path)
+    metadata = {"model": "text-embedding-3-large", "metric": "l2", "dimension": index.d, "ntotal": index.ntotal}
+    write_index_metadata(index_path, metadata)
+    register_faiss_index(db_path, index_path, metadata)
+    promote_faiss_index(db_path, index_path)
+
+
 class ResumeKnnSearchFlowHelpersTests(unittest.TestCase):
     def test_fetch_index_rows_filters_and_orders_by_id(self) -> None:
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -101,7 +145,7 @@ class ResumeKnnSearchFlowHelpersTests(unittest.TestCase):
                 )
                 conn.commit()
 
-            rows = _fetch_index_rows(db_path=db_path, index_path=index_a)
+            rows = fetch_index_rows(db_path=db_path, index_path=index_a)
             self.assertEqual([row["id"] for row in rows], [1, 2])
             self.assertEqual([row["pdf_stem"] for row in rows], ["one", "two"])
 
@@ -153,8 +197,11 @@ class ResumeKnnSearchFlowHelpersTests(unittest.TestCase):
             state = SimpleNamespace(
                 resolved_db_path=db_path,
                 resolved_index_path=index_path,
+                index_has_row_ids=False,
+                index_metric="l2",
                 knn_indices=[1, 0, 99],
                 knn_distances=[0.1, 0.2, 0.3],
+                query_row_id=None,
                 effective_k=3,
                 end=object(),
             )
@@ -169,12 +216,398 @@ class ResumeKnnSearchFlowHelpersTests(unittest.TestCase):
             self.assertEqual(state._next_step, state.end)
 
 
+    def test_resolve_neighbors_looks_up_row_ids_from_id_map_index(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            with sqlite3.connect(db_path) as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO resume_profiles
+                    (id, pdf_stem, source_pdf, full_name, profile_json, prompt_version_sha, faiss_index_path, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, '{}', 'sha', NULL, '2026-02-22T00:00:00+00:00', '2026-02-22T00:00:00+00:00')
+                    """,
+                    [(10, "alpha", "/tmp/alpha.pdf", "Alpha"), (20, "beta", "/tmp/beta.pdf", "Beta")],
+                )
+                conn.commit()
+
+            self.assertEqual(sorted(fetch_rows_by_id(db_path, [20, 10, 30])), [10, 20])
+            # More ids than SQLite binds in one statement (999 on older builds) are chunked.
+            connect = sqlite3.connect
+
+            def connect_with_old_limit(*args: object, **kwargs: object) -> sqlite3.Connection:
+                conn = connect(*args, **kwargs)
+                conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+                return conn
+
+            with patch("flow.services.knn_search.sqlite3.connect", side_effect=connect_with_old_limit):
+                self.assertEqual(sorted(fetch_rows_by_id(db_path, list(range(2_000)))), [10, 20])
+
+            state = SimpleNamespace(
+                resolved_db_path=db_path,
+                resolved_index_path=Path(temp_dir) / "shared.faiss",
+                index_has_row_ids=True,
+                index_metric="cosine",
+                knn_indices=[20, 10, -1],
+                knn_distances=[0.1, 0.2, 0.3],
+                query_row_id=None,
+                effective_k=3,
+                end=object(),
+            )
+            state.next = lambda step: setattr(state, "_next_step", step)
+
+            ResumeKnnSearchFlow.resolve_neighbors(state)
+
+        self.assertEqual([neighbor.get("pdf_stem") for neighbor in state.neighbors], ["beta", "alpha", None])
+        self.assertEqual(state.neighbors[0]["faiss_id"], 20)
+        self.assertEqual(state.neighbors[0]["similarity"], 0.1)
+        self.assertNotIn("distance", state.neighbors[0])
+        self.assertNotIn("faiss_index_position", state.neighbors[0])
+
+    def test_rerank_factor_requires_refine_index(self) -> None:
+        overrides = {"nprobe": 0, "efSearch": 0, "k_factor_rf": 4}
+        refine_metadata = {"index_factory": "IVF1024,SQ8,RFlat", "search_params": {"nprobe": 8}}
+        self.assertEqual(merge_search_parameters(refine_metadata, overrides), {"nprobe": 8, "k_factor_rf": 4})
+        for metadata in ({"index_factory": "HNSW32"}, {}):
+            with self.assertRaisesRegex(ValueError, "--rerank-factor needs an index built with an RFlat"):
+                merge_search_parameters(metadata, overrides)
+        self.assertEqual(merge_search_parameters({}, {"k_factor_rf": 0}), {})
+
+    def test_free_text_query_is_embedded_without_extraction(self) -> None:
+        state = SimpleNamespace(
+            query_row=None,
+            query_text_input="Staff backend engineer, Go, Kafka",
+            embedding_model="text-embedding-3-large",
+            index_metadata={"embedding_dimensions": 256},
+            search=object(),
+        )
+        state.next = lambda step: setattr(state, "_next_step", step)
+        state._interactive_rate_limiter = lambda model: None
+        state._embed_query_text = lambda text: ResumeKnnSearchFlow._embed_query_text(state, text)
+
+        with patch(
+            "flow.pipelines.resume_knn_search_flow.generate_embeddings", return_value=[[0.5, 0.5]]
+        ) as generate_embeddings_mock, patch(
+            "flow.pipelines.resume_knn_search_flow.extract_resume_profile_from_pdf"
+        ) as extract_mock:
+            ResumeKnnSearchFlow.extract_and_embed(state)
+
+        extract_mock.assert_not_called()
+        generate_embeddings_mock.assert_called_once()
+        call_kwargs = generate_embeddings_mock.call_args.kwargs
+        self.assertEqual(call_kwargs["flattened_rows"], [{"flattened_text": "Staff backend engineer, Go, Kafka"}])
+        self.assertEqual(call_kwargs["dimensions"], 256)
+        self.assertEqual(state.query_embedding, [0.5, 0.5])
+        self.assertEqual(state._next_step, state.search)
+
+
+class QueryEmbeddingCacheTests(unittest.TestCase):
+    def test_repeat_pdf_query_skips_extraction_and_embedding(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = Path(temp_dir) / "resume.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4 fake")
+
+            def run_extract_and_embed(extraction_model: str) -> SimpleNamespace:
+                state = SimpleNamespace(
+                    query_row=None,
+                    query_text_input=None,
+                    source_pdf=pdf_path,
+                    query_cache_path=str(Path(temp_dir) / "query_cache.db"),
+                    query_cache_max_mb=1,
+                    extraction_cache_path=str(Path(temp_dir) / "extraction_cache.db"),
+                    extraction_model=extraction_model,
+                    embedding_model="text-embedding-3-large",
+                    index_metadata={},
+                    file_store_path="",
+                    text_layer=False,
+                    search=object(),
+                )
+                state.next = lambda step: setattr(state, "_next_step", step)
+                state._interactive_rate_limiter = lambda model: None
+                state._embed_query_text = lambda text: ResumeKnnSearchFlow._embed_query_text(state, text)
+                ResumeKnnSearchFlow.extract_and_embed(state)
+                return state
+
+            with patch(
+                "flow.pipelines.resume_knn_search_flow.resolve_prompt_cache_sha", return_value="sha-v1"
+            ), patch(
+                "flow.pipelines.resume_knn_search_flow.extract_resume_profile_from_pdf",
+                return_value={"personal_information": {"full_name": "Jane Doe", "headline": "Engineer"}},
+            ) as extract_mock, patch(
+                "flow.pipelines.resume_knn_search_flow.generate_embeddings", return_value=[[0.25, 0.75]]
+            ) as generate_embeddings_mock:
+                first = run_extract_and_embed("gpt-5.1")
+                second = run_extract_and_embed("gpt-5.1")
+                run_extract_and_embed("gpt-5-mini")
+
+            self.assertEqual(extract_mock.call_count, 2)
+            # A query-cache miss still reuses extractions through the shared extraction cache.
+            extract_kwargs = extract_mock.call_args.kwargs
+            self.assertIsInstance(extract_kwargs["cache"], ResumeExtractionCache)
+            self.assertEqual(extract_kwargs["prompt_sha"], "sha-v1")
+            self.assertEqual(generate_embeddings_mock.call_count, 2)
+            self.assertEqual(second.query_embedding, [0.25, 0.75])
+            self.assertEqual(second.flattened_profile, first.flattened_profile)
+            self.assertEqual(second.query_cache_stats["hits"], 1)
+            self.assertEqual(second._next_step, second.search)
+
+    def test_cache_evicts_least_recently_used_entries_over_size_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 4 bytes of text plus two float32s.
+            cache = QueryEmbeddingCache(Path(temp_dir) / "query_cache.db", max_bytes=24)
+            identity = {"prompt_sha": "p", "extraction_model": "m", "embedding_model": "e"}
+            with patch(
+                "flow.services.query_embedding_cache._utc_now_iso",
+                side_effect=[
+                    "2026-02-22T00:00:00+00:00",
+                    "2026-02-22T00:01:00+00:00",
+                    "2026-02-22T00:02:00+00:00",
+                    "2026-02-22T00:03:00+00:00",
+                ],
+            ):
+                cache.put(pdf_sha256="a", flattened_text="aaaa", embedding=[1.0, 0.0], **identity)
+                cache.put(pdf_sha256="b", flattened_text="bbbb", embedding=[0.0, 1.0], **identity)
+                self.assertIsNotNone(cache.get(pdf_sha256="a", **identity))
+                cache.put(pdf_sha256="c", flattened_text="cccc", embedding=[1.0, 1.0], **identity)
+
+            self.assertEqual(cache.get(pdf_sha256="a", **identity)["embedding"], [1.0, 0.0])
+            self.assertIsNone(cache.get(pdf_sha256="b", **identity))
+            self.assertIsNone(cache.get(pdf_sha256="a", dimensions=256, **identity))
+            self.assertEqual(cache.stats()["entry_count"], 2)
+
+
+class ResidentKnnSearchServiceTests(unittest.TestCase):
+    def test_service_answers_from_memory_and_hot_reloads_promoted_index(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            with sqlite3.connect(db_path) as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO resume_profiles
+                    (id, pdf_stem, source_pdf, full_name, profile_json, prompt_version_sha, faiss_index_path, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, '{}', 'sha', NULL, '2026-02-22T00:00:00+00:00', '2026-02-22T00:00:00+00:00')
+                    """,
+                    [(10, "alpha", "/tmp/alpha.pdf", "Alpha"), (20, "beta", "/tmp/beta.pdf", "Beta")],
+                )
+                conn.commit()
+            first_path = Path(temp_dir) / "first.faiss"
+            _publish_id_map_index(db_path, first_path, {10: [0.0, 0.0], 20: [5.0, 5.0]})
+
+            searcher = ResidentKnnSearcher(
+                db_path, embedding_model="text-embedding-3-large", reload_interval_seconds=0
+            )
+            server = KnnSearchHTTPServer(("127.0.0.1", 0), searcher)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            base_url = f"http://127.0.0.1:{server.server_port}"
+
+            def post_search(payload: dict[str, object]) -> dict[str, object]:
+                request = urllib.request.Request(
+                    f"{base_url}/search", data=json.dumps(payload).encode("utf-8"), method="POST"
+                )
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return json.loads(response.read())
+
+            try:
+                first = post_search({"vector": [4.0, 4.0], "top_n": 1})
+                second_path = Path(temp_dir) / "second.faiss"
+                _publish_id_map_index(db_path, second_path, {10: [4.0, 4.0], 20: [0.0, 0.0]})
+                second = post_search({"vector": [4.0, 4.0], "top_n": 1})
+                by_stem = post_search({"pdf_stem": "alpha", "top_n": 5})
+                with urllib.request.urlopen(f"{base_url}/health", timeout=5) as response:
+                    health = json.loads(response.read())
+                with self.assertRaises(urllib.error.HTTPError) as raised:
+                    post_search({"top_n": 1})
+                with self.assertRaises(urllib.error.HTTPError) as not_found:
+                    post_search({"pdf_stem": "missing", "top_n": 1})
+                not_found_body = json.loads(not_found.exception.read())
+                with patch(
+                    "flow.services.knn_search_service.resolve_neighbor_rows",
+                    side_effect=sqlite3.OperationalError("database is locked"),
+                ), contextlib.redirect_stderr(io.StringIO()) as server_stderr, self.assertRaises(
+                    urllib.error.HTTPError
+                ) as server_error:
+                    post_search({"vector": [4.0, 4.0], "top_n": 1})
+                server_error_body = json.loads(server_error.exception.read())
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        self.assertEqual(first["index_path"], str(first_path))
+        self.assertEqual(first["neighbors"][0]["pdf_stem"], "beta")
+        self.assertEqual(second["index_path"], str(second_path))
+        self.assertEqual(second["neighbors"][0]["pdf_stem"], "alpha")
+        self.assertEqual((health["reload_count"], health["ntotal"]), (2, 2))
+        self.assertEqual(raised.exception.code, 400)
+        self.assertEqual(not_found.exception.code, 404)
+        self.assertIn("missing", not_found_body["error"])
+        self.assertEqual(server_error.exception.code, 500)
+        self.assertIn("database is locked", server_error_body["error"])
+        self.assertIn("Traceback", server_stderr.getvalue())
+        self.assertEqual([neighbor["pdf_stem"] for neighbor in by_stem["neighbors"]], ["beta"])
+        self.assertEqual(by_stem["neighbors"][0]["rank"], 1)
+
+    def test_stored_query_vector_prefers_cache_and_falls_back_to_index(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "resume_profiles.db"
+            _create_resume_profiles_table(db_path)
+            with sqlite3.connect(db_path) as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO resume_profiles
+                    (id, pdf_stem, source_pdf, full_name, profile_json, prompt_version_sha, faiss_index_path, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, 'sha', NULL, '2026-02-22T00:00:00+00:00', '2026-02-22T00:00:00+00:00')
+                    """,
+                    [
+                        (row_id, stem, f"/tmp/{stem}.pdf", stem, json.dumps({"personal_information": {"full_name": stem}}))
+                        for row_id, stem in ((10, "alpha"), (20, "beta"), (30, "gamma"))
+                    ],
+                )
+                conn.commit()
+            index_path = Path(temp_dir) / "shared.faiss"
+            _publish_id_map_index(db_path, index_path, {10: [1.0, 0.0], 20: [0.0, 1.0]})
+            cache = EmbeddingCache(Path(temp_dir) / "embedding_cache.db")
+            cache.put_many(
+                [(compute_text_sha256("Full Name: beta"), [0.5, 0.5])], model="text-embedding-3-large"
+            )
+            loaded_index = LoadedFaissIndex(index_path)
+
+            def lookup(**row_key: object) -> list[float]:
+                return stored_query_vector(
+                    loaded_index,
+                    db_path,
+                    fetch_profile_row(db_path, **row_key),
+                    embedding_model="text-embedding-3-large",
+                    embedding_cache=cache,
+                )
+
+            self.assertEqual(lookup(pdf_stem="beta"), [0.5, 0.5])
+            self.assertEqual(lookup(row_id=10), [1.0, 0.0])
+            with self.assertRaises(LookupError):
+                lookup(pdf_stem="gamma")
+            with self.assertRaises(LookupError):
+                fetch_profile_row(db_path, pdf_stem="missing")
+
+
+class _QuotaServer(ThreadingHTTPServer):
+    def __init__(self, *, per_second: float, burst: float) -> None:
+        super().__init__(("127.0.0.1", 0), _QuotaHandler)
+        self.per_second = per_second
+        self.burst = burst
+        self.allowance = burst
+        self.updated_at = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+class _QuotaHandler(BaseHTTPRequestHandler):
+    server: _QuotaServer
+
+    def do_POST(self) -> None:  # noqa: N802
+        server = self.server
+        with server.lock:
+            now = time.monotonic()
+            server.allowance = min(
+                server.burst,
+                server.allowance + (now - server.updated_at) * server.per_second,
+            )
+            server.updated_at = now
+            allowed = server.allowance >= 1.0
+            if allowed:
+                server.allowance -= 1.0
+                server.accepted += 1
+            else:
+                server.rejected += 1
+        self.send_response(200 if allowed else 429)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+class SharedTokenBudgetTests(unittest.TestCase):
+    def test_interactive_waiter_blocks_batch_callers(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            now = [1000.0]
+            budget = SharedTokenBudget(
+                Path(temp_dir) / "budget.db",
+                name="text-embedding-3-large",
+                requests_per_minute=60,
+                tokens_per_minute=60_000,
+                burst_seconds=1.0,
+                clock=lambda: now[0],
+            )
+            self.assertEqual(
+                budget.try_acquire(tokens=10, priority=PRIORITY_BATCH, waiter_id="batch"), 0.0
+            )
+            self.assertGreater(
+                budget.try_acquire(tokens=10, priority=PRIORITY_INTERACTIVE, waiter_id="knn"), 0.0
+            )
+
+            now[0] += 1.0
+            self.assertGreater(
+                budget.try_acquire(tokens=10, priority=PRIORITY_BATCH, waiter_id="batch"), 0.0
+            )
+            self.assertEqual(
+                budget.try_acquire(tokens=10, priority=PRIORITY_INTERACTIVE, waiter_id="knn"), 0.0
+            )
+
+            now[0] += 1.0
+            self.assertEqual(
+                budget.try_acquire(tokens=10, priority=PRIORITY_BATCH, waiter_id="batch"), 0.0
+            )
+
+    def test_independent_clients_stay_within_fake_server_quota(self) -> None:
+        server = _QuotaServer(per_second=12.0, burst=6.0)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/embeddings"
+
+        def worker(db_path: Path, priority: int) -> None:
+            # Each worker opens its own budget handle, as a separate flow process would.
+            budget = SharedTokenBudget(
+                db_path,
+                name="text-embedding-3-large",
+                requests_per_minute=600,
+                tokens_per_minute=600_000,
+                burst_seconds=0.5,
+            )
+            for _ in range(6):
+                budget.acquire(tokens=100, priority=priority, timeout_seconds=10.0)
+                request = urllib.request.Request(url, data=b"{}", method="POST")
+                try:
+                    urllib.request.urlopen(request, timeout=5).close()
+                except urllib.error.HTTPError:
+                    pass
+
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                db_path = Path(temp_dir) / "budget.db"
+                workers = [
+                    threading.Thread(target=worker, args=(db_path, priority))
+                    for priority in (PRIORITY_BATCH, PRIORITY_BATCH, PRIORITY_INTERACTIVE)
+                ]
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(server.accepted, 18)
+        self.assertEqual(server.rejected, 0)
+
+
 class FlowWiringTests(unittest.TestCase):
     def test_resume_knn_search_flow_uses_faiss_and_sqlite_mapping(self) -> None:
         class_source = inspect.getsource(ResumeKnnSearchFlow)
-        self.assertIn("faiss.read_index", class_source)
-        self.assertIn("_fetch_index_rows", class_source)
-        self.assertIn("index.search", class_source)
+        self.assertIn("LoadedFaissIndex", class_source)
+        self.assertIn("resolve_neighbor_rows", class_source)
+        self.assertIn("loaded_index.search", class_source)
 
 
 if __name__ == "__main__":